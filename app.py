@@ -1,16 +1,179 @@
 import os, json, asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException, Query
-from services.compressor import compress_one, compress_all_applicants
-from services.decompression import decompress_one, decompress_all
-from services.shortlist import generate_shortlist_one, generate_shortlist
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Match
+from services.compressor import compress_one_async, compress_all_applicants
+from services.decompression import decompress_one_async, decompress_all
+from services.export import export_profiles, applicant_exists, ndjson, gzip_stream
+from services.shortlist import generate_shortlist_one_async, generate_shortlist, reshortlist_flipped, reevaluate_queued
+from services.airtable_async import aapi
+from services.applicant_locks import applicant_locks
+from services.replica import replica
+from services.webhooks import WebhookIngestor, verify_signature, applicant_record_id
+from services.llm_evaluator import breaker as llm_breaker
+from services.reevaluation import reevaluation_queue
+from services.jobs import JobQueue, DEFAULT_PATH as STATE_DB_DEFAULT
+from services.rules import rules_file
+from services import metrics
+from services.profiling import profiled, requested as profile_requested, traces, requests_in_flight
 
-app = FastAPI()
-locks: dict[str, asyncio.Lock] = {}  # ← NEW global lock-registry
 
+# ───────── background jobs for the *_all sweeps ─────────
+def _compressor_all_job(params: dict, progress) -> dict:
+    incremental = params.get("incremental", False)
+    compression = progress.run_phase("compress", lambda p: compress_all_applicants(incremental=incremental, progress=p))
+    shortlist = progress.run_phase("shortlist", lambda p: generate_shortlist(incremental=incremental, progress=p))
+    return {"compression": compression, "shortlist_status": shortlist["message"]}
 
-# ───────── helper: one lock object per applicant ─────────
-def _get_lock(app_id: str) -> asyncio.Lock:
-    return locks.setdefault(app_id, asyncio.Lock())
+
+def _decompressor_all_job(params: dict, progress) -> dict:
+    incremental = params.get("incremental", False)
+    return {"message": progress.run_phase("decompress", lambda p: decompress_all(incremental, progress=p))}
+
+
+def _shortlist_all_job(params: dict, progress) -> dict:
+    incremental = params.get("incremental", False)
+    offline_llm = params.get("offline_llm", False)
+    shortlist = progress.run_phase(
+        "shortlist", lambda p: generate_shortlist(incremental=incremental, progress=p, offline_llm=offline_llm)
+    )
+    return {"shortlist_status": shortlist["message"]}
+
+
+def _rules_changed_job(params: dict, progress) -> dict:
+    shortlist = progress.run_phase("reshortlist", lambda p: reshortlist_flipped(params["previous"], progress=p))
+    return {"rules_version": rules_file.rules.version, "shortlist_status": shortlist["message"]}
+
+
+def _llm_reevaluate_job(params: dict, progress) -> dict:
+    result = progress.run_phase("reevaluate", lambda p: reevaluate_queued(progress=p))
+    return {"message": result["message"]}
+
+
+job_queue = JobQueue(
+    os.getenv("STATE_DB_PATH", STATE_DB_DEFAULT),
+    handlers={
+        "compressor_all": _compressor_all_job,
+        "decompressor_all": _decompressor_all_job,
+        "shortlist_all": _shortlist_all_job,
+        "rules_changed": _rules_changed_job,
+        "llm_reevaluate": _llm_reevaluate_job,
+    },
+)
+
+
+@rules_file.on_change
+def _reshortlist_on_rules_change(old, new):
+    # Only applicants whose outcome flips between `old` and the current rules are rewritten
+    job_queue.enqueue("rules_changed", {"previous": old.config, "version": new.version})
+
+
+@llm_breaker.on_close
+def _reevaluate_on_llm_recovery():
+    # OpenAI is answering again: evaluate the applicants skipped while it was down
+    if len(reevaluation_queue):
+        job_queue.enqueue("llm_reevaluate")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    job_queue.start()  # also resumes jobs interrupted by the last shutdown
+    rules_file.watch()  # hot-reload dictionaries/shortlist_rules.json
+    replica.start()  # no-op unless AIRTABLE_REPLICA_PATH is set
+    yield
+    await webhook_ingestor.aclose()  # run debounced applicants now rather than drop them
+    replica.stop()
+    rules_file.stop()
+    job_queue.stop(timeout=5)
+    await aapi.aclose()  # release the pooled Airtable connections
+
+
+def _queued(job_id: str) -> dict:
+    return {"status": "ok", "job_id": job_id, "job_status": job_queue.status(job_id)["status"], "poll": f"/jobs/{job_id}"}
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+def _runs_on_event_loop(request: Request) -> bool:
+    """Whether the matched endpoint is async (sync ones run in the threadpool, out of cProfile's sight)."""
+    for route in request.app.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return asyncio.iscoroutinefunction(getattr(route, "endpoint", None))
+    return True
+
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    # Opt-in: X-Profile: 1 (or ?profile=1) traces outbound calls; "cprofile" also profiles the Python side
+    with requests_in_flight:
+        trace_it, cprofile = profile_requested(request.headers.get("X-Profile"), request.query_params.get("profile"))
+        if not trace_it:
+            return await call_next(request)
+        skip = None if not cprofile or _runs_on_event_loop(request) else "sync endpoints run in the threadpool"
+        async with profiled(f"{request.method} {request.url.path}", cprofile=cprofile, skip_cprofile=skip) as trace:
+            response = await call_next(request)
+    response.headers["X-Profile-Id"] = trace.id
+    response.headers["Server-Timing"] = trace.server_timing()
+    return response
+
+
+@metrics.timed("applicant")  # end to end: compress, shortlist, LLM
+async def _compress_and_shortlist(applicant_id: str, rec_id: str, fresh: bool = False) -> dict:
+    # fresh: called straight after a form submit, which the replica may not have seen yet
+    result = await compress_one_async(applicant_id=applicant_id, rec_id=rec_id, fresh=fresh)
+    if result["unchanged"]:
+        # Same JSON as stored → nothing for shortlisting / the LLM to redo
+        return {
+            "status": "ok",
+            "rec": rec_id,
+            "payload": result["payload"],
+            "compression": "unchanged",
+            "shortlist_status": "unchanged",
+        }
+
+    # Run shortlisting on this applicant
+    shortlist_result = await generate_shortlist_one_async(
+        applicant_id=applicant_id, rec_id=rec_id, compressed_json=result["payload"]
+    )
+
+    return {
+        "status": "ok",
+        "rec": rec_id,
+        "payload": result["payload"],
+        "compression": "updated",
+        "shortlist_status": shortlist_result["status"],
+    }
+
+
+async def _process_changed_applicant(applicant_id: str):
+    # Debounced webhook changes: compress, then shortlist (and LLM), once per burst
+    rec_id = await applicant_record_id(applicant_id)
+    if rec_id:
+        await applicant_locks.run(applicant_id, _compress_and_shortlist, applicant_id, rec_id)
+
+
+webhook_ingestor = WebhookIngestor(_process_changed_applicant)
+
+
+@app.post("/airtable/webhook")
+async def airtable_webhook(request: Request):
+    body = await request.body()
+    if not verify_signature(body, request.headers.get("X-Airtable-Content-MAC")):
+        raise HTTPException(401, "Invalid webhook signature")
+    try:
+        webhook_id = json.loads(body)["webhook"]["id"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(400, "Missing webhook id")
+    webhook_ingestor.notify(webhook_id)  # payloads are fetched in the background; Airtable wants a quick 200
+    return {"status": "ok"}
+
+
+@app.get("/airtable/webhook")
+def get_webhook_status():
+    return webhook_ingestor.snapshot()
 
 
 @app.post("/run_compressor")
@@ -23,33 +186,18 @@ async def run(req: Request):
     except KeyError:
         raise HTTPException(status_code=400, detail="Missing app_id or rec")
 
-    payload = compress_one(applicant_id=applicant_id, rec_id=rec_id)
-
-    # Run shortlisting on this applicant
-    shortlist_result = generate_shortlist_one(applicant_id=applicant_id, rec_id=rec_id)
-
-    return {"status": "ok", "rec": rec_id, "payload": payload, "shortlist_status": shortlist_result["status"]}
+    return await applicant_locks.run(applicant_id, _compress_and_shortlist, applicant_id, rec_id, True)
 
 
 @app.get("/run_compressor")
-def run_via_get(app_id: str = Query(..., alias="app_id"), rec: str = Query(..., alias="rec")):
-    payload = compress_one(applicant_id=app_id, rec_id=rec)
-
-    # Run shortlisting on this applicant
-    shortlist_result = generate_shortlist_one(applicant_id=app_id, rec_id=rec)
-
-    return {"status": "ok", "rec": rec, "payload": payload, "shortlist_status": shortlist_result["status"]}
+async def run_via_get(app_id: str = Query(..., alias="app_id"), rec: str = Query(..., alias="rec")):
+    return await applicant_locks.run(app_id, _compress_and_shortlist, app_id, rec, True)
 
 
 @app.get("/run_compressor_all")
-def run_compressor_all():
-    # Compress all applicants
-    compress_result = compress_all_applicants()
-
-    # Run shortlisting on all applicants
-    shortlist_result = generate_shortlist()
-
-    return {"status": "ok", "compression": compress_result, "shortlist_status": shortlist_result["message"]}
+def run_compressor_all(incremental: bool = Query(False)):
+    # Compress, then shortlist, all applicants (or only those changed since the last run) in the background
+    return _queued(job_queue.enqueue("compressor_all", {"incremental": incremental}))
 
 
 @app.post("/run_decompressor")
@@ -68,38 +216,93 @@ async def run_decompressor(
     if not (app_id and rec):
         raise HTTPException(400, "Need app_id and rec")
 
-    lock = _get_lock(app_id)
-    async with lock:  # ← SERIALISE per applicant
-        decompress_one(app_id, rec)
+    await applicant_locks.run(app_id, decompress_one_async, app_id, rec)  # serialised per applicant
     return {"status": "ok", "rec": rec}
 
 
-all_lock = asyncio.Lock()
-
-
 @app.get("/run_decompressor")
 async def run_decompressor_via_get(app_id: str = Query(..., alias="app_id"), rec: str = Query(..., alias="rec")):
-    lock = _get_lock(app_id)
-    async with lock:
-        decompress_one(app_id, rec)
+    await applicant_locks.run(app_id, decompress_one_async, app_id, rec)
     return {"status": "ok", "rec": rec}
 
 
 @app.post("/run_decompressor_all")
-async def run_decompressor_all():
-    async with all_lock:  # ← only ONE runs at a time
-        msg = await asyncio.to_thread(decompress_all)
-        # to_thread() runs blocking code without blocking the event loop
-    return {"status": "ok", "message": msg}
+def run_decompressor_all(incremental: bool = Query(False)):
+    # The job worker runs one sweep at a time
+    return _queued(job_queue.enqueue("decompressor_all", {"incremental": incremental}))
 
 
 @app.get("/run_shortlist")
-def run_shortlist_single(app_id: str = Query(..., alias="app_id"), rec: str = Query(..., alias="rec")):
-    shortlist_result = generate_shortlist_one(applicant_id=app_id, rec_id=rec)
+async def run_shortlist_single(app_id: str = Query(..., alias="app_id"), rec: str = Query(..., alias="rec")):
+    shortlist_result = await applicant_locks.run(app_id, generate_shortlist_one_async, app_id, rec)
     return {"status": "ok", "shortlist_status": shortlist_result["status"]}
 
 
 @app.get("/run_shortlist_all")
-def run_shortlist_all():
-    shortlist_result = generate_shortlist()
-    return {"status": "ok", "shortlist_status": shortlist_result["message"]}
+def run_shortlist_all(incremental: bool = Query(False), offline_llm: bool = Query(False)):
+    # offline_llm=true scores through the OpenAI Batch API (cheaper, slower; meant for nightly sweeps)
+    params = {"incremental": incremental}
+    if offline_llm:
+        params["offline_llm"] = True
+    return _queued(job_queue.enqueue("shortlist_all", params))
+
+
+@app.get("/export/profiles")
+def export_profiles_ndjson(after: str | None = Query(None), gzip: bool = Query(False)):
+    # Streams build_json output for every applicant (after the `after` cursor); nothing is written to Airtable
+    if after is not None and not applicant_exists(after):
+        raise HTTPException(404, f"No applicant {after} to resume after")
+    body = ndjson(export_profiles(after))
+    headers = {}
+    if gzip:
+        body = gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
+
+
+@app.get("/run_llm_reevaluate")
+def run_llm_reevaluate():
+    # Also queued automatically when the LLM circuit breaker closes again
+    return _queued(job_queue.enqueue("llm_reevaluate"))
+
+
+@app.get("/llm/status")
+def get_llm_status():
+    return {"circuit": llm_breaker.snapshot(), "reevaluation_queued": len(reevaluation_queue)}
+
+
+@app.get("/replica")
+def get_replica():
+    return replica.snapshot()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/profiles")
+def get_profiles():
+    return {"profiles": traces.summaries()}
+
+
+@app.get("/profiles/{profile_id}")
+def get_profile(profile_id: str):
+    trace = traces.get(profile_id)
+    if trace is None:
+        raise HTTPException(404, f"Unknown profile {profile_id}")
+    return trace.as_dict()
+
+
+@app.get("/rules")
+def get_rules():
+    # load_error: the last edit to the rules file was rejected and these rules are still in force
+    return {"version": rules_file.rules.version, "rules": rules_file.rules.config, "load_error": rules_file.load_error}
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    status = job_queue.status(job_id)
+    if status is None:
+        raise HTTPException(404, f"Unknown job {job_id}")
+    return status
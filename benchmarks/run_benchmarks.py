@@ -0,0 +1,161 @@
+"""
+Offline load benchmark for the three bulk pipelines.
+
+Seeds a FakeAirtable base with N applicants, then runs compress_all_applicants,
+generate_shortlist and decompress_all against it (with a fake LLM) and reports,
+per pipeline: wall time, HTTP calls per table, 429s absorbed, and p50/p99
+per-applicant latency (time between consecutive applicants finishing). An
+applicant finishes when the sweep's progress hook passes it; in the shortlist
+run, one that needs an LLM evaluation only finishes once its result (or its
+re-evaluation queueing) has been handed to the writer.
+
+    python -m benchmarks.run_benchmarks --applicants 500 --airtable-latency 50 --llm-latency 400
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from unittest.mock import patch
+
+# Never touch real services, on-disk caches or state from a benchmark run
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["LLM_CACHE_PATH"] = ""
+os.environ["STATE_DB_PATH"] = ":memory:"
+
+from services import airtable_client, llm_evaluator  # noqa: E402
+from services.compressor import compress_all_applicants  # noqa: E402
+from services.decompression import decompress_all  # noqa: E402
+from services.jobs import NoProgress  # noqa: E402
+from services import shortlist  # noqa: E402
+from services.shortlist import generate_shortlist  # noqa: E402
+from tests.fakes import FakeAirtable, FakeLLMClient, seed_applicants  # noqa: E402
+
+
+class TimingProgress(NoProgress):
+    """Progress sink that records the time each applicant finished (the rest of the protocol is NoProgress's)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished: dict[str, float] = {}
+
+    def start(self, total: int):
+        self.started = time.perf_counter()
+
+    def advance(self, applicant_id: str) -> bool:
+        self.finish(applicant_id)
+        return False
+
+    def finish(self, applicant_id: str):
+        """Mark the applicant finished now (later work, such as its LLM result, moves this forward)."""
+        now = time.perf_counter()
+        self.finished[str(applicant_id)] = max(now, self.finished.get(str(applicant_id), now))
+
+    @property
+    def durations(self) -> list[float]:
+        """Time between consecutive applicants finishing, from the sweep's start."""
+        times = [self.started] + sorted(self.finished.values())
+        return [later - earlier for earlier, later in zip(times, times[1:])]
+
+    def checkpoint(self, flush=None):
+        if flush is not None:
+            flush()
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def shortlist_end_to_end(progress: TimingProgress, **kwargs) -> dict:
+    """generate_shortlist with each applicant's LLM outcome counted as part of finishing it."""
+    apply_llm, queue_reevaluation = shortlist._apply_llm_outputs_to_records, shortlist._queue_reevaluation
+
+    def applied(app_rec, *args, **kw):
+        result = apply_llm(app_rec, *args, **kw)
+        progress.finish(app_rec["fields"]["Applicant ID"])
+        return result
+
+    def queued(app_rec):
+        result = queue_reevaluation(app_rec)
+        progress.finish(app_rec["fields"]["Applicant ID"])
+        return result
+
+    with patch.object(shortlist, "_apply_llm_outputs_to_records", applied), patch.object(
+        shortlist, "_queue_reevaluation", queued
+    ):
+        return generate_shortlist(progress=progress, **kwargs)
+
+
+def run_pipeline(name: str, fake: FakeAirtable, fn) -> dict:
+    fake.reset_counters()
+    progress = TimingProgress()
+    started = time.perf_counter()
+    result = fn(progress)
+    wall = time.perf_counter() - started
+    return {
+        "pipeline": name,
+        "wall_seconds": round(wall, 3),
+        "applicants": len(progress.durations),
+        "http_calls": fake.requests,
+        "http_calls_by_table": fake.calls_by_table(),
+        "rate_limited": fake.rate_limited,
+        "p50_ms": round(percentile(progress.durations, 50) * 1000, 2),
+        "p99_ms": round(percentile(progress.durations, 99) * 1000, 2),
+        "result": result,
+    }
+
+
+def main(argv=None) -> list[dict]:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--applicants", type=int, default=200)
+    parser.add_argument("--airtable-latency", type=float, default=0.0, help="ms added to every Airtable request")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="ms per LLM evaluation")
+    parser.add_argument("--rate-limit-every", type=int, default=None, help="answer every Nth request with a 429")
+    parser.add_argument("--rps", type=float, default=airtable_client.REQUESTS_PER_SECOND, help="limiter rate")
+    parser.add_argument("--llm-concurrency", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    fake = FakeAirtable(
+        latency=args.airtable_latency / 1000, rate_limit_every=args.rate_limit_every, seed=args.seed
+    )
+    seed_applicants(fake, args.applicants, seed=args.seed)
+    llm = FakeLLMClient(latency=args.llm_latency / 1000)
+    airtable_client.api.rate = args.rps
+    airtable_client.api._buckets.clear()
+    llm_evaluator.client = llm
+
+    with fake.installed(airtable_client.api):
+        report = [
+            run_pipeline("compress", fake, lambda p: compress_all_applicants(progress=p)),
+            run_pipeline(
+                "shortlist",
+                fake,
+                lambda p: shortlist_end_to_end(p, llm_concurrency=args.llm_concurrency)["message"],
+            ),
+            run_pipeline("decompress", fake, lambda p: decompress_all(progress=p)),
+        ]
+    report[1]["llm_calls"] = llm.calls
+    report[1]["llm_max_in_flight"] = llm.max_in_flight
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        for row in report:
+            tables = ", ".join(f"{t}={n}" for t, n in sorted(row["http_calls_by_table"].items()))
+            print(
+                f"{row['pipeline']:<10} {row['wall_seconds']:>8.2f}s  {row['applicants']:>6} applicants  "
+                f"{row['http_calls']:>5} calls ({tables})  429s={row['rate_limited']}  "
+                f"p50={row['p50_ms']}ms p99={row['p99_ms']}ms"
+            )
+    return report
+
+
+if __name__ == "__main__":
+    main()
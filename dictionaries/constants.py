@@ -89,19 +89,7 @@ FIELD_MAP = {
 }
 
 
-SHORTLIST_RULES = {
-    "experience": {
-        "min_years": 4,
-        "tier_1_companies": {"Google", "Meta", "OpenAI", "Microsoft", "Amazon", "Apple", "Netflix"},
-    },
-    "salary": {
-        "max_rate": 100,
-        "min_availability": 20,
-    },
-    "location": {
-        "allowed_countries": {"US", "Canada", "UK", "Germany", "India"},
-    },
-}
+# Shortlist rules live in dictionaries/shortlist_rules.json (hot-reloaded; see services/rules.py)
 
 
 # Airtable Base and Table IDs
@@ -0,0 +1,193 @@
+"""
+Async Airtable access for the webhook endpoints.
+
+AsyncAirtable sends the same REST calls as the pyairtable client through a
+pooled httpx.AsyncClient (one per event loop), and takes its tokens from the
+same per-base TokenBucket as `airtable_client.api`, so sync sweeps and async
+webhooks share one rate limit and one 429 penalty window. AsyncTable mirrors
+the parts of pyairtable's Table the services use.
+"""
+
+import os
+import time
+import asyncio
+import httpx
+from dotenv import load_dotenv
+from dictionaries.constants import BASE_ID
+from services import metrics
+from services.airtable_client import API, api, MAX_429_RETRIES, _retry_after, chunked, record_call
+
+load_dotenv()
+
+AIRTABLE_URL = "https://api.airtable.com/v0"
+MAX_CONNECTIONS = int(os.getenv("AIRTABLE_MAX_CONNECTIONS", "20"))  # pooled keep-alive connections per process
+TIMEOUT_SECONDS = float(os.getenv("AIRTABLE_TIMEOUT_SECONDS", "30"))
+MAX_URL_LENGTH = 16_000  # longer list queries go through POST .../listRecords, like pyairtable
+BATCH_LIMIT = 10  # records per create/update/delete request
+
+
+class AsyncAirtable:
+    """
+    Rate-limited async Airtable client.
+
+    `limiter` is the RateLimitedApi whose buckets are shared (default the
+    process-wide `api`); `transport` swaps the network for tests. httpx
+    clients cannot outlive their event loop, so one is kept per running loop.
+    """
+
+    def __init__(self, api_key: str, limiter=api, transport: httpx.AsyncBaseTransport | None = None):
+        self.api_key = api_key
+        self.limiter = limiter
+        self.transport = transport
+        self._clients: dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+
+    def _client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            for stale in [other for other in self._clients if other.is_closed()]:
+                del self._clients[stale]
+            client = self._clients[loop] = httpx.AsyncClient(
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+                timeout=TIMEOUT_SECONDS,
+                transport=self.transport,
+            )
+        return client
+
+    def use_transport(self, transport: httpx.AsyncBaseTransport | None):
+        """Route future requests through `transport` (None: the network)."""
+        self.transport = transport
+        self._clients.clear()
+
+    async def aclose(self):
+        """Close the current loop's connection pool (e.g. on app shutdown)."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    async def request(self, method: str, base_id: str, path: str, params=None, json=None) -> dict:
+        return await self._send(method, base_id, f"{AIRTABLE_URL}/{base_id}/{path}", params=params, json=json)
+
+    async def webhook_payloads(self, base_id: str, webhook_id: str, cursor=None) -> dict:
+        """One page of a webhook's change payloads after `cursor` ({"payloads", "cursor", "mightHaveMore"})."""
+        params = {"cursor": cursor} if cursor is not None else None
+        return await self._send("GET", base_id, f"{AIRTABLE_URL}/bases/{base_id}/webhooks/{webhook_id}/payloads", params)
+
+    async def _send(self, method: str, base_id: str, url: str, params=None, json=None) -> dict:
+        bucket = self.limiter.bucket_for(base_id)
+        sent = json if json is not None else params
+        for attempt in range(MAX_429_RETRIES + 1):
+            await bucket.acquire_async()
+            started = time.perf_counter()
+            try:
+                response = await self._client().request(method, url, params=params, json=json)
+            except Exception:
+                record_call(method, url, "error", started, sent)
+                raise
+            status = response.status_code
+            outcome = "429" if status == 429 else "ok" if status < 400 else "error"
+            result = response.json() if outcome == "ok" else None
+            record_call(method, url, outcome, started, sent, result, response_bytes=len(response.content))
+            if status == 429 and attempt < MAX_429_RETRIES:
+                bucket.penalize(_retry_after(response))
+                metrics.retries.inc(client="airtable")
+                continue
+            response.raise_for_status()
+            self.limiter.notify_write(method, url, result)
+            return result
+
+    def table(self, base_id: str, table_id: str) -> "AsyncTable":
+        return AsyncTable(self, base_id, table_id)
+
+
+class AsyncTable:
+    """Awaitable counterpart of pyairtable's Table (get / all / create / update / delete and their batch forms)."""
+
+    def __init__(self, client: AsyncAirtable, base_id: str, table_id: str):
+        self.client = client
+        self.base_id = base_id
+        self.table_id = table_id
+
+    async def _request(self, method: str, path: str = "", params=None, json=None) -> dict:
+        full_path = f"{self.table_id}/{path}" if path else self.table_id
+        return await self.client.request(method, self.base_id, full_path, params=params, json=json)
+
+    async def get(self, record_id: str, use_field_ids: bool = False) -> dict:
+        params = {"returnFieldsByFieldId": 1} if use_field_ids else None
+        return await self._request("GET", record_id, params=params)
+
+    async def all(
+        self,
+        formula: str | None = None,
+        fields: list[str] | None = None,
+        max_records: int | None = None,
+        page_size: int | None = None,
+        use_field_ids: bool = False,
+    ) -> list[dict]:
+        """Every matching record, following `offset` through all pages."""
+        options = {
+            "filterByFormula": formula,
+            "fields[]": fields,
+            "maxRecords": max_records,
+            "pageSize": page_size,
+            "returnFieldsByFieldId": 1 if use_field_ids else None,
+        }
+        options = {key: value for key, value in options.items() if value is not None}
+        use_post = len(str(httpx.QueryParams(options))) > MAX_URL_LENGTH
+        records, offset = [], None
+        while True:
+            page_options = {**options, "offset": offset} if offset else options
+            if use_post:
+                body = {key.removesuffix("[]"): value for key, value in page_options.items()}
+                if use_field_ids:
+                    body["returnFieldsByFieldId"] = True
+                page = await self._request("POST", "listRecords", json=body)
+            else:
+                page = await self._request("GET", params=page_options)
+            records.extend(page.get("records", []))
+            offset = page.get("offset")
+            if not offset or (max_records and len(records) >= max_records):
+                return records[:max_records] if max_records else records
+
+    async def create(self, fields: dict, typecast: bool = False) -> dict:
+        return await self._request("POST", json={"fields": fields, "typecast": typecast})
+
+    async def update(self, record_id: str, fields: dict, typecast: bool = False) -> dict:
+        return await self._request("PATCH", record_id, json={"fields": fields, "typecast": typecast})
+
+    async def delete(self, record_id: str) -> dict:
+        return await self._request("DELETE", record_id)
+
+    async def batch_create(self, records: list[dict], typecast: bool = False) -> list[dict]:
+        created = []
+        for chunk in chunked(records, BATCH_LIMIT):
+            body = {"records": [{"fields": fields} for fields in chunk], "typecast": typecast}
+            created.extend((await self._request("POST", json=body))["records"])
+        return created
+
+    async def batch_update(self, records: list[dict], typecast: bool = False) -> list[dict]:
+        updated = []
+        for chunk in chunked(records, BATCH_LIMIT):
+            body = {"records": [{"id": r["id"], "fields": r["fields"]} for r in chunk], "typecast": typecast}
+            updated.extend((await self._request("PATCH", json=body))["records"])
+        return updated
+
+    async def batch_delete(self, record_ids: list[str]) -> list[dict]:
+        deleted = []
+        for chunk in chunked(record_ids, BATCH_LIMIT):
+            deleted.extend((await self._request("DELETE", params={"records[]": chunk}))["records"])
+        return deleted
+
+
+# ───────── one process-wide async client, sharing the sync client's limiter ─────────
+aapi = AsyncAirtable(API)
+_tables: dict[tuple[str, str], AsyncTable] = {}
+
+
+def atable(table_id: str, base_id: str = BASE_ID) -> AsyncTable:
+    """Return the shared AsyncTable for `table_id` (the async twin of airtable_client.table)."""
+    key = (base_id, table_id)
+    if key not in _tables:
+        _tables[key] = aapi.table(base_id, table_id)
+    return _tables[key]
@@ -0,0 +1,257 @@
+import os
+import re
+import time
+import asyncio
+import threading
+import traceback
+import contextvars
+from contextlib import contextmanager
+import requests
+from dotenv import load_dotenv
+from pyairtable import Api
+from services import metrics, profiling
+from dictionaries.constants import (
+    BASE_ID,
+    TABLE_APPLICANTS_ID,
+    TABLE_PERSONAL_ID,
+    TABLE_WORK_ID,
+    TABLE_SALARY_ID,
+    TABLE_SHORTLIST_ID,
+)
+
+load_dotenv()
+API = os.getenv("AIRTABLE_TOKEN")
+
+REQUESTS_PER_SECOND = float(os.getenv("AIRTABLE_RPS", "5"))  # Airtable's per-base quota
+DEFAULT_PENALTY_SECONDS = 30.0  # Airtable locks a base out for 30 s after a 429
+MAX_429_RETRIES = 5
+TABLE_NAMES = {
+    TABLE_APPLICANTS_ID: "Applicants",
+    TABLE_PERSONAL_ID: "Personal Details",
+    TABLE_WORK_ID: "Work Experience",
+    TABLE_SALARY_ID: "Salary Preferences",
+    TABLE_SHORTLIST_ID: "Shortlisted Leads",
+}
+
+# ───────── priority lanes ─────────
+INTERACTIVE = "interactive"  # single-applicant webhooks
+BULK = "bulk"  # *_all sweeps; only get a token when no interactive caller is waiting
+
+_lane: contextvars.ContextVar[str] = contextvars.ContextVar("airtable_lane", default=INTERACTIVE)
+
+
+def current_lane() -> str:
+    return _lane.get()
+
+
+@contextmanager
+def bulk_lane():
+    """Run the enclosed Airtable calls in the low-priority bulk lane."""
+    token = _lane.set(BULK)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with two priority lanes and a penalty window.
+
+    try_acquire() never blocks: it returns 0.0 when a token was taken, or the
+    number of seconds to wait before trying again.
+    """
+
+    def __init__(self, rate: float = REQUESTS_PER_SECOND, burst: float | None = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._interactive_waiting = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, lane: str = INTERACTIVE) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            if lane == BULK and self._interactive_waiting:
+                return 1.0 / self.rate
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, lane: str | None = None):
+        lane = lane or current_lane()
+        started = time.perf_counter()
+        if lane == INTERACTIVE:
+            with self._lock:
+                self._interactive_waiting += 1
+        try:
+            while (wait := self.try_acquire(lane)) > 0:
+                time.sleep(wait)
+        finally:
+            if lane == INTERACTIVE:
+                with self._lock:
+                    self._interactive_waiting -= 1
+            metrics.airtable_wait_seconds.observe(time.perf_counter() - started, lane=lane)
+
+    async def acquire_async(self, lane: str | None = None):
+        """acquire() for coroutines: waits with asyncio.sleep, so the event loop keeps running."""
+        lane = lane or current_lane()
+        started = time.perf_counter()
+        if lane == INTERACTIVE:
+            with self._lock:
+                self._interactive_waiting += 1
+        try:
+            while (wait := self.try_acquire(lane)) > 0:
+                await asyncio.sleep(wait)
+        finally:
+            if lane == INTERACTIVE:
+                with self._lock:
+                    self._interactive_waiting -= 1
+            metrics.airtable_wait_seconds.observe(time.perf_counter() - started, lane=lane)
+
+    def penalize(self, seconds: float):
+        """Block every lane for `seconds` (e.g. after a 429) and drain the bucket."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+def _retry_after(response) -> float:
+    """Seconds from a 429's Retry-After header (requests or httpx response), else the 30 s penalty."""
+    try:
+        return max(float(response.headers.get("Retry-After", "")), 0.0)
+    except ValueError:
+        return DEFAULT_PENALTY_SECONDS
+
+
+_CALL_RE = re.compile(r"/v0/(?:bases/)?app[A-Za-z0-9]+/([^/?]+)(?:/([^/?]+))?")
+
+
+def describe_call(method: str, url) -> tuple[str, str]:
+    """(table, operation) metric labels for an Airtable request URL."""
+    match = _CALL_RE.search(str(url))
+    if not match:
+        return "meta", method.lower()
+    target, rest = match.groups()
+    if target == "webhooks":
+        return "webhooks", method.lower()
+    method = method.upper()
+    if rest == "listRecords" or (method == "GET" and not rest):
+        op = "list"
+    else:
+        op = {"GET": "get", "POST": "create", "PATCH": "update", "PUT": "update", "DELETE": "delete"}.get(method, method.lower())
+    return TABLE_NAMES.get(target, target), op
+
+
+def record_call(method: str, url, outcome: str, started: float, request=None, result=None, response_bytes=None):
+    """
+    Count one Airtable request ("ok", "429" or "error") against the stage that
+    sent it, and add it to the request's profiling trace if there is one.
+    """
+    seconds = time.perf_counter() - started
+    table_label, op = describe_call(method, url)
+    metrics.airtable_requests.inc(table=table_label, op=op, stage=metrics.current_stage(), outcome=outcome)
+    metrics.airtable_request_seconds.observe(seconds, table=table_label, op=op)
+    if outcome == "429":
+        metrics.airtable_rate_limited.inc(table=table_label)
+    profiling.record_airtable(table_label, op, outcome, seconds, request, result, response_bytes)
+
+
+class RateLimitedApi(Api):
+    """
+    pyairtable Api whose every request first takes a token from its base's
+    bucket. 429s are handled here (Retry-After, else a 30 s penalty for the
+    whole base) instead of urllib3's per-request retry, so all callers back off.
+    """
+
+    _base_re = re.compile(r"/v0/(app[A-Za-z0-9]+)")
+
+    def __init__(self, api_key: str, rate: float = REQUESTS_PER_SECOND, **kwargs):
+        kwargs.setdefault("retry_strategy", None)
+        super().__init__(api_key, **kwargs)
+        self.rate = rate
+        self._buckets: dict[str, TokenBucket] = {}
+        self._buckets_lock = threading.Lock()
+        self._write_listeners = []
+
+    def on_write(self, listener):
+        """Call listener(method, url, response_json) after every successful non-GET request."""
+        self._write_listeners.append(listener)
+        return listener
+
+    def notify_write(self, method: str, url, result):
+        if method.upper() == "GET":
+            return
+        for listener in self._write_listeners:
+            try:
+                listener(method.upper(), str(url), result)
+            except Exception:
+                traceback.print_exc()
+
+    def bucket_for(self, base_id: str) -> TokenBucket:
+        with self._buckets_lock:
+            if base_id not in self._buckets:
+                self._buckets[base_id] = TokenBucket(self.rate)
+            return self._buckets[base_id]
+
+    def request(self, method, url, fallback=None, options=None, params=None, json=None):
+        match = self._base_re.search(str(url))
+        bucket = self.bucket_for(match.group(1) if match else "meta")
+        sent = json if json is not None else params
+        for attempt in range(MAX_429_RETRIES + 1):
+            bucket.acquire()
+            started = time.perf_counter()
+            try:
+                result = super().request(method, url, fallback=fallback, options=options, params=params, json=json)
+            except requests.HTTPError as e:
+                response = e.response
+                rate_limited = response is not None and response.status_code == 429
+                record_call(method, url, "429" if rate_limited else "error", started, sent)
+                if not rate_limited or attempt == MAX_429_RETRIES:
+                    raise
+                bucket.penalize(_retry_after(response))
+                metrics.retries.inc(client="airtable")
+                continue
+            except Exception:
+                record_call(method, url, "error", started, sent)
+                raise
+            record_call(method, url, "ok", started, sent, result)
+            self.notify_write(method, url, result)
+            return result
+
+
+# ───────── one process-wide client ─────────
+api = RateLimitedApi(API)
+_tables: dict[tuple[str, str], object] = {}
+
+
+def table(table_id: str, base_id: str = BASE_ID):
+    """Return the shared Table object for `table_id` (all services use the same Api/limiter)."""
+    key = (base_id, table_id)
+    if key not in _tables:
+        _tables[key] = api.table(base_id, table_id)
+    return _tables[key]
+
+
+# ───────── formula helpers ─────────
+ID_CHUNK_SIZE = 50  # Applicant IDs per OR() formula; keeps URLs well under Airtable's limit
+
+
+def chunked(items: list, size: int = ID_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def applicant_ids_formula(applicant_ids, field: str = "Applicant ID") -> str:
+    """OR() formula matching rows whose `field` equals any of the given Applicant IDs."""
+    return "OR(" + ",".join(f"{{{field}}}='{app_id}'" for app_id in applicant_ids) + ")"
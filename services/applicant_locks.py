@@ -0,0 +1,109 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MAX_ENTRIES = int(os.getenv("APPLICANT_LOCKS_MAX", "1024"))
+IDLE_SECONDS = float(os.getenv("APPLICANT_LOCK_IDLE_SECONDS", "300"))
+
+
+class _Entry:
+    def __init__(self, now: float):
+        self.lock = asyncio.Lock()
+        self.users = 0  # holders and waiters; an entry is only evicted at 0
+        self.last_used = now
+
+
+class _Call:
+    def __init__(self):
+        self.task: asyncio.Task | None = None
+        self.started = False
+
+
+class ApplicantLocks:
+    """
+    Per-applicant serialisation for the webhook endpoints.
+
+    run(applicant_id, fn, *args) awaits fn(*args) while holding the
+    applicant's lock, so compress, decompress and shortlist work for one
+    applicant never overlap. Identical requests (same applicant, function and
+    arguments) are coalesced: one that arrives while another is still waiting
+    for the lock shares that call's result. One that arrives after the call
+    has started queues a single follow-up, so the latest edit is always seen
+    and a burst becomes at most two runs.
+
+    Idle locks are evicted after `idle_seconds`, and least-recently-used idle
+    locks once there are more than `max_entries`; locks in use are never
+    evicted.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, idle_seconds: float = IDLE_SECONDS, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.idle_seconds = idle_seconds
+        self._clock = clock
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()  # least recently used first
+        self._calls: dict[tuple, _Call] = {}
+        self.runs = 0
+        self.coalesced = 0
+
+    async def run(self, applicant_id: str, fn, *args):
+        key = (applicant_id, fn, args)
+        call = self._calls.get(key)
+        if call is not None and not call.started:
+            self.coalesced += 1
+        else:
+            call = self._calls[key] = _Call()
+            call.task = asyncio.ensure_future(self._locked(applicant_id, call, fn, *args))
+            call.task.add_done_callback(lambda _task: self._forget(key, call))
+            self.runs += 1
+        # shield: a caller that disconnects must not cancel work others are waiting on
+        return await asyncio.shield(call.task)
+
+    async def _locked(self, applicant_id: str, call: _Call, fn, *args):
+        entry = self._acquire(applicant_id)
+        try:
+            async with entry.lock:
+                call.started = True
+                return await fn(*args)
+        finally:
+            self._release(applicant_id, entry)
+
+    def _forget(self, key: tuple, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def _acquire(self, applicant_id: str) -> _Entry:
+        now = self._clock()
+        entry = self._entries.pop(applicant_id, None) or _Entry(now)
+        entry.users += 1
+        entry.last_used = now
+        self._entries[applicant_id] = entry
+        self._evict(now)
+        return entry
+
+    def _release(self, applicant_id: str, entry: _Entry):
+        entry.users -= 1
+        entry.last_used = self._clock()
+        if self._entries.get(applicant_id) is entry:
+            self._entries.move_to_end(applicant_id)
+        self._evict(entry.last_used)
+
+    def _evict(self, now: float):
+        for applicant_id, entry in list(self._entries.items()):
+            over = len(self._entries) > self.max_entries
+            if not over and now - entry.last_used < self.idle_seconds:
+                break  # everything after this was used more recently
+            if entry.users == 0:
+                del self._entries[applicant_id]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def snapshot(self) -> dict:
+        return {"locks": len(self._entries), "in_flight": len(self._calls), "runs": self.runs, "coalesced": self.coalesced}
+
+
+applicant_locks = ApplicantLocks()
@@ -0,0 +1,150 @@
+import threading
+from itertools import count
+
+PENDING_PREFIX = "pending:"
+
+
+class DirectWriter:
+    """Writer with the BatchWriter interface that sends every mutation immediately."""
+
+    def create(self, tbl, fields: dict, typecast: bool = False) -> dict:
+        return tbl.create(fields, typecast=typecast)
+
+    def update(self, tbl, rec_id: str, fields: dict, typecast: bool = False):
+        return tbl.update(rec_id, fields, typecast=typecast)
+
+    def delete(self, tbl, rec_id: str):
+        return tbl.delete(rec_id)
+
+    def flush(self) -> dict:
+        return {"creates": 0, "updates": 0, "deletes": 0, "calls": 0}
+
+
+DIRECT = DirectWriter()
+
+
+class BatchWriter:
+    """
+    Per-table write buffer.
+
+    Mutations are queued per (table, typecast) and sent as batch_create /
+    batch_update / batch_delete calls (pyairtable chunks those into 10-record
+    requests). Repeat updates to the same record are merged into one, and
+    updates/deletes aimed at a not-yet-flushed create are folded into it.
+
+    create() returns a record-shaped dict with a placeholder id ("pending:N")
+    so callers can keep using created["id"] for follow-up writes. All methods
+    are thread-safe.
+    """
+
+    def __init__(self, max_pending: int = 500):
+        self.max_pending = max_pending
+        self._ids = count(1)
+        self._tables: dict[int, object] = {}
+        self._creates: dict[tuple[int, bool], dict[str, dict]] = {}
+        self._updates: dict[tuple[int, bool], dict[str, dict]] = {}
+        self._deletes: dict[int, dict[str, None]] = {}
+        self.resolved: dict[str, str] = {}  # pending id → real record id
+        self.stats = {"creates": 0, "updates": 0, "deletes": 0, "calls": 0}
+        self._lock = threading.RLock()
+
+    # ───────── context manager: always flush on exit ─────────
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
+
+    # ───────── queueing ─────────
+    def _key(self, tbl, typecast: bool) -> tuple[int, bool]:
+        self._tables[id(tbl)] = tbl
+        return (id(tbl), bool(typecast))
+
+    def _find_pending_create(self, tbl, rec_id: str):
+        for (tid, typecast), creates in self._creates.items():
+            if tid == id(tbl) and rec_id in creates:
+                return creates
+        return None
+
+    def pending(self) -> int:
+        with self._lock:
+            return (
+                sum(len(q) for q in self._creates.values())
+                + sum(len(q) for q in self._updates.values())
+                + sum(len(q) for q in self._deletes.values())
+            )
+
+    def _maybe_flush(self):
+        if self.pending() >= self.max_pending:
+            self.flush()
+
+    def create(self, tbl, fields: dict, typecast: bool = False) -> dict:
+        with self._lock:
+            pending_id = f"{PENDING_PREFIX}{next(self._ids)}"
+            self._creates.setdefault(self._key(tbl, typecast), {})[pending_id] = dict(fields)
+            self._maybe_flush()
+            return {"id": self.resolved.get(pending_id, pending_id), "fields": dict(fields)}
+
+    def update(self, tbl, rec_id: str, fields: dict, typecast: bool = False):
+        with self._lock:
+            rec_id = self.resolved.get(rec_id, rec_id)
+            creates = self._find_pending_create(tbl, rec_id)
+            if creates is not None:
+                creates[rec_id].update(fields)
+                return
+            queue = self._updates.setdefault(self._key(tbl, typecast), {})
+            queue.setdefault(rec_id, {}).update(fields)
+            self._maybe_flush()
+
+    def delete(self, tbl, rec_id: str):
+        with self._lock:
+            rec_id = self.resolved.get(rec_id, rec_id)
+            creates = self._find_pending_create(tbl, rec_id)
+            if creates is not None:
+                del creates[rec_id]  # never reached Airtable, nothing to delete
+                return
+            for (tid, _), queue in self._updates.items():
+                if tid == id(tbl):
+                    queue.pop(rec_id, None)
+            self._key(tbl, False)
+            self._deletes.setdefault(id(tbl), {})[rec_id] = None
+            self._maybe_flush()
+
+    # ───────── flushing ─────────
+    def _calls(self, n: int) -> int:
+        return -(-n // 10)  # Airtable accepts at most 10 records per batch request
+
+    def flush(self) -> dict:
+        """
+        Send everything queued; returns cumulative counts of records written and HTTP calls.
+        A table's queue is only emptied once its call succeeds: if one raises, it and every
+        queue not yet sent stay pending (a later flush retries them) and the error propagates.
+        """
+        with self._lock:  # held throughout, so nothing is queued while a call is in flight
+            for key, queue in list(self._creates.items()):
+                if queue:
+                    pending_ids = list(queue)
+                    created = self._tables[key[0]].batch_create([queue[p] for p in pending_ids], typecast=key[1])
+                    for pending_id, rec in zip(pending_ids, created):
+                        self.resolved[pending_id] = rec["id"]
+                    self.stats["creates"] += len(pending_ids)
+                    self.stats["calls"] += self._calls(len(pending_ids))
+                del self._creates[key]
+
+            for key, queue in list(self._updates.items()):
+                if queue:
+                    records = [{"id": rec_id, "fields": fields} for rec_id, fields in queue.items()]
+                    self._tables[key[0]].batch_update(records, typecast=key[1])
+                    self.stats["updates"] += len(records)
+                    self.stats["calls"] += self._calls(len(records))
+                del self._updates[key]
+
+            for tid, queue in list(self._deletes.items()):
+                if queue:
+                    self._tables[tid].batch_delete(list(queue))
+                    self.stats["deletes"] += len(queue)
+                    self.stats["calls"] += self._calls(len(queue))
+                del self._deletes[tid]
+
+            return dict(self.stats)
@@ -0,0 +1,81 @@
+import time
+import threading
+import traceback
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a dependency the breaker considers down."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} circuit is open; retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Fails fast while a dependency is down.
+
+    Closed: calls go through, and `failure_threshold` consecutive failures
+    open the breaker. Open: before_call() raises CircuitOpen for
+    `reset_seconds`. Half-open: then a single trial call is let through; its
+    success closes the breaker (and notifies on_close listeners), its failure
+    opens it again. Thread-safe; usable from sync and async code alike.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30.0, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def on_close(self, listener):
+        self._listeners.append(listener)
+        return listener
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self.state == CLOSED:
+                return 0.0
+            return max(0.0, self.opened_at + self.reset_seconds - self._clock())
+
+    def before_call(self):
+        """Raise CircuitOpen unless a call may go through now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            now = self._clock()
+            wait = self.opened_at + self.reset_seconds - now
+            if wait <= 0:  # open long enough, or the last trial never reported back
+                self.state = HALF_OPEN  # this caller is the trial
+                self.opened_at = now
+                return
+        raise CircuitOpen(self.name, max(0.0, wait))
+
+    def record_success(self):
+        with self._lock:
+            recovered = self.state != CLOSED
+            self.state = CLOSED
+            self.failures = 0
+        if recovered:
+            for listener in self._listeners:
+                try:
+                    listener()
+                except Exception:
+                    traceback.print_exc()
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = self._clock()
+
+    def snapshot(self) -> dict:
+        return {"state": self.state, "failures": self.failures, "retry_after": round(self.retry_after(), 3)}
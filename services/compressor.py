@@ -1,40 +1,69 @@
-from pyairtable import Table
-import json, os
-from dotenv import load_dotenv
-from pyairtable import Api
+import json
+import asyncio
+import hashlib
+from contextlib import ExitStack
+from services.airtable_client import table, bulk_lane, chunked, applicant_ids_formula
+from services.airtable_async import atable
+from services.watermarks import watermarks, modified_since_formula
+from services.batch_writer import BatchWriter, DIRECT
+from services.jobs import NO_PROGRESS
+from services.llm_cache import canonical_json
+from services import metrics
+from services.replica import replica, applicant_key
 from dictionaries.constants import (
     FIELD_NAMES_TO_IDS,
-    BASE_ID,
     TABLE_APPLICANTS_ID,
     TABLE_PERSONAL_ID,
     TABLE_WORK_ID,
     TABLE_SALARY_ID,
 )
 
-load_dotenv()
-API = os.getenv("AIRTABLE_TOKEN")
+tbl_app = table(TABLE_APPLICANTS_ID)
+tbl_pers = table(TABLE_PERSONAL_ID)
+tbl_work = table(TABLE_WORK_ID)
+tbl_sal = table(TABLE_SALARY_ID)
 
-api = Api(API)
-tbl_app = api.table(BASE_ID, TABLE_APPLICANTS_ID)
-tbl_pers = api.table(BASE_ID, TABLE_PERSONAL_ID)
-tbl_work = api.table(BASE_ID, TABLE_WORK_ID)
-tbl_sal = api.table(BASE_ID, TABLE_SALARY_ID)
+atbl_app = atable(TABLE_APPLICANTS_ID)
+atbl_pers = atable(TABLE_PERSONAL_ID)
+atbl_work = atable(TABLE_WORK_ID)
+atbl_sal = atable(TABLE_SALARY_ID)
 
+CHILD_TABLES = ("Personal Details", "Work Experience", "Salary Preferences")
 
-def build_json(applicant_id: str) -> dict:
-    # 1. fetch linked Personal Details (should be 1)
-    pd = tbl_pers.all(formula=f"{{Applicant ID}}='{applicant_id}'")
-    personal = pd[0]["fields"] if pd else {}
 
-    # 2. fetch Work Experience rows (many)
-    we = tbl_work.all(formula=f"{{Applicant ID}}='{applicant_id}'")
-    work = [r["fields"] for r in we] if we else []
+def _rows_by_applicant(tbl, formula: str | None = None, index: dict | None = None) -> dict[str, list[dict]]:
+    """Scan a child table once (optionally filtered) and group each row's fields by Applicant ID."""
+    index = {} if index is None else index
+    for rec in tbl.all(formula=formula) if formula else tbl.all():
+        fields = rec.get("fields", {})
+        app_id = applicant_key(fields.get("Applicant ID"))
+        if app_id:
+            index.setdefault(app_id, []).append(fields)
+    return index
 
-    # 3. fetch Salary Preferences (should be 1)
-    sp = tbl_sal.all(formula=f"{{Applicant ID}}='{applicant_id}'")
-    salary = sp[0]["fields"] if sp else {}
 
-    # 4. assemble, always include all fields
+def prefetch_children(applicant_ids: list[str] | None = None) -> dict[str, dict[str, list[dict]]]:
+    """
+    Bulk-read the three child tables (one paginated scan each) into an
+    in-memory index: {"personal" | "work" | "salary": {applicant_id: [fields, ...]}}.
+
+    With `applicant_ids`, only those applicants' rows are read, using one
+    OR() formula query per table per chunk of IDs.
+    """
+    sections = {"personal": tbl_pers, "work": tbl_work, "salary": tbl_sal}
+    if applicant_ids is None:
+        return {key: _rows_by_applicant(tbl) for key, tbl in sections.items()}
+
+    prefetched = {key: {} for key in sections}
+    for chunk in chunked(list(applicant_ids)):
+        formula = applicant_ids_formula(chunk)
+        for key, tbl in sections.items():
+            _rows_by_applicant(tbl, formula=formula, index=prefetched[key])
+    return prefetched
+
+
+def _assemble_json(personal: dict, work: list[dict], salary: dict) -> dict:
+    # always include all fields
     return {
         "personal": {
             "name": personal.get("Full Name", ""),
@@ -61,17 +90,200 @@ def build_json(applicant_id: str) -> dict:
     }
 
 
-def compress_one(applicant_id: str, rec_id: str):
-    j = build_json(applicant_id)
-    tbl_app.update(rec_id, {FIELD_NAMES_TO_IDS["Applicants"]["Compressed JSON"]: json.dumps(j, ensure_ascii=False)})
-    return json.dumps(j, ensure_ascii=False)
+@metrics.timed("build_json")
+def build_json(applicant_id: str, prefetched: dict | None = None) -> dict:
+    return _build_json(applicant_id, prefetched)
+
+
+def _build_json(applicant_id: str, prefetched: dict | None = None) -> dict:
+    if prefetched is not None:
+        # Bulk mode: everything comes from the in-memory index, no HTTP
+        pd = prefetched["personal"].get(applicant_id, [])
+        work = prefetched["work"].get(applicant_id, [])
+        sp = prefetched["salary"].get(applicant_id, [])
+        return _assemble_json(pd[0] if pd else {}, work, sp[0] if sp else {})
+
+    # 1. fetch linked Personal Details (should be 1); the local replica answers when it is loaded
+    pd = replica.rows_for(TABLE_PERSONAL_ID, applicant_id)
+    if pd is None:
+        pd = tbl_pers.all(formula=f"{{Applicant ID}}='{applicant_id}'")
+    personal = pd[0]["fields"] if pd else {}
+
+    # 2. fetch Work Experience rows (many)
+    we = replica.rows_for(TABLE_WORK_ID, applicant_id)
+    if we is None:
+        we = tbl_work.all(formula=f"{{Applicant ID}}='{applicant_id}'")
+    work = [r["fields"] for r in we] if we else []
+
+    # 3. fetch Salary Preferences (should be 1)
+    sp = replica.rows_for(TABLE_SALARY_ID, applicant_id)
+    if sp is None:
+        sp = tbl_sal.all(formula=f"{{Applicant ID}}='{applicant_id}'")
+    salary = sp[0]["fields"] if sp else {}
+
+    # 4. assemble
+    return _assemble_json(personal, work, salary)
+
+
+def fingerprint(data) -> str:
+    """Stable hash of a JSON-able object (key order and whitespace don't matter)."""
+    return hashlib.sha256(canonical_json(data).encode("utf-8")).hexdigest()
 
 
-def compress_all_applicants():
-    records = tbl_app.all()
+def _stored_fingerprint(compressed_json: str | None) -> str | None:
+    try:
+        return fingerprint(json.loads(compressed_json)) if compressed_json else None
+    except (TypeError, json.JSONDecodeError):
+        return None
+
+
+@metrics.timed("compress")
+def compress_one(
+    applicant_id: str, rec_id: str, prefetched: dict | None = None, writer=None, current_json: str | None = None
+) -> dict:
+    """
+    Build the applicant's JSON and write it to Compressed JSON, unless it is
+    identical (by fingerprint) to what is already stored. `current_json` is the
+    stored value when the caller already has the Applicants record; otherwise it
+    is read here. Returns {"payload": <json str>, "unchanged": bool}.
+    """
+    writer = writer or DIRECT
+    j = build_json(applicant_id, prefetched=prefetched)
+    payload = json.dumps(j, ensure_ascii=False)
+
+    if current_json is None:
+        app_rec = replica.record(TABLE_APPLICANTS_ID, rec_id) or tbl_app.get(rec_id)
+        current_json = app_rec.get("fields", {}).get("Compressed JSON")
+    if _stored_fingerprint(current_json) == fingerprint(j):
+        # Skipping the write also keeps the last-modified time (and downstream automations) still
+        return {"payload": payload, "unchanged": True}
+
+    writer.update(tbl_app, rec_id, {FIELD_NAMES_TO_IDS["Applicants"]["Compressed JSON"]: payload})
+    return {"payload": payload, "unchanged": False}
+
+
+@metrics.timed("build_json")
+async def build_json_async(applicant_id: str) -> dict:
+    """build_json's per-applicant path on the async client, with the three child lookups in flight at once."""
+    if replica.ready:
+        return _build_json(applicant_id)  # local reads only; already inside this function's span
+    formula = f"{{Applicant ID}}='{applicant_id}'"
+    pd, we, sp = await asyncio.gather(
+        atbl_pers.all(formula=formula), atbl_work.all(formula=formula), atbl_sal.all(formula=formula)
+    )
+    return _assemble_json(pd[0]["fields"] if pd else {}, [r["fields"] for r in we], sp[0]["fields"] if sp else {})
+
+
+@metrics.timed("compress")
+async def compress_one_async(
+    applicant_id: str, rec_id: str, current_json: str | None = None, fresh: bool = False
+) -> dict:
+    """
+    compress_one for the webhook endpoints; the Applicants read overlaps the
+    child lookups. fresh=True re-reads the applicant's rows into the replica
+    first, for callers (a form submit) that may be ahead of it.
+    """
+    if fresh:
+        await replica.refresh_applicant(applicant_id)
+    if current_json is None:
+        app_rec = replica.record(TABLE_APPLICANTS_ID, rec_id)
+        if app_rec is not None:
+            j = await build_json_async(applicant_id)
+        else:
+            j, app_rec = await asyncio.gather(build_json_async(applicant_id), atbl_app.get(rec_id))
+        current_json = app_rec.get("fields", {}).get("Compressed JSON")
+    else:
+        j = await build_json_async(applicant_id)
+    payload = json.dumps(j, ensure_ascii=False)
+
+    if _stored_fingerprint(current_json) == fingerprint(j):
+        return {"payload": payload, "unchanged": True}
+
+    await atbl_app.update(rec_id, {FIELD_NAMES_TO_IDS["Applicants"]["Compressed JSON"]: payload})
+    return {"payload": payload, "unchanged": False}
+
+
+def _by_applicant_id(rec: dict) -> str:
+    return str(rec.get("fields", {}).get("Applicant ID") or "")
+
+
+def _compress_records(records: list[dict], prefetched, writer, progress) -> int:
+    """Compress the given Applicants records in Applicant ID order; returns how many were unchanged."""
+    unchanged = 0
+    records = sorted(records, key=_by_applicant_id)
+    progress.start(len(records))
     for rec in records:
         rec_id = rec.get("id")
-        applicant_id = rec.get("fields", {}).get("Applicant ID")
-        if rec_id and applicant_id:
-            compress_one(applicant_id, rec_id)
-    return f"Compressed {len(records)} applicants."
+        fields = rec.get("fields", {})
+        applicant_id = fields.get("Applicant ID")
+        if not (rec_id and applicant_id) or progress.skip(applicant_id):
+            continue
+        result = compress_one(
+            applicant_id,
+            rec_id,
+            prefetched=prefetched,
+            writer=writer,
+            current_json=fields.get("Compressed JSON", ""),
+        )
+        unchanged += result["unchanged"]
+        if progress.advance(applicant_id):
+            progress.checkpoint(writer.flush)
+    return unchanged
+
+
+@metrics.timed("compress_all")
+def compress_all_applicants(bulk: bool = True, incremental: bool = False, progress=None):
+    """
+    Recompress every applicant (or, with incremental=True, only the ones whose
+    child rows changed since the last run; see _compress_changed_applicants).
+
+    bulk=True scans each child table once up front and builds every JSON from
+    that index, so the read cost is a few paginated calls regardless of the
+    number of applicants. bulk=False keeps the old 3-lookups-per-applicant path.
+    Writes are buffered and sent as 10-record batch updates, and every call
+    runs in the limiter's bulk lane so webhook requests are served first.
+    `progress` (a jobs.JobProgress) receives counts and checkpoints.
+    """
+    progress = progress or NO_PROGRESS
+    if incremental:
+        return _compress_changed_applicants(progress)
+
+    with ExitStack() as stack:
+        # A full sweep covers every change so far, so it also advances the watermarks
+        for name in CHILD_TABLES:
+            stack.enter_context(watermarks.advance(f"compress:{name}"))
+        with bulk_lane(), BatchWriter() as writer:
+            records = tbl_app.all()
+            prefetched = prefetch_children() if bulk else None
+            unchanged = _compress_records(records, prefetched, writer, progress)
+    return f"Compressed {len(records)} applicants ({unchanged} unchanged)."
+
+
+def _compress_changed_applicants(progress=NO_PROGRESS):
+    """
+    Recompress only applicants with a Personal Details, Work Experience or
+    Salary Preferences row modified since that table's watermark
+    (LAST_MODIFIED_TIME() filter). The first run has no watermarks and falls
+    back to a full sweep. Deleted child rows are not detected; a periodic full
+    run picks those up.
+    """
+    if any(watermarks.get(f"compress:{name}") is None for name in CHILD_TABLES):
+        return compress_all_applicants(progress=progress)
+
+    with ExitStack() as stack:
+        since = {name: stack.enter_context(watermarks.advance(f"compress:{name}")) for name in CHILD_TABLES}
+        with bulk_lane(), BatchWriter() as writer:
+            changed = set()
+            for name, tbl in zip(CHILD_TABLES, (tbl_pers, tbl_work, tbl_sal)):
+                for rec in tbl.all(formula=modified_since_formula(since[name]), fields=["Applicant ID"]):
+                    app_id = applicant_key(rec.get("fields", {}).get("Applicant ID"))
+                    if app_id:
+                        changed.add(app_id)
+
+            applicant_ids = sorted(changed)
+            prefetched = prefetch_children(applicant_ids)
+            records = []
+            for chunk in chunked(applicant_ids):
+                records.extend(tbl_app.all(formula=applicant_ids_formula(chunk)))
+            unchanged = _compress_records(records, prefetched, writer, progress)
+    return f"Compressed {len(records)} changed applicants ({unchanged} unchanged)."
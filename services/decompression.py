@@ -1,35 +1,49 @@
-from pyairtable import Api
-import json
 import os
-from dotenv import load_dotenv
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from services.airtable_client import table, bulk_lane, chunked, applicant_ids_formula
+from services.airtable_async import atable
+from services.watermarks import watermarks, modified_since_formula
+from services.batch_writer import BatchWriter, DIRECT
+from services.jobs import NO_PROGRESS
+from services import metrics
+from services.replica import replica, TABLE_IDS
 from dictionaries.constants import (
     FIELD_MAP,
-    BASE_ID,
+    FIELD_NAMES_TO_IDS,
     TABLE_APPLICANTS_ID,
     TABLE_PERSONAL_ID,
     TABLE_WORK_ID,
     TABLE_SALARY_ID,
 )
 
-load_dotenv()
-API = os.getenv("AIRTABLE_TOKEN")
+DECOMPRESS_CONCURRENCY = int(os.getenv("DECOMPRESS_CONCURRENCY", "4"))  # applicants synced at once by decompress_all
+FAILED_KEY = "decompress:Applicants:failed"  # watermark holding the Applicant IDs the last decompress_all failed on
 
-api = Api(API)
-tbl_app = api.table(BASE_ID, TABLE_APPLICANTS_ID)
-tbl_pers = api.table(BASE_ID, TABLE_PERSONAL_ID)
-tbl_work = api.table(BASE_ID, TABLE_WORK_ID)
-tbl_sal = api.table(BASE_ID, TABLE_SALARY_ID)
+tbl_app = table(TABLE_APPLICANTS_ID)
+tbl_pers = table(TABLE_PERSONAL_ID)
+tbl_work = table(TABLE_WORK_ID)
+tbl_sal = table(TABLE_SALARY_ID)
 
+atbl_app = atable(TABLE_APPLICANTS_ID)
+atbl_pers = atable(TABLE_PERSONAL_ID)
+atbl_work = atable(TABLE_WORK_ID)
+atbl_sal = atable(TABLE_SALARY_ID)
 
-def decompress_one(applicant_id: str, rec_id: str, dry_run: bool = False) -> dict:
+
+@metrics.timed("decompress")
+def decompress_one(applicant_id: str, rec_id: str, dry_run: bool = False, writer=None, app_record=None) -> dict:
     """
     Read the Compressed JSON on the given Applicant row,
     upsert child-table rows so they exactly match the JSON,
     return the parsed JSON object for logging.
+    `app_record` is the Applicants record when the caller already listed it.
     """
     try:
         # 1. Read compressed JSON from Applicants table
-        app_record = tbl_app.get(rec_id)
+        if app_record is None:
+            app_record = replica.record(TABLE_APPLICANTS_ID, rec_id) or tbl_app.get(rec_id)
         compressed_json_str = app_record["fields"].get("Compressed JSON", "{}")
         data = json.loads(compressed_json_str)
     except Exception as e:
@@ -42,6 +56,7 @@ def decompress_one(applicant_id: str, rec_id: str, dry_run: bool = False) -> dic
         applicant_id=applicant_id,
         fields=data.get("personal", {}),
         dry_run=dry_run,
+        writer=writer,
     )
 
     # 3. Upsert Salary Preferences
@@ -51,6 +66,7 @@ def decompress_one(applicant_id: str, rec_id: str, dry_run: bool = False) -> dic
         applicant_id=applicant_id,
         fields=data.get("salary", {}),
         dry_run=dry_run,
+        writer=writer,
     )
 
     # 4. Sync Work Experience (many rows)
@@ -59,6 +75,7 @@ def decompress_one(applicant_id: str, rec_id: str, dry_run: bool = False) -> dic
         applicant_id=applicant_id,
         experiences=data.get("experience", []),
         dry_run=dry_run,
+        writer=writer,
     )
 
 
@@ -76,76 +93,283 @@ def _is_blank(v) -> bool:
     return False  # numbers, booleans, etc. count as non-blank
 
 
-def _upsert_single(tbl, table_key, applicant_id, fields, dry_run=False):
+def _single_upsert(table_key: str, applicant_id: str, fields: dict, records: list[dict]):
+    """
+    The write that makes a one-row-per-applicant table match `fields`, given
+    the applicant's existing `records`: ("update", rec_id, payload),
+    ("create", None, payload), or None when there is no row and every value
+    is blank.
+    """
+    field_map = FIELD_MAP[table_key]
+    id_field = field_map["id_field"]  # formula column → READ-only
+    col_ids = field_map["columns"]
+
+    # ---------- build payload (skip the formula column) ----------
+    upsert_fields = {}
+    for jk, fid in col_ids.items():
+        upsert_fields[fid] = fields.get(jk, "")
+
+    if records:
+        return ("update", records[0]["id"], upsert_fields)
+    if all(_is_blank(fields.get(jk, "")) for jk in col_ids.keys()):
+        return None
+    return ("create", None, {id_field: applicant_id, **upsert_fields})
+
+
+def _upsert_single(tbl, table_key, applicant_id, fields, dry_run=False, writer=None):
+    writer = writer or DIRECT
     # Find row by Applicant ID
     try:
-        field_map = FIELD_MAP[table_key]
-        id_field = field_map["id_field"]  # formula column → READ-only
-        col_ids = field_map["columns"]
+        id_field = FIELD_MAP[table_key]["id_field"]
+        records = replica.rows_for(TABLE_IDS[table_key], applicant_id)
+        if records is None:
+            records = tbl.all(formula=f"{{{id_field}}}='{applicant_id}'")
+        write = _single_upsert(table_key, applicant_id, fields, records)
+        if write is None:
+            return {"skipped": True, "reason": "all_values_empty"}
+        action, rec_id, payload = write
+        if not dry_run:
+            if action == "update":
+                writer.update(tbl, rec_id, payload, typecast=True)
+            else:
+                writer.create(tbl, payload, typecast=True)
+    except Exception as e:
+        raise RuntimeError(f"Upsert failed for {table_key} ({applicant_id}): {e}")
+
+
+def _cell(value) -> str:
+    """Normalise a cell/JSON value for key comparison (None and '' are equal, whitespace ignored)."""
+    return "" if value is None else str(value).strip()
+
 
-        # ---------- build payload (skip the formula column) ----------
-        upsert_fields = {}
-        for jk, fid in col_ids.items():
-            upsert_fields[fid] = fields.get(jk, "")
+def _work_experience_diff(applicant_id: str, experiences: list[dict], current: list[dict]):
+    """
+    Diff the applicant's Work Experience rows against `experiences`:
+    1. Match existing rows to experiences on FIELD_MAP key_fields;
+       exact matches are left alone.
+    2. Leftover rows are updated in place with leftover experiences.
+    3. Any remaining experiences are created, any remaining rows deleted.
+
+    Returns (summary, updates, creates, deletes): counts of
+    created/updated/deleted/unchanged rows, [(rec_id, payload)], [payload]
+    and [rec_id].
+    """
+    cfg = FIELD_MAP["Work Experience"]
+    id_field = cfg["id_field"]  # plain-text Applicant ID column
+    col_ids = cfg["columns"]  # JSON key → field-ID map
+    key_fields = cfg["key_fields"]
+    # rows come back keyed by field name, payloads are keyed by field ID
+    id_to_name = {fid: name for name, fid in FIELD_NAMES_TO_IDS["Work Experience"].items()}
+
+    def row_key(row):
+        fields = row.get("fields", {})
+        return tuple(_cell(fields.get(id_to_name[col_ids[k]])) for k in key_fields)
 
-        # ---------- find existing row(s) ----------
-        records = tbl.all(formula=f"{{{id_field}}}='{applicant_id}'")
+    def exp_key(exp):
+        return tuple(_cell(exp.get(k)) for k in key_fields)
 
-        if records:
-            if not dry_run:
-                tbl.update(records[0]["id"], upsert_fields, typecast=True)
+    # ---------- match on key fields ----------
+    unmatched_rows: dict[tuple, list[dict]] = {}
+    for row in current:
+        unmatched_rows.setdefault(row_key(row), []).append(row)
+
+    new_exps = []
+    unchanged = 0
+    for exp in experiences:
+        bucket = unmatched_rows.get(exp_key(exp))
+        if bucket:
+            bucket.pop(0)
+            unchanged += 1
         else:
-            all_empty = all(_is_blank(fields.get(jk, "")) for jk in col_ids.keys())
-            if all_empty:
-                return {"skipped": True, "reason": "all_values_empty"}
-            create_payload = {id_field: applicant_id, **upsert_fields}
-            if not dry_run:
-                tbl.create(create_payload, typecast=True)
-    except Exception as e:
-        raise RuntimeError(f"Upsert failed for {table_key} ({applicant_id}): {e}")
+            new_exps.append(exp)
+    stale_rows = [row for rows in unmatched_rows.values() for row in rows]
 
+    # ---------- reuse stale rows, then create / delete the rest ----------
+    updates, creates = [], []
+    for i, exp in enumerate(new_exps):
+        payload = {field_id: exp.get(json_key, "") for json_key, field_id in col_ids.items()}
+        if i < len(stale_rows):
+            updates.append((stale_rows[i]["id"], payload))
+        else:
+            creates.append({id_field: applicant_id, **payload})  # attach applicant
+    deletes = [row["id"] for row in stale_rows[len(new_exps) :]]
 
-def _sync_work_experience(tbl, applicant_id, experiences, dry_run=False):
+    summary = {"created": len(creates), "updated": len(updates), "deleted": len(deletes), "unchanged": unchanged}
+    return summary, updates, creates, deletes
+
+
+def _sync_work_experience(tbl, applicant_id, experiences, dry_run=False, writer=None):
+    """
+    Diff-based sync (see _work_experience_diff); no writes at all when every
+    row already matches. Without a shared writer the writes for this
+    applicant are still sent as batch calls. Returns counts of
+    created/updated/deleted/unchanged rows.
+    """
+    own_writer = writer is None
+    writer = writer or BatchWriter()
     try:
+        id_field = FIELD_MAP["Work Experience"]["id_field"]
+        current = replica.rows_for(TABLE_WORK_ID, applicant_id)
+        if current is None:
+            current = tbl.all(formula=f"{{{id_field}}}='{applicant_id}'")
+        summary, updates, creates, deletes = _work_experience_diff(applicant_id, experiences, current)
+        if dry_run:
+            return summary
 
-        """
-        Hard-reset strategy:
-        1. Delete all Work-Experience rows for this applicant.
-        2. Re-create rows from `experiences`, each with Applicant ID set.
-        """
-        cfg = FIELD_MAP["Work Experience"]
-        id_field = cfg["id_field"]  # plain-text Applicant ID column
-        col_ids = cfg["columns"]  # JSON key → field-ID map
-
-        # ---------- 1. Delete all existing rows ----------
-        formula = f"{{{id_field}}}='{applicant_id}'"
-        current = tbl.all(formula=formula)
-
-        # ---------- 2. Create fresh rows ----------
-        for exp in experiences:
-            payload = {id_field: applicant_id}  # attach applicant
-            for json_key, field_id in col_ids.items():
-                payload[field_id] = exp.get(json_key, "")
-            if not dry_run:
-                tbl.create(payload, typecast=True)
+        for rec_id, payload in updates:
+            writer.update(tbl, rec_id, payload, typecast=True)
+        for payload in creates:
+            writer.create(tbl, payload, typecast=True)
+        for rec_id in deletes:
+            writer.delete(tbl, rec_id)
 
-        if not dry_run:
-            for row in current:
-                tbl.delete(row["id"])
+        if own_writer:
+            writer.flush()
+        return summary
 
     except Exception as e:
         raise RuntimeError(f"Sync failed for Work Experience ({applicant_id}): {e}")
 
 
-def decompress_all():
+@metrics.timed("decompress_all")
+def decompress_all(incremental: bool = False, progress=None, concurrency: int | None = None):
     """
-    Loop over all records in the Applicants table and apply decompress_one
-    to each record using its Applicant ID and record ID.
+    Apply decompress_one to every record in the Applicants table, reusing the
+    listed records instead of re-reading each one. `concurrency` applicants
+    (default DECOMPRESS_CONCURRENCY) are synced at once on a thread pool; all
+    of them share the Airtable rate limit and run in its bulk lane, so webhook
+    requests go first. Child-table writes are buffered and sent as 10-record
+    batch calls.
+
+    A failing applicant is reported through progress.error() and counted,
+    and the sweep moves on; when a flush of the shared writer fails, so does
+    every applicant whose writes it may have carried. incremental=True only visits applicants whose
+    Compressed JSON changed since the last run's watermark (the first run is
+    a full sweep), plus the applicants the previous run failed on: the
+    watermark moves past them, so their IDs are kept under FAILED_KEY.
+    `progress` (a jobs.JobProgress) receives counts and checkpoints, in
+    Applicant ID order.
     """
-    records = tbl_app.all()
-    for rec in records:
-        rec_id = rec.get("id")
-        applicant_id = rec.get("fields", {}).get("Applicant ID")
-        if rec_id and applicant_id:
-            decompress_one(applicant_id, rec_id)
-    return f"Decompressed {len(records)} applicants."
+    progress = progress or NO_PROGRESS
+    concurrency = max(1, concurrency or DECOMPRESS_CONCURRENCY)
+    retry = json.loads(watermarks.get(FAILED_KEY) or "[]")
+    with watermarks.advance("decompress:Applicants") as since, bulk_lane(), BatchWriter() as writer:
+        if incremental and since:
+            records = tbl_app.all(formula=modified_since_formula(since, "Compressed JSON"))
+            listed = {rec["id"] for rec in records}
+            for chunk in chunked(retry):
+                records += [r for r in tbl_app.all(formula=applicant_ids_formula(chunk)) if r["id"] not in listed]
+        else:
+            records = tbl_app.all()
+
+        records = sorted(records, key=lambda r: str(r.get("fields", {}).get("Applicant ID") or ""))
+        progress.start(len(records))
+        todo, failed = [], []
+        for rec in records:
+            applicant_id = rec.get("fields", {}).get("Applicant ID")
+            if not (rec.get("id") and applicant_id):
+                continue
+            if not progress.skip(applicant_id):
+                todo.append(rec)
+            elif applicant_id in retry:  # passed by a resumed job before it was retried
+                failed.append(applicant_id)
+
+        def sync(rec):
+            # pool threads do not inherit the caller's context, so re-enter the bulk lane
+            with bulk_lane():
+                try:
+                    decompress_one(rec["fields"]["Applicant ID"], rec["id"], writer=writer, app_record=rec)
+                except Exception as e:
+                    return str(e)
+            return None
+
+        unflushed = []  # applicants finished since the last successful flush; their writes may still be queued
+
+        def flush(send):
+            # a failed flush leaves the writes queued, but nothing proves they land: fail everyone who had some
+            try:
+                send()
+            except Exception as e:
+                for applicant_id in unflushed:
+                    if applicant_id not in failed:
+                        failed.append(applicant_id)
+                        progress.error(applicant_id, f"write flush failed: {e}")
+            unflushed.clear()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            # map() yields in submission order, so checkpoints never pass an unfinished applicant
+            for rec, error in zip(todo, pool.map(sync, todo)):
+                applicant_id = rec["fields"]["Applicant ID"]
+                if error is not None:
+                    failed.append(applicant_id)
+                    progress.error(applicant_id, error)
+                unflushed.append(applicant_id)
+                if progress.advance(applicant_id):
+                    flush(lambda: progress.checkpoint(writer.flush))
+        flush(writer.flush)
+        watermarks.set(FAILED_KEY, json.dumps(failed))  # retried by the next incremental run
+    return f"Decompressed {len(records)} applicants ({len(failed)} failed)."
+
+
+# ───────── async (webhook endpoints) ─────────
+@metrics.timed("decompress")
+async def decompress_one_async(applicant_id: str, rec_id: str, dry_run: bool = False):
+    """
+    decompress_one on the async Airtable client: after the Applicants read,
+    the three child tables are synced concurrently, each with direct writes.
+    """
+    try:
+        app_record = replica.record(TABLE_APPLICANTS_ID, rec_id) or await atbl_app.get(rec_id)
+        compressed_json_str = app_record["fields"].get("Compressed JSON", "{}")
+        data = json.loads(compressed_json_str)
+    except Exception as e:
+        raise RuntimeError(f"Failed to read compressed JSON for Applicant {applicant_id}: {e}")
+
+    await asyncio.gather(
+        _upsert_single_async(atbl_pers, "Personal Details", applicant_id, data.get("personal", {}), dry_run),
+        _upsert_single_async(atbl_sal, "Salary Preferences", applicant_id, data.get("salary", {}), dry_run),
+        _sync_work_experience_async(atbl_work, applicant_id, data.get("experience", []), dry_run),
+    )
+
+
+async def _upsert_single_async(tbl, table_key, applicant_id, fields, dry_run=False):
+    try:
+        id_field = FIELD_MAP[table_key]["id_field"]
+        records = replica.rows_for(TABLE_IDS[table_key], applicant_id)
+        if records is None:
+            records = await tbl.all(formula=f"{{{id_field}}}='{applicant_id}'")
+        write = _single_upsert(table_key, applicant_id, fields, records)
+        if write is None:
+            return {"skipped": True, "reason": "all_values_empty"}
+        action, rec_id, payload = write
+        if not dry_run:
+            if action == "update":
+                await tbl.update(rec_id, payload, typecast=True)
+            else:
+                await tbl.create(payload, typecast=True)
+    except Exception as e:
+        raise RuntimeError(f"Upsert failed for {table_key} ({applicant_id}): {e}")
+
+
+async def _sync_work_experience_async(tbl, applicant_id, experiences, dry_run=False):
+    try:
+        id_field = FIELD_MAP["Work Experience"]["id_field"]
+        current = replica.rows_for(TABLE_WORK_ID, applicant_id)
+        if current is None:
+            current = await tbl.all(formula=f"{{{id_field}}}='{applicant_id}'")
+        summary, updates, creates, deletes = _work_experience_diff(applicant_id, experiences, current)
+        if dry_run:
+            return summary
+
+        writes = []
+        if updates:
+            writes.append(tbl.batch_update([{"id": rec_id, "fields": p} for rec_id, p in updates], typecast=True))
+        if creates:
+            writes.append(tbl.batch_create(creates, typecast=True))
+        if deletes:
+            writes.append(tbl.batch_delete(deletes))
+        await asyncio.gather(*writes)
+        return summary
+
+    except Exception as e:
+        raise RuntimeError(f"Sync failed for Work Experience ({applicant_id}): {e}")
@@ -0,0 +1,119 @@
+"""
+Streaming NDJSON export of every applicant's compressed profile.
+
+export_profiles() walks the Applicants table in Applicant ID order, one
+Airtable page at a time, and builds each page's profiles (build_json) from a
+bulk prefetch of just that page's child rows. Memory stays at one page of
+profiles (plus the Applicant IDs seen so far) whatever the size of the
+base, and nothing is written back to Airtable.
+ndjson() turns profiles into newline-delimited JSON and gzip_stream()
+compresses a byte stream as it goes.
+
+Every line carries its `applicant_id`; pass the last one received as `after`
+to resume after it. The cursor is found in Airtable's own sort order (which
+need not match Python's string order): applicants up to it are still listed
+(Applicant ID only), but their child rows are not read. A duplicated
+Applicant ID is exported once.
+
+    python -m services.export --gzip --after APP-004200 > profiles.ndjson.gz
+"""
+
+import sys
+import json
+import zlib
+import argparse
+from typing import Iterable, Iterator
+from services.airtable_client import bulk_lane, chunked, applicant_ids_formula
+from services.compressor import tbl_app, prefetch_children, build_json
+from services.replica import applicant_key
+
+EXPORT_PAGE_SIZE = 100  # Applicants per page (Airtable's maximum)
+CHUNK_BYTES = 64 * 1024  # NDJSON lines are sent in chunks of about this size
+
+
+def applicant_exists(applicant_id: str) -> bool:
+    """Whether an Applicants row has this Applicant ID (checks an `after` cursor before streaming)."""
+    with bulk_lane():
+        return bool(tbl_app.all(formula=applicant_ids_formula([applicant_id]), fields=["Applicant ID"], max_records=1))
+
+
+def _applicant_pages(after: str | None = None) -> Iterator[list[str]]:
+    """
+    Applicant IDs in Airtable's sort order, one page at a time, starting
+    after the row whose Applicant ID is `after`. Raises LookupError at the
+    end if that row never came up.
+    """
+    pages = tbl_app.iterate(fields=["Applicant ID"], sort=["Applicant ID"], page_size=EXPORT_PAGE_SIZE)
+    seen = set()
+    waiting = after is not None
+    while True:
+        with bulk_lane():  # entered per page: the generator may be resumed from another thread
+            page = next(pages, None)
+        if page is None:
+            break
+        applicant_ids = []
+        for rec in page:
+            applicant_id = applicant_key(rec.get("fields", {}).get("Applicant ID"))
+            if not applicant_id or applicant_id in seen:
+                continue
+            seen.add(applicant_id)
+            if waiting:
+                waiting = applicant_id != after
+            else:
+                applicant_ids.append(applicant_id)
+        if applicant_ids:
+            yield applicant_ids
+    if waiting:
+        raise LookupError(f"No applicant {after!r} to resume after")
+
+
+def export_profiles(after: str | None = None) -> Iterator[dict]:
+    """Yield {"applicant_id", "personal", "experience", "salary"} for every applicant after `after`."""
+    for applicant_ids in _applicant_pages(after):
+        for chunk in chunked(applicant_ids):
+            with bulk_lane():
+                prefetched = prefetch_children(chunk)
+            for applicant_id in chunk:
+                yield {"applicant_id": applicant_id, **build_json(applicant_id, prefetched=prefetched)}
+
+
+def ndjson(profiles: Iterable[dict], chunk_bytes: int = CHUNK_BYTES) -> Iterator[bytes]:
+    """One JSON object per line, joined into chunks of about `chunk_bytes`."""
+    buffer, size = [], 0
+    for profile in profiles:
+        line = (json.dumps(profile, ensure_ascii=False) + "\n").encode("utf-8")
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Gzip a byte stream incrementally."""
+    compressor = zlib.compressobj(wbits=31)  # 31: gzip header and trailer
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write every applicant's compressed profile to stdout as NDJSON.")
+    parser.add_argument("--after", default=None, help="resume after this Applicant ID")
+    parser.add_argument("--gzip", action="store_true", help="gzip the output")
+    args = parser.parse_args(argv)
+
+    stream = ndjson(export_profiles(args.after))
+    if args.gzip:
+        stream = gzip_stream(stream)
+    for chunk in stream:
+        sys.stdout.buffer.write(chunk)
+    sys.stdout.buffer.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+import traceback
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_PATH = os.path.join(".cache", "state.sqlite3")
+CHECKPOINT_EVERY = int(os.getenv("JOB_CHECKPOINT_EVERY", "100"))  # applicants between checkpoints
+MAX_ERRORS_KEPT = 50
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class Deferred(Exception):
+    """Raised (via JobProgress.wait) to put a job back in the queue for `seconds`, keeping its checkpoint."""
+
+    def __init__(self, seconds: float):
+        super().__init__(f"deferred for {seconds}s")
+        self.seconds = seconds
+
+
+class NoProgress:
+    """Progress sink used when a sweep runs outside the job queue."""
+
+    def start(self, total: int):
+        pass
+
+    def skip(self, applicant_id: str) -> bool:
+        return False
+
+    def advance(self, applicant_id: str) -> bool:
+        return False
+
+    def checkpoint(self, flush=None):
+        pass
+
+    def error(self, applicant_id: str, message: str):
+        pass
+
+    def saved(self, name: str):
+        return None
+
+    def save(self, name: str, value):
+        pass
+
+    def wait(self, seconds: float):
+        time.sleep(seconds)
+
+
+NO_PROGRESS = NoProgress()
+
+
+class JobProgress:
+    """
+    Progress/checkpoint handle passed into a sweep.
+
+    Sweeps walk applicants in Applicant ID order and call advance() after each
+    one; when it returns True they flush their buffered writes through
+    checkpoint(flush), which persists the last Applicant ID. After a restart
+    skip() tells the sweep which applicants the previous attempt already finished.
+
+    A phase that waits on something external (an OpenAI batch) save()s what it
+    needs to pick the wait up again and calls wait(): the job goes back to the
+    queue for that long, freeing the worker, and the phase is re-run then with
+    saved() returning the value.
+    """
+
+    def __init__(self, queue: "JobQueue", job: dict):
+        self._queue = queue
+        self.job_id = job["id"]
+        state = job["checkpoint"] or {}
+        self.done_phases: dict = state.get("done_phases", {})
+        self._resume_phase = state.get("phase")
+        self._resume_after = state.get("after")
+        self._saved: dict = state.get("saved", {})
+        self.phase = None
+        self.resume_after = None
+        self.total = 0
+        self.processed = 0
+        self._last = None
+
+    def run_phase(self, name: str, fn):
+        """Run one phase of a job (e.g. compress, then shortlist); completed phases are not re-run."""
+        if name in self.done_phases:
+            return self.done_phases[name]
+        self.phase = name
+        self.resume_after = self._resume_after if self._resume_phase == name else None
+        self.total = self.processed = 0
+        self._last = self.resume_after
+        self._queue._update(self.job_id, phase=name)
+        result = fn(self)
+        self.done_phases[name] = result
+        self._saved = {}
+        self._queue._update(self.job_id, checkpoint={"done_phases": self.done_phases}, processed=self.processed)
+        return result
+
+    def start(self, total: int):
+        self.total = total
+        self._queue._update(self.job_id, total=total, processed=self.processed)
+
+    def skip(self, applicant_id: str) -> bool:
+        if self.resume_after is not None and str(applicant_id) <= self.resume_after:
+            self.processed += 1
+            return True
+        return False
+
+    def advance(self, applicant_id: str) -> bool:
+        self.processed += 1
+        self._last = str(applicant_id)
+        if self.processed % CHECKPOINT_EVERY == 0:
+            return True
+        self._queue._update(self.job_id, processed=self.processed)
+        return False
+
+    def checkpoint(self, flush=None):
+        """Flush the sweep's pending writes, then record everything up to the last applicant as done."""
+        if flush is not None:
+            flush()
+        state = {"done_phases": self.done_phases, "phase": self.phase, "after": self._last, "saved": self._saved}
+        self._queue._update(self.job_id, checkpoint=state, processed=self.processed)
+
+    def error(self, applicant_id: str, message: str):
+        self._queue._add_error(self.job_id, f"{applicant_id}: {message}")
+
+    def saved(self, name: str):
+        """A value save()d by an earlier attempt at the current phase (None if there is none)."""
+        return self._saved.get(name)
+
+    def save(self, name: str, value):
+        """Persist a JSON-able value with the checkpoint, for the phase's next attempt."""
+        self._saved[name] = value
+        self.checkpoint()
+
+    def wait(self, seconds: float):
+        """End this attempt; the job is run again in `seconds` and resumes from its checkpoint."""
+        raise Deferred(seconds)
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue with one background worker thread.
+
+    Jobs run one at a time (like the old all_lock). A job left queued or
+    running when the process stopped is picked up again on start() and resumes
+    from its last checkpoint; a deferred job waits in the queue until its
+    run_after time.
+    """
+
+    def __init__(self, path: str, handlers: dict | None = None):
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.handlers: dict = dict(handlers or {})
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._worker: threading.Thread | None = None
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, kind TEXT NOT NULL, params TEXT NOT NULL, status TEXT NOT NULL,"
+            " phase TEXT, total INTEGER NOT NULL DEFAULT 0, processed INTEGER NOT NULL DEFAULT 0,"
+            " errors TEXT NOT NULL DEFAULT '[]', checkpoint TEXT, result TEXT,"
+            " created_at REAL NOT NULL, started_at REAL, finished_at REAL, run_after REAL)"
+        )
+        try:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN run_after REAL")  # state DBs from before deferral
+        except sqlite3.OperationalError:
+            pass
+
+    # ───────── persistence ─────────
+    def _row(self, job_id: str) -> dict | None:
+        with self._lock:
+            cur = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+            row = cur.fetchone()
+            cols = [c[0] for c in cur.description]
+        if row is None:
+            return None
+        job = dict(zip(cols, row))
+        for key in ("params", "errors", "checkpoint", "result"):
+            job[key] = json.loads(job[key]) if job[key] else None
+        return job
+
+    def _update(self, job_id: str, **values):
+        for key in ("params", "errors", "checkpoint", "result"):
+            if key in values:
+                values[key] = json.dumps(values[key])
+        assignments = ", ".join(f"{key} = ?" for key in values)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*values.values(), job_id))
+
+    def _add_error(self, job_id: str, message: str):
+        errors = self._row(job_id)["errors"]
+        if len(errors) < MAX_ERRORS_KEPT:
+            self._update(job_id, errors=errors + [message])
+
+    # ───────── public API ─────────
+    def enqueue(self, kind: str, params: dict | None = None) -> str:
+        """
+        Queue a job and return its id. An identical job that is still queued or
+        running is reused; if the latest identical job failed, it is re-queued
+        and resumes from its last checkpoint.
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        params_json = json.dumps(params or {}, sort_keys=True)
+        with self._lock:
+            existing = self._conn.execute(
+                "SELECT id, status FROM jobs WHERE kind = ? AND params = ? ORDER BY created_at DESC LIMIT 1",
+                (kind, params_json),
+            ).fetchone()
+            if existing and existing[1] in (QUEUED, RUNNING):
+                return existing[0]
+            if existing and existing[1] == FAILED:
+                job_id = existing[0]
+                self._conn.execute("UPDATE jobs SET status = ?, finished_at = NULL WHERE id = ?", (QUEUED, job_id))
+            else:
+                job_id = uuid.uuid4().hex
+                self._conn.execute(
+                    "INSERT INTO jobs (id, kind, params, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (job_id, kind, params_json, QUEUED, time.time()),
+                )
+        self.start()
+        self._wake.set()
+        return job_id
+
+    def status(self, job_id: str) -> dict | None:
+        job = self._row(job_id)
+        if job is None:
+            return None
+        elapsed = None
+        if job["started_at"]:
+            elapsed = (job["finished_at"] or time.time()) - job["started_at"]
+        return {
+            "id": job["id"],
+            "kind": job["kind"],
+            "params": job["params"],
+            "status": job["status"],
+            "phase": job["phase"],
+            "processed": job["processed"],
+            "total": job["total"],
+            "elapsed_seconds": round(elapsed, 3) if elapsed is not None else None,
+            "throughput_per_second": round(job["processed"] / elapsed, 3) if elapsed else None,
+            "errors": job["errors"],
+            "result": job["result"],
+            "run_after": job["run_after"],
+        }
+
+    def start(self):
+        """Start the worker thread (idempotent); interrupted jobs are resumed first."""
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._run, name="job-worker", daemon=True)
+            self._worker.start()
+
+    def stop(self, timeout: float | None = None):
+        self._stop.set()
+        self._wake.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+
+    # ───────── worker ─────────
+    def _next_job(self) -> dict | None:
+        with self._lock:
+            # RUNNING first: those were interrupted mid-run and resume from their checkpoint
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) AND (run_after IS NULL OR run_after <= ?)"
+                " ORDER BY status = ? DESC, created_at LIMIT 1",
+                (RUNNING, QUEUED, time.time(), RUNNING),
+            ).fetchone()
+        return self._row(row[0]) if row else None
+
+    def _run(self):
+        while not self._stop.is_set():
+            job = self._next_job()
+            if job is None:
+                self._wake.wait(timeout=5)
+                self._wake.clear()
+                continue
+            self.run_job(job)
+
+    def run_job(self, job: dict):
+        self._update(job["id"], status=RUNNING, started_at=job["started_at"] or time.time())
+        progress = JobProgress(self, job)
+        try:
+            result = self.handlers[job["kind"]](job["params"], progress)
+        except Deferred as deferred:
+            self._update(job["id"], status=QUEUED, run_after=time.time() + deferred.seconds)
+            return
+        except Exception as e:
+            self._add_error(job["id"], f"{type(e).__name__}: {e}")
+            traceback.print_exc()
+            self._update(job["id"], status=FAILED, finished_at=time.time())
+            return
+        self._update(job["id"], status=DONE, result=result, finished_at=time.time(), run_after=None)
@@ -0,0 +1,182 @@
+"""
+Offline LLM scoring through the OpenAI Batch API.
+
+Nightly sweeps do not need answers within seconds, so instead of one
+responses.create call per applicant they can write every pending evaluation
+to a JSONL file, submit it as a batch (billed at a discount and outside the
+synchronous rate limits), poll until it finishes and read all results back
+at once:
+
+    results = evaluate_offline({rec_id: applicant_json, ...})
+
+A batch can take up to its whole 24h completion window, so long-running
+callers split this in two: start_offline() submits and returns a JSON-able
+state (the batch id) they can persist, and collect_offline() checks on it
+once, returning None while it is still running.
+
+Requests use the same prompt, model and cache keys as llm_evaluate_applicant,
+so batch and synchronous evaluations are interchangeable.
+"""
+
+import os
+import json
+import time
+from dotenv import load_dotenv
+from services import llm_evaluator
+from services.llm_cache import LLMCache
+
+load_dotenv()
+
+BATCH_DIR = os.getenv("LLM_BATCH_DIR", os.path.join(".cache", "llm_batches"))
+POLL_SECONDS = float(os.getenv("LLM_BATCH_POLL_SECONDS", "30"))
+TIMEOUT_SECONDS = float(os.getenv("LLM_BATCH_TIMEOUT_SECONDS", str(24 * 3600)))
+ENDPOINT = "/v1/responses"
+COMPLETION_WINDOW = "24h"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def write_batch_file(applicant_jsons: dict[str, dict], path: str) -> str:
+    """Write one Batch API request line per applicant, keyed by custom_id; returns `path`."""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for custom_id, applicant_json in applicant_jsons.items():
+            json_str = json.dumps(applicant_json, separators=(",", ":"))
+            line = {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": ENDPOINT,
+                "body": {"model": llm_evaluator.MODEL, "input": llm_evaluator.PROMPT_TEMPLATE.format(json_str=json_str)},
+            }
+            f.write(json.dumps(line, separators=(",", ":")) + "\n")
+    return path
+
+
+def submit_batch(path: str, metadata: dict | None = None) -> str:
+    """Upload a JSONL request file and start a batch over it; returns the batch id."""
+    with open(path, "rb") as f:
+        uploaded = llm_evaluator.client.files.create(file=f, purpose="batch")
+    batch = llm_evaluator.client.batches.create(
+        input_file_id=uploaded.id, endpoint=ENDPOINT, completion_window=COMPLETION_WINDOW, metadata=metadata
+    )
+    return batch.id
+
+
+def _output_text(body: dict) -> str:
+    """The concatenated output_text parts of a raw Responses API body."""
+    texts = []
+    for item in body.get("output") or []:
+        if item.get("type") != "message":
+            continue
+        for part in item.get("content") or []:
+            if part.get("type") == "output_text":
+                texts.append(part.get("text", ""))
+    return "".join(texts)
+
+
+def read_batch_results(batch) -> dict[str, dict]:
+    """
+    Parse a finished batch's output file into {custom_id: evaluation}.
+    Failed requests and replies that are not a JSON object are left out.
+    """
+    output_file_id = getattr(batch, "output_file_id", None)
+    if not output_file_id:
+        return {}
+    results = {}
+    for line in llm_evaluator.client.files.content(output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+            response = row.get("response") or {}
+            if row.get("error") or response.get("status_code") != 200:
+                continue
+            data = json.loads(_output_text(response.get("body") or {}).strip())
+        except (ValueError, AttributeError):
+            continue
+        if isinstance(data, dict):
+            results[row["custom_id"]] = llm_evaluator._normalize(data)
+    return results
+
+
+def start_offline(applicant_jsons: dict[str, dict], timeout: float | None = None, use_cache: bool = True) -> dict:
+    """
+    Submit a batch for the {custom_id: applicant_json} not already cached and
+    return the state collect_offline() needs: {"batch_id" (None when nothing
+    was submitted), "deadline" (epoch seconds), "keys" (cache keys of the
+    submitted ones), "answered" (cached evaluations), "status"}.
+    """
+    keys = {
+        custom_id: LLMCache.key_for(llm_evaluator.MODEL, llm_evaluator.PROMPT_VERSION, applicant_json)
+        for custom_id, applicant_json in applicant_jsons.items()
+    }
+    answered, misses = {}, {}
+    for custom_id, applicant_json in applicant_jsons.items():
+        cached = llm_evaluator.cached_evaluation(keys[custom_id], use_cache)
+        if cached is not None:
+            answered[custom_id] = cached
+        else:
+            misses[custom_id] = applicant_json
+    state = {
+        "batch_id": None,
+        "deadline": time.time() + (TIMEOUT_SECONDS if timeout is None else timeout),
+        "keys": {custom_id: keys[custom_id] for custom_id in misses},
+        "answered": answered,
+        "status": "cached",
+    }
+    if misses:
+        path = write_batch_file(misses, os.path.join(BATCH_DIR, f"shortlist-{int(time.time() * 1000)}.jsonl"))
+        try:
+            state["batch_id"] = submit_batch(path, metadata={"purpose": "shortlist"})
+        finally:
+            os.remove(path)
+        state["status"] = "submitted"
+    return state
+
+
+def collect_offline(state: dict, use_cache: bool = True) -> dict[str, dict] | None:
+    """
+    Check once on a batch from start_offline(). Returns None while it is
+    still running, else {custom_id: evaluation}, caching the new answers;
+    state["status"] is left at the batch's final status. A batch past its
+    deadline is cancelled. Applicants the batch did not answer (failed lines,
+    or a batch that failed, expired or timed out) are missing from the result
+    so the caller can evaluate them another way.
+    """
+    results = dict(state["answered"])
+    if state["batch_id"] is None:
+        return results
+    batch = llm_evaluator.client.batches.retrieve(state["batch_id"])
+    if batch.status not in TERMINAL_STATUSES:
+        if time.time() < state["deadline"]:
+            return None
+        batch = llm_evaluator.client.batches.cancel(state["batch_id"])  # stop paying for answers nobody reads
+    state["status"] = batch.status
+    cache = llm_evaluator.cache if use_cache else None
+    for custom_id, data in read_batch_results(batch).items():
+        if custom_id not in state["keys"]:
+            continue
+        results[custom_id] = data
+        if cache is not None:
+            cache.set(state["keys"][custom_id], data)
+    return results
+
+
+def evaluate_offline(
+    applicant_jsons: dict[str, dict],
+    poll_seconds: float | None = None,
+    timeout: float | None = None,
+    use_cache: bool = True,
+) -> dict[str, dict]:
+    """
+    Evaluate {custom_id: applicant_json} through one batch, blocking until
+    it finishes, and return {custom_id: evaluation}; see start_offline() and
+    collect_offline().
+    """
+    poll_seconds = POLL_SECONDS if poll_seconds is None else poll_seconds
+    state = start_offline(applicant_jsons, timeout, use_cache)
+    while True:
+        results = collect_offline(state, use_cache)
+        if results is not None:
+            return results
+        time.sleep(poll_seconds)
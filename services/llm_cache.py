@@ -0,0 +1,99 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_PATH = os.path.join(".cache", "llm_cache.sqlite3")
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 50_000
+
+
+def canonical_json(data) -> str:
+    """Key-sorted, whitespace-free JSON: equal objects give equal strings whatever their key order."""
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+class LLMCache:
+    """
+    Persistent SQLite cache for LLM evaluations.
+
+    Entries expire `ttl_seconds` after they were written, and once the table
+    holds more than `max_entries` rows the least recently used ones are evicted.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used)")
+
+    @staticmethod
+    def make_key(model: str, prompt_version: str, json_str: str) -> str:
+        return hashlib.sha256(f"{model}\x00{prompt_version}\x00{json_str}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def key_for(model: str, prompt_version: str, applicant_json) -> str:
+        """Cache key of an applicant profile, hashed in canonical form."""
+        return LLMCache.make_key(model, prompt_version, canonical_json(applicant_json))
+
+    def get(self, key: str) -> dict | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: dict):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+def default_cache() -> LLMCache | None:
+    """Build the process cache from LLM_CACHE_PATH / LLM_CACHE_TTL / LLM_CACHE_MAX_ENTRIES (empty path disables it)."""
+    path = os.getenv("LLM_CACHE_PATH", DEFAULT_PATH)
+    if not path:
+        return None
+    return LLMCache(
+        path,
+        ttl_seconds=float(os.getenv("LLM_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+    )
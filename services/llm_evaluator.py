@@ -1,20 +1,31 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 import os
 import json
+import asyncio
 from dotenv import load_dotenv
 import time
 import random
+from services import metrics, profiling
+from services.llm_cache import LLMCache, default_cache
+from services.circuit_breaker import CircuitBreaker, CircuitOpen, OPEN
 
 load_dotenv()
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+aclient = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+cache = default_cache()
+# Shared by the sync and async paths: while OpenAI is down, calls fail fast instead of sitting out the backoff
+breaker = CircuitBreaker(
+    "openai",
+    failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+    reset_seconds=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30")),
+)
 
-
-def llm_evaluate_applicant(applicant_json):
-    # Convert JSON to a compact string for exact cache matching
-    json_str = json.dumps(applicant_json, separators=(",", ":"))
-
-    prompt = f"""
+MODEL = "gpt-5-nano"
+# Bump whenever PROMPT_TEMPLATE or BATCH_PROMPT_TEMPLATE changes so cached evaluations are not reused
+PROMPT_VERSION = "1"
+BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "8"))  # applicants packed into one request by llm_evaluate_applicants
+PROMPT_TEMPLATE = """
     You are a recruiting analyst.
     Applicants have already been shortlisted based on their location, preferred rate, availability, and experience (or tier 1 company).
     Visa/relocations requirements are not specified do not evaluate based on them.
@@ -41,21 +52,128 @@ def llm_evaluate_applicant(applicant_json):
     }}
     """
 
-    max_retries = 3
-    backoff_base = 2  # exponential base
 
-    for attempt in range(max_retries):
+BATCH_PROMPT_TEMPLATE = """
+    You are a recruiting analyst.
+    Applicants have already been shortlisted based on their location, preferred rate, availability, and experience (or tier 1 company).
+    Visa/relocations requirements are not specified do not evaluate based on them.
+
+    Applicants (JSON array; each item has an "id" and the applicant's JSON profile under "applicant"):
+    {applicants_json}
+
+    Data units:
+    preferred_rate, min_rate are per hour
+    availability is in hours per week
+
+    Evaluate every applicant independently. For each applicant profile, do four things:
+    1. Provide a concise 75-word summary.
+    2. Rate overall candidate quality from 1-10 (higher is better).
+    3. List any data gaps or inconsistencies you notice, 20 to 40 words.
+    4. Suggest up to three follow-up questions to clarify gaps.
+
+    Return exactly a json with one result per applicant, each carrying the applicant's "id":
+    {{
+        "results": [
+            {{
+                "id": <id>,
+                "summary": "<text>",
+                "score": <integer>,
+                "issues": "<comma-separated list or 'None'>",
+                "follow_ups": "<bullet list>"
+            }}
+        ]
+    }}
+    """
+
+
+MAX_RETRIES = 3
+BACKOFF_BASE = 2  # exponential base
+
+
+def _backoff(attempt: int) -> float:
+    return (BACKOFF_BASE**attempt) + random.uniform(0, 1)
+
+
+def _before_call():
+    try:
+        breaker.before_call()
+    except CircuitOpen:
+        metrics.llm_requests.inc(stage=metrics.current_stage(), outcome="circuit_open")
+        raise
+
+
+def _record_call(started: float, prompt: str, response=None):
+    """Latency, outcome and token usage of one OpenAI request (response None: it failed)."""
+    seconds = time.perf_counter() - started
+    outcome = "ok" if response is not None else "error"
+    metrics.llm_requests.inc(stage=metrics.current_stage(), outcome=outcome)
+    metrics.llm_request_seconds.observe(seconds, outcome=outcome)
+    profiling.record_llm(outcome, seconds, prompt, response)
+    usage = getattr(response, "usage", None)
+    for kind in ("input_tokens", "output_tokens"):
+        tokens = getattr(usage, kind, None)
+        if isinstance(tokens, int):
+            metrics.llm_tokens.inc(tokens, kind=kind.removesuffix("_tokens"))
+
+
+def _create(prompt: str):
+    """One responses.create call, guarded by the circuit breaker."""
+    _before_call()
+    started = time.perf_counter()
+    try:
+        response = client.responses.create(model=MODEL, input=prompt)
+    except Exception:
+        breaker.record_failure()
+        _record_call(started, prompt)
+        raise
+    breaker.record_success()
+    _record_call(started, prompt, response)
+    return response
+
+
+def _request_json(prompt: str):
+    """Send `prompt` to the model and parse its JSON reply, retrying with exponential backoff."""
+    for attempt in range(MAX_RETRIES):
         try:
-            response = client.responses.create(model="gpt-5-nano", input=prompt)
-            text_output = response.output_text.strip()
-            data = json.loads(text_output)
-            break  # success
+            return json.loads(_create(prompt).output_text.strip())
+        except CircuitOpen:
+            raise  # the provider is down: fail now rather than sleep through the retries
         except Exception as e:
-            if attempt == max_retries - 1:
-                raise  # raise final failure
-            sleep_time = (backoff_base**attempt) + random.uniform(0, 1)
-            time.sleep(sleep_time)
+            if attempt == MAX_RETRIES - 1 or breaker.state == OPEN:
+                raise  # raise final failure (or the one that just opened the circuit)
+            metrics.retries.inc(client="llm")
+            time.sleep(_backoff(attempt))
+
 
+async def _acreate(prompt: str):
+    _before_call()
+    started = time.perf_counter()
+    try:
+        response = await aclient.responses.create(model=MODEL, input=prompt)
+    except Exception:
+        breaker.record_failure()
+        _record_call(started, prompt)
+        raise
+    breaker.record_success()
+    _record_call(started, prompt, response)
+    return response
+
+
+async def _arequest_json(prompt: str):
+    """_request_json on the async client; the backoff is awaited, so no thread is held."""
+    for attempt in range(MAX_RETRIES):
+        try:
+            return json.loads((await _acreate(prompt)).output_text.strip())
+        except CircuitOpen:
+            raise
+        except Exception as e:
+            if attempt == MAX_RETRIES - 1 or breaker.state == OPEN:
+                raise
+            metrics.retries.inc(client="llm")
+            await asyncio.sleep(_backoff(attempt))
+
+
+def _normalize(data: dict) -> dict:
     # Minimal sanity checks / normalization
     data["summary"] = str(data.get("summary", "")).strip()
     data["issues"] = str(data.get("issues", "None")).strip()
@@ -64,5 +182,125 @@ def llm_evaluate_applicant(applicant_json):
         data["score"] = int(data.get("score", 0))
     except Exception:
         data["score"] = 0
+    return data
+
+
+def cached_evaluation(cache_key: str, use_cache: bool = True) -> dict | None:
+    """The cached evaluation for `cache_key`, counting the hit or miss (None when caching is off)."""
+    if not use_cache or cache is None:
+        return None
+    cached = cache.get(cache_key)
+    metrics.llm_cache.inc(result="hit" if cached is not None else "miss")
+    return cached
+
 
+@metrics.timed("llm_evaluate")
+def llm_evaluate_applicant(applicant_json, use_cache: bool = True):
+    # Compact JSON for the prompt; the cache key uses the canonical (key-sorted) form
+    json_str = json.dumps(applicant_json, separators=(",", ":"))
+
+    cache_key = LLMCache.key_for(MODEL, PROMPT_VERSION, applicant_json)
+    cached = cached_evaluation(cache_key, use_cache)
+    if cached is not None:
+        return cached
+
+    data = _normalize(_request_json(PROMPT_TEMPLATE.format(json_str=json_str)))
+
+    if use_cache and cache is not None:
+        cache.set(cache_key, data)
     return data
+
+
+@metrics.timed("llm_evaluate")
+async def allm_evaluate_applicant(applicant_json, use_cache: bool = True):
+    """llm_evaluate_applicant for async callers (AsyncOpenAI, awaitable backoff)."""
+    json_str = json.dumps(applicant_json, separators=(",", ":"))
+
+    cache_key = LLMCache.key_for(MODEL, PROMPT_VERSION, applicant_json)
+    cached = cached_evaluation(cache_key, use_cache)
+    if cached is not None:
+        return cached
+
+    data = _normalize(await _arequest_json(PROMPT_TEMPLATE.format(json_str=json_str)))
+
+    if use_cache and cache is not None:
+        cache.set(cache_key, data)
+    return data
+
+
+def _split_batch_results(reply, count: int) -> dict[int, dict]:
+    """
+    Validate a batch reply and key its usable results by position. Items with
+    an unknown or repeated id, or without a summary and an integer-like score,
+    are dropped so the caller can re-evaluate those applicants one by one.
+    """
+    items = reply.get("results") if isinstance(reply, dict) else reply
+    if not isinstance(items, list):
+        return {}
+    answers: dict[int, list] = {}
+    for item in items:
+        try:
+            i = int(item["id"])
+        except (TypeError, ValueError, KeyError):
+            continue
+        answers.setdefault(i, []).append(item)
+
+    results = {}
+    for i, answer in answers.items():
+        if not 0 <= i < count or len(answer) > 1:  # an id answered twice is ambiguous
+            continue
+        item = answer[0]
+        try:
+            int(item["score"])
+        except (TypeError, ValueError, KeyError):
+            continue
+        if str(item.get("summary") or "").strip():
+            results[i] = _normalize({k: item[k] for k in ("summary", "score", "issues", "follow_ups") if k in item})
+    return results
+
+
+def llm_evaluate_applicants(
+    applicant_jsons: list, batch_size: int | None = None, use_cache: bool = True, fallback=None
+) -> list[dict]:
+    """
+    Evaluate many applicants, packing up to `batch_size` (default LLM_BATCH_SIZE)
+    of them into each model request.
+
+    Cached applicants are answered from the cache and never sent. Each batch
+    reply is validated and split per applicant; applicants the reply does not
+    answer cleanly (or whose whole batch request failed) are handed to
+    `fallback` (default llm_evaluate_applicant) one at a time. Results come
+    back in input order and share the single-applicant cache entries.
+    """
+    batch_size = max(1, batch_size or BATCH_SIZE)
+    fallback = fallback or (lambda applicant_json: llm_evaluate_applicant(applicant_json, use_cache=use_cache))
+    json_strs = [json.dumps(a, separators=(",", ":")) for a in applicant_jsons]
+    keys = [LLMCache.key_for(MODEL, PROMPT_VERSION, a) for a in applicant_jsons]
+
+    results: list[dict | None] = [None] * len(applicant_jsons)
+    misses = []
+    for i, key in enumerate(keys):
+        cached = cached_evaluation(key, use_cache)
+        if cached is not None:
+            results[i] = cached
+        else:
+            misses.append(i)
+
+    for start in range(0, len(misses), batch_size):
+        chunk = misses[start : start + batch_size]
+        if len(chunk) == 1:
+            continue  # a lone applicant goes through the single-applicant prompt below
+        applicants_json = "[" + ",".join(f'{{"id":{n},"applicant":{json_strs[i]}}}' for n, i in enumerate(chunk)) + "]"
+        try:
+            answered = _split_batch_results(_request_json(BATCH_PROMPT_TEMPLATE.format(applicants_json=applicants_json)), len(chunk))
+        except Exception:
+            continue  # every applicant in the chunk falls back
+        for n, data in answered.items():
+            results[chunk[n]] = data
+            if use_cache and cache is not None:
+                cache.set(keys[chunk[n]], data)
+
+    for i in misses:
+        if results[i] is None:
+            results[i] = fallback(applicant_jsons[i])
+    return results
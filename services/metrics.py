@@ -0,0 +1,232 @@
+"""
+Process-wide metrics, served by GET /metrics in the Prometheus text format.
+
+Counter and Histogram are small thread-safe series keyed by their label
+values, so no client library is needed. span(stage) times a block into
+stage_seconds{stage} and keeps the innermost open span in a contextvar: the
+Airtable and OpenAI clients read it to attribute every call to the stage
+that made it. @timed(stage) runs a sync or async function inside a span.
+"""
+
+import time
+import asyncio
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._series: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} takes labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for values, state in series:
+            lines.extend(self._render_series(values, state))
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counter(_Metric):
+    """Monotonic count per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        super().__init__(f"{name}_total", help, labels)
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._series.get(self._key(labels), 0)
+
+    def _render_series(self, values, total):
+        return [f"{self.name}{_format_labels(self.labels, values)} {_format_number(total)}"]
+
+
+class Histogram(_Metric):
+    """Observations per label combination, counted into cumulative `le` buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._series.get(key)
+            if state is None:
+                state = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._series.get(self._key(labels))
+            return state["count"] if state else 0
+
+    def _render_series(self, values, state):
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets, state["counts"]):
+            cumulative += count
+            le = _format_labels(self.labels, values, f'le="{_format_number(bound)}"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+        inf = _format_labels(self.labels, values, 'le="+Inf"')
+        lines.append(f"{self.name}_bucket{inf} {state['count']}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labels, values)} {_format_number(state['sum'])}")
+        lines.append(f"{self.name}_count{_format_labels(self.labels, values)} {state['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+    def clear(self):
+        for metric in self._metrics:
+            metric.clear()
+
+
+registry = Registry()
+
+# ───────── pipeline metrics ─────────
+stage_seconds = registry.histogram("stage_seconds", "Wall time of each pipeline stage (span).", ("stage",))
+stage_errors = registry.counter("stage_errors", "Stages that ended with an exception.", ("stage",))
+airtable_requests = registry.counter(
+    "airtable_requests", "Airtable HTTP requests (pages and retries included).", ("table", "op", "stage", "outcome")
+)
+airtable_request_seconds = registry.histogram(
+    "airtable_request_seconds", "Airtable HTTP round trip, excluding the rate-limiter wait.", ("table", "op")
+)
+airtable_wait_seconds = registry.histogram(
+    "airtable_wait_seconds", "Time spent waiting for a rate-limiter token.", ("lane",)
+)
+airtable_rate_limited = registry.counter("airtable_rate_limited", "429 responses from Airtable.", ("table",))
+retries = registry.counter("retries", "Calls retried after a 429 or a failed attempt.", ("client",))
+llm_requests = registry.counter("llm_requests", "OpenAI requests by outcome.", ("stage", "outcome"))
+llm_request_seconds = registry.histogram("llm_request_seconds", "OpenAI request latency.", ("outcome",))
+llm_tokens = registry.counter("llm_tokens", "OpenAI tokens used.", ("kind",))
+llm_cache = registry.counter("llm_cache_lookups", "LLM evaluation cache lookups.", ("result",))
+
+
+# ───────── spans ─────────
+class Span:
+    """One timed stage; `parent` is the span that was open when it started."""
+
+    def __init__(self, stage: str, parent: "Span | None" = None):
+        self.stage = stage
+        self.parent = parent
+        self.started = time.perf_counter()
+        self.seconds: float | None = None
+
+    @property
+    def path(self) -> str:
+        return f"{self.parent.path}/{self.stage}" if self.parent else self.stage
+
+
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar("metrics_span", default=None)
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+def current_stage() -> str:
+    span = _current.get()
+    return span.stage if span else "none"
+
+
+@contextmanager
+def span(stage: str):
+    """Time the enclosed block as `stage` (nested spans each record their own time)."""
+    opened = Span(stage, _current.get())
+    token = _current.set(opened)
+    try:
+        yield opened
+    except BaseException:
+        stage_errors.inc(stage=stage)
+        raise
+    finally:
+        _current.reset(token)
+        opened.seconds = time.perf_counter() - opened.started
+        stage_seconds.observe(opened.seconds, stage=stage)
+
+
+def timed(stage: str):
+    """Decorator: run the (sync or async) function inside span(stage)."""
+
+    def decorate(fn):
+        if asyncio.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,268 @@
+"""
+Opt-in per-request profiling.
+
+A request sent with `X-Profile: 1` (or `?profile=1`) runs with a Trace in a
+contextvar. The Airtable clients (both) and the OpenAI wrapper add every
+outbound call to it: timing, request and response size, the stage (span)
+that made it, and for list calls the records returned and whether another
+page followed. `X-Profile: cprofile` also runs cProfile on the event-loop
+thread for the request. cProfile sees everything that thread runs, so the
+capture is skipped when other requests are in flight as it starts, and is
+flagged when some start before it ends. Sync endpoints run in FastAPI's
+threadpool, out of its sight, and get no capture. The finished trace is
+kept in a bounded in-memory store (GET /profiles/{id}) and summarised in the
+response's Server-Timing header.
+
+Calls made while no trace is active cost one contextvar lookup.
+"""
+
+import io
+import os
+import json
+import time
+import uuid
+import pstats
+import cProfile
+import threading
+import contextvars
+from collections import OrderedDict
+from dotenv import load_dotenv
+from services import metrics
+
+load_dotenv()
+
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "100"))  # finished traces kept for GET /profiles
+CPROFILE_TOP = 30  # functions listed from a cProfile capture
+
+_trace: contextvars.ContextVar["Trace | None"] = contextvars.ContextVar("request_trace", default=None)
+_cprofile_lock = threading.Lock()  # only one cProfile can be active per process
+
+
+class RequestCounter:
+    """Requests being served right now, and how many have started in total (`with counter:` per request)."""
+
+    def __init__(self):
+        self.current = 0
+        self.started = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.current += 1
+            self.started += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.current -= 1
+        return False
+
+
+requests_in_flight = RequestCounter()  # maintained by the app's middleware
+
+
+def _size(value) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return len(json.dumps(value, separators=(",", ":"), default=str))
+
+
+class Trace:
+    """The outbound calls of one request, in the order they finished."""
+
+    def __init__(self, name: str, cprofile: bool = False):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.started = time.perf_counter()
+        self.seconds: float | None = None
+        self.calls: list[dict] = []
+        self.cprofile = cprofile
+        self.profile_text: str | None = None
+        self._lock = threading.Lock()
+
+    def add(self, client: str, target: str, op: str, seconds: float, **details):
+        span = metrics.current_span()
+        call = {
+            "client": client,
+            "target": target,
+            "op": op,
+            "stage": span.path if span else "none",
+            "at_ms": round((time.perf_counter() - self.started - seconds) * 1000, 2),
+            "ms": round(seconds * 1000, 2),
+            **details,
+        }
+        with self._lock:
+            self.calls.append(call)
+
+    def summary(self) -> dict:
+        """Calls grouped by client, target and operation, with their totals."""
+        groups: dict[str, dict] = {}
+        with self._lock:
+            calls = list(self.calls)
+        for call in calls:
+            group = groups.setdefault(
+                f"{call['client']} {call['target']} {call['op']}",
+                {"calls": 0, "ms": 0.0, "request_bytes": 0, "response_bytes": 0},
+            )
+            group["calls"] += 1
+            group["ms"] = round(group["ms"] + call["ms"], 2)
+            group["request_bytes"] += call.get("request_bytes", 0)
+            group["response_bytes"] += call.get("response_bytes", 0)
+            if "tokens" in call:
+                group["tokens"] = group.get("tokens", 0) + call["tokens"]
+        return {
+            "id": self.id,
+            "request": self.name,
+            "ms": round(self.seconds * 1000, 2) if self.seconds is not None else None,
+            "outbound_calls": len(calls),
+            "outbound_ms": round(sum(call["ms"] for call in calls), 2),
+            "by_call": groups,
+        }
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: total outbound time per client, and the whole request."""
+        per_client: dict[str, list] = {}
+        with self._lock:
+            for call in self.calls:
+                totals = per_client.setdefault(call["client"], [0, 0.0])
+                totals[0] += 1
+                totals[1] += call["ms"]
+        parts = [f'{client};dur={ms:.1f};desc="{count} calls"' for client, (count, ms) in sorted(per_client.items())]
+        if self.seconds is not None:
+            parts.append(f"total;dur={self.seconds * 1000:.1f}")
+        return ", ".join(parts)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            calls = list(self.calls)
+        return {**self.summary(), "calls": calls, "cprofile": self.profile_text}
+
+
+class TraceStore:
+    """The last `keep` finished traces, by id."""
+
+    def __init__(self, keep: int = PROFILE_KEEP):
+        self.keep = keep
+        self._traces: OrderedDict[str, Trace] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, trace: Trace):
+        with self._lock:
+            self._traces[trace.id] = trace
+            while len(self._traces) > self.keep:
+                self._traces.popitem(last=False)
+
+    def get(self, trace_id: str) -> Trace | None:
+        with self._lock:
+            return self._traces.get(trace_id)
+
+    def summaries(self) -> list[dict]:
+        with self._lock:
+            traces = list(self._traces.values())
+        return [trace.summary() for trace in reversed(traces)]
+
+
+traces = TraceStore()
+
+
+def current_trace() -> Trace | None:
+    return _trace.get()
+
+
+def requested(header: str | None, query: str | None) -> tuple[bool, bool]:
+    """(trace, cprofile) asked for by the X-Profile header or the `profile` query flag."""
+    value = (header or query or "").strip().lower()
+    if value in ("", "0", "false", "no"):
+        return False, False
+    return True, value == "cprofile"
+
+
+class profiled:
+    """
+    Context manager that traces the enclosed block (sync or async `with`).
+    The trace is stored when the block ends. cProfile only sees the thread
+    that entered the block; it is skipped (with the reason in profile_text)
+    when `skip_cprofile` gives one, when other requests are in flight, or
+    while another capture is running.
+    """
+
+    def __init__(self, name: str, cprofile: bool = False, skip_cprofile: str | None = None):
+        self.trace = Trace(name, cprofile)
+        self.skip_cprofile = skip_cprofile
+        self._token = None
+        self._profiler = None
+        self._started_before = 0
+
+    def __enter__(self) -> Trace:
+        self._token = _trace.set(self.trace)
+        if self.trace.cprofile:
+            others = requests_in_flight.current - 1  # the app counts the profiled request itself
+            if self.skip_cprofile:
+                self.trace.profile_text = f"skipped: {self.skip_cprofile}"
+            elif others > 0:
+                self.trace.profile_text = f"skipped: {others} other requests in flight would be profiled with this one"
+            elif _cprofile_lock.acquire(blocking=False):
+                self._started_before = requests_in_flight.started
+                self._profiler = cProfile.Profile()
+                self._profiler.enable()
+            else:
+                self.trace.profile_text = "skipped: another request is being profiled"
+        return self.trace
+
+    def __exit__(self, *exc):
+        if self._profiler is not None:
+            self._profiler.disable()
+            _cprofile_lock.release()
+            out = io.StringIO()
+            overlapped = requests_in_flight.started - self._started_before
+            if overlapped:
+                out.write(f"warning: {overlapped} requests started during the capture; their event-loop work is included\n")
+            pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(CPROFILE_TOP)
+            self.trace.profile_text = out.getvalue()
+        self.trace.seconds = time.perf_counter() - self.trace.started
+        _trace.reset(self._token)
+        traces.add(self.trace)
+        return False
+
+    async def __aenter__(self) -> Trace:
+        return self.__enter__()
+
+    async def __aexit__(self, *exc):
+        return self.__exit__(*exc)
+
+
+# ───────── recorders called by the clients ─────────
+def record_airtable(table: str, op: str, outcome: str, seconds: float, request=None, result=None, response_bytes=None):
+    trace = _trace.get()
+    if trace is None:
+        return
+    details = {
+        "outcome": outcome,
+        "request_bytes": _size(request),
+        "response_bytes": response_bytes if response_bytes is not None else _size(result),
+    }
+    if op == "list" and isinstance(result, dict):
+        details["records"] = len(result.get("records") or [])
+        details["more_pages"] = bool(result.get("offset"))
+    trace.add("airtable", table, op, seconds, **details)
+
+
+def record_llm(outcome: str, seconds: float, prompt: str, response=None):
+    trace = _trace.get()
+    if trace is None:
+        return
+    usage = getattr(response, "usage", None)
+    tokens = sum(t for t in (getattr(usage, "input_tokens", None), getattr(usage, "output_tokens", None)) if isinstance(t, int))
+    output = getattr(response, "output_text", None) or ""
+    trace.add(
+        "openai",
+        "responses",
+        "create",
+        seconds,
+        outcome=outcome,
+        request_bytes=len(prompt.encode()),
+        response_bytes=len(output.encode()),
+        tokens=tokens,
+    )
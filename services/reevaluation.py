@@ -0,0 +1,65 @@
+import os
+import time
+import sqlite3
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_PATH = os.path.join(".cache", "state.sqlite3")
+
+
+class ReevaluationQueue:
+    """
+    Applicants whose LLM evaluation was skipped (provider down, retries
+    exhausted), persisted in SQLite so a later run can evaluate them instead
+    of "Error" being written into their LLM fields. Keyed by Applicant ID.
+    """
+
+    def __init__(self, path: str):
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_reevaluation ("
+            " applicant_id TEXT PRIMARY KEY, attempts INTEGER NOT NULL, queued_at REAL NOT NULL)"
+        )
+
+    def add(self, applicant_id: str):
+        """Queue an applicant (again); repeat failures bump its attempt count."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO llm_reevaluation (applicant_id, attempts, queued_at) VALUES (?, 1, ?)"
+                " ON CONFLICT (applicant_id) DO UPDATE SET attempts = attempts + 1",
+                (str(applicant_id), time.time()),
+            )
+
+    def attempts(self, applicant_id: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT attempts FROM llm_reevaluation WHERE applicant_id = ?", (str(applicant_id),)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def pending(self, limit: int | None = None) -> list[str]:
+        """Queued Applicant IDs, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT applicant_id FROM llm_reevaluation ORDER BY queued_at, applicant_id LIMIT ?",
+                (-1 if limit is None else limit,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def remove(self, applicant_ids: list[str]):
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM llm_reevaluation WHERE applicant_id = ?", [(str(a),) for a in applicant_ids]
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_reevaluation").fetchone()[0]
+
+
+reevaluation_queue = ReevaluationQueue(os.getenv("STATE_DB_PATH", DEFAULT_PATH))
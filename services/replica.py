@@ -0,0 +1,280 @@
+"""
+Local read replica of the five Airtable tables.
+
+The per-applicant paths (webhook endpoints) read their records from here
+instead of Airtable, so a request costs its writes and nothing else. The
+replica is a SQLite table of records keyed by (table, record id) and indexed
+by Applicant ID, and is kept current three ways:
+
+- load() hydrates it with one paginated scan per table;
+- every write this process sends to Airtable (sync or async client) is
+  applied from the write's response (write-through);
+- refresh() polls for rows modified since its cursor (edits made in
+  Airtable itself), and apply_payload() applies Airtable webhook payloads,
+  which also carry deletions;
+- the poll can't see rows deleted in Airtable, so the background thread
+  also reloads everything every AIRTABLE_REPLICA_RELOAD_SECONDS, and
+  refresh_applicant() re-reads one applicant's rows on demand.
+
+It is off unless AIRTABLE_REPLICA_PATH is set (":memory:" or a file). Until the
+first load completes every read falls back to Airtable.
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+import traceback
+from dotenv import load_dotenv
+from services.airtable_client import api, table, bulk_lane, TABLE_NAMES
+from services.airtable_async import atable
+from services.watermarks import now_iso, modified_since_formula
+from dictionaries.constants import FIELD_NAMES_TO_IDS
+
+load_dotenv()
+
+REPLICA_PATH = os.getenv("AIRTABLE_REPLICA_PATH", "")  # empty: no replica, every read goes to Airtable
+POLL_SECONDS = float(os.getenv("AIRTABLE_REPLICA_POLL_SECONDS", "30"))
+RELOAD_SECONDS = float(os.getenv("AIRTABLE_REPLICA_RELOAD_SECONDS", "3600"))  # full reload, to drop deleted rows
+TABLE_IDS = {name: table_id for table_id, name in TABLE_NAMES.items()}
+_TABLE_URL_RE = re.compile(r"/v0/app[A-Za-z0-9]+/([^/?]+)(/[^/?]+)?")
+
+
+def applicant_key(value) -> str | None:
+    """Normalise an Applicant ID cell (plain text or single-item lookup list)."""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    return str(value) if value else None
+
+
+def table_from_url(url: str) -> str | None:
+    """The table id of a record/table write URL (None for listRecords and non-table URLs)."""
+    match = _TABLE_URL_RE.search(str(url))
+    if not match or match.group(2) == "/listRecords":
+        return None
+    return match.group(1)
+
+
+class Replica:
+    """
+    SQLite copy of the base's records (fields by name, as Airtable returns
+    them). Reads return None while the replica is disabled or not yet loaded,
+    so callers can fall back to Airtable. Thread-safe.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.enabled = bool(path)
+        self.ready = False
+        self.cursor: str | None = None  # refresh() picks up rows modified after this
+        self.loaded_at: float | None = None  # time.monotonic() of the last full load
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._poller: threading.Thread | None = None
+        self._conn = None
+        if self.enabled:
+            if path != ":memory:" and os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS records ("
+                " table_id TEXT NOT NULL, rec_id TEXT NOT NULL, applicant_id TEXT, record TEXT NOT NULL,"
+                " PRIMARY KEY (table_id, rec_id))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS records_by_applicant ON records (table_id, applicant_id)")
+
+    # ───────── reads ─────────
+    def record(self, table_id: str, rec_id: str) -> dict | None:
+        if not self.ready:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record FROM records WHERE table_id = ? AND rec_id = ?", (table_id, rec_id)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def rows_for(self, table_id: str, applicant_id: str, use_field_ids: bool = False) -> list[dict] | None:
+        """The table's rows for one Applicant ID, oldest first; fields keyed by field id if asked."""
+        if not self.ready:
+            return None
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT record FROM records WHERE table_id = ? AND applicant_id = ? ORDER BY rowid",
+                (table_id, str(applicant_id)),
+            ).fetchall()
+        records = [json.loads(row[0]) for row in rows]
+        if use_field_ids:
+            ids = FIELD_NAMES_TO_IDS.get(TABLE_NAMES.get(table_id), {})
+            for rec in records:
+                rec["fields"] = {ids.get(name, name): value for name, value in rec["fields"].items()}
+        return records
+
+    def __len__(self) -> int:
+        if not self.enabled:
+            return 0
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def snapshot(self) -> dict:
+        return {"enabled": self.enabled, "ready": self.ready, "records": len(self), "cursor": self.cursor}
+
+    # ───────── writes ─────────
+    def _put(self, table_id: str, record: dict):
+        applicant_id = applicant_key(record.get("fields", {}).get("Applicant ID"))
+        self._conn.execute(
+            "INSERT INTO records (table_id, rec_id, applicant_id, record) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (table_id, rec_id) DO UPDATE SET applicant_id = excluded.applicant_id, record = excluded.record",
+            (table_id, record["id"], applicant_id, json.dumps(record, separators=(",", ":"))),
+        )
+
+    def _drop(self, table_id: str, rec_id: str):
+        self._conn.execute("DELETE FROM records WHERE table_id = ? AND rec_id = ?", (table_id, rec_id))
+
+    def load(self):
+        """Replace the replica's contents with a full scan of every table."""
+        started = now_iso()
+        with bulk_lane():
+            scans = {table_id: table(table_id).all() for table_id in TABLE_NAMES}
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM records")
+            for table_id, records in scans.items():
+                for rec in records:
+                    self._put(table_id, rec)
+            self._conn.execute("COMMIT")
+            self.cursor = started
+            self.loaded_at = time.monotonic()
+            self.ready = True
+
+    def refresh(self) -> int:
+        """Apply rows modified in Airtable since the cursor; returns how many were updated."""
+        if not self.ready:
+            return 0
+        started = now_iso()
+        with bulk_lane():
+            changed = {
+                table_id: table(table_id).all(formula=modified_since_formula(self.cursor)) for table_id in TABLE_NAMES
+            }
+        with self._lock:
+            for table_id, records in changed.items():
+                for rec in records:
+                    self._put(table_id, rec)
+            self.cursor = started
+        return sum(len(records) for records in changed.values())
+
+    async def refresh_applicant(self, applicant_id: str) -> int:
+        """
+        Replace one applicant's rows in every table with a fresh read from
+        Airtable (rows deleted there are dropped). For callers that must not
+        act on a stale copy; returns how many rows the applicant now has.
+        """
+        if not self.ready:
+            return 0
+        formula = f"{{Applicant ID}}='{applicant_id}'"
+        scans = await asyncio.gather(*(atable(table_id).all(formula=formula) for table_id in TABLE_NAMES))
+        with self._lock:
+            self._conn.execute("BEGIN")
+            for table_id, records in zip(TABLE_NAMES, scans):
+                self._conn.execute(
+                    "DELETE FROM records WHERE table_id = ? AND applicant_id = ?", (table_id, str(applicant_id))
+                )
+                for rec in records:
+                    self._put(table_id, rec)
+            self._conn.execute("COMMIT")
+        return sum(len(records) for records in scans)
+
+    def observe_write(self, method: str, url: str, result):
+        """Write-through: apply the response of a create/update/delete this process sent."""
+        table_id = table_from_url(url)
+        if not self.ready or table_id not in TABLE_NAMES or not isinstance(result, dict):
+            return
+        records = result["records"] if "records" in result else [result]
+        with self._lock:
+            for rec in records:
+                if rec.get("deleted"):
+                    self._drop(table_id, rec["id"])
+                elif "fields" in rec:
+                    self._put(table_id, rec)
+
+    async def apply_payload(self, payload: dict) -> set[str]:
+        """
+        Apply one Airtable webhook payload (changedTablesById with created,
+        changed and destroyed records; cell values by field id). Changed rows
+        the replica does not hold are fetched whole with the async client, so
+        the event loop is never blocked. Returns the Applicant IDs
+        the payload touched (before and after the change).
+        """
+        touched = set()
+        if not self.ready:
+            return touched
+        for table_id, change in (payload.get("changedTablesById") or {}).items():
+            if table_id not in TABLE_NAMES:
+                continue
+            names = {fid: name for name, fid in FIELD_NAMES_TO_IDS.get(TABLE_NAMES[table_id], {}).items()}
+            cells = {}
+            for rec_id, created in (change.get("createdRecordsById") or {}).items():
+                cells[rec_id] = (created.get("cellValuesByFieldId") or {}, created.get("createdTime"))
+            for rec_id, changed in (change.get("changedRecordsById") or {}).items():
+                cells[rec_id] = ((changed.get("current") or {}).get("cellValuesByFieldId") or {}, None)
+            for rec_id, (values, created_time) in cells.items():
+                current = self.record(table_id, rec_id)
+                if current is None and created_time is None:
+                    try:
+                        current = await atable(table_id).get(rec_id)
+                    except Exception:
+                        continue  # deleted again since the change
+                else:
+                    current = current or {"id": rec_id, "createdTime": created_time, "fields": {}}
+                    touched.add(applicant_key(current["fields"].get("Applicant ID")))
+                    for field_id, value in values.items():
+                        name = names.get(field_id, field_id)
+                        if value in (None, "", []):
+                            current["fields"].pop(name, None)  # Airtable omits empty cells
+                        else:
+                            current["fields"][name] = value
+                touched.add(applicant_key(current["fields"].get("Applicant ID")))
+                with self._lock:
+                    self._put(table_id, current)
+            for rec_id in change.get("destroyedRecordIds") or []:
+                gone = self.record(table_id, rec_id)
+                if gone is not None:
+                    touched.add(applicant_key(gone["fields"].get("Applicant ID")))
+                with self._lock:
+                    self._drop(table_id, rec_id)
+        touched.discard(None)
+        return touched
+
+    # ───────── background hydration and change poll ─────────
+    def start(self, interval: float = POLL_SECONDS, reload: float = RELOAD_SECONDS):
+        """
+        Load in the background, then poll for changes every `interval` seconds
+        and load again every `reload` seconds (idempotent).
+        """
+        if not self.enabled or (self._poller is not None and self._poller.is_alive()):
+            return
+        self._stop.clear()
+
+        def _run():
+            while not self._stop.is_set():
+                try:
+                    if self.ready and time.monotonic() - self.loaded_at < reload:
+                        self.refresh()
+                    else:
+                        self.load()
+                except Exception:
+                    traceback.print_exc()
+                if self._stop.wait(interval):
+                    return
+
+        self._poller = threading.Thread(target=_run, name="airtable-replica", daemon=True)
+        self._poller.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+replica = Replica(REPLICA_PATH)
+api.on_write(replica.observe_write)
@@ -0,0 +1,122 @@
+import os
+import json
+import threading
+import traceback
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dictionaries", "shortlist_rules.json")
+RELOAD_INTERVAL = float(os.getenv("SHORTLIST_RULES_RELOAD_SECONDS", "5"))  # how often the watcher checks the file
+
+
+def min_experience_days(min_years: float) -> int:
+    """Smallest total day count that calculate_experience_years rounds to ≥ min_years."""
+    days = max(0, int(min_years * 365.25) - 60)
+    while round(days / 365.25, 1) < min_years:
+        days += 1
+    return days
+
+
+class RuleSet:
+    """
+    Shortlist rules compiled once from their config: thresholds as floats,
+    allowed countries and tier-1 companies as case-folded frozensets.
+    """
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.version = config.get("version")
+        self.min_years = float(config["experience"]["min_years"])
+        self.min_experience_days = min_experience_days(self.min_years)
+        self.tier_1_companies = frozenset(str(c).strip().casefold() for c in config["experience"]["tier_1_companies"])
+        self.max_rate = float(config["salary"]["max_rate"])
+        self.min_availability = float(config["salary"]["min_availability"])
+        self.allowed_countries = frozenset(str(c).strip().casefold() for c in config["location"]["allowed_countries"])
+
+    def __eq__(self, other):
+        return isinstance(other, RuleSet) and self.config == other.config
+
+    def __repr__(self):
+        return f"RuleSet(version={self.version!r})"
+
+
+def load_rules(path: str) -> RuleSet:
+    with open(path, encoding="utf-8") as f:
+        return RuleSet(json.load(f))
+
+
+def as_rules(rules) -> RuleSet:
+    """Accept a RuleSet, a raw config dict, or None (the current rules file)."""
+    if rules is None:
+        return rules_file.rules
+    return rules if isinstance(rules, RuleSet) else RuleSet(rules)
+
+
+class RulesFile:
+    """
+    The rules config file and the RuleSet compiled from it.
+
+    reload() recompiles when the file's mtime changes and calls every
+    on_change(old, new) listener if the rules actually differ; a file that no
+    longer parses is kept in `load_error` (shown by GET /rules) and the
+    previous rules stay in force. watch()
+    polls reload() from a daemon thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._stop = threading.Event()
+        self._watcher: threading.Thread | None = None
+        self._mtime = os.stat(path).st_mtime_ns
+        self.rules = load_rules(path)
+        self.load_error: str | None = None  # why the last edit was rejected, until a good one loads
+
+    def on_change(self, listener):
+        self._listeners.append(listener)
+        return listener
+
+    def reload(self) -> bool:
+        """Pick up edits to the file; returns True when the rules changed."""
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                if mtime == self._mtime:
+                    return False
+                self._mtime = mtime
+                new = load_rules(self.path)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                self.load_error = f"cannot load {self.path}: {e!r}"
+                return False
+            self.load_error = None
+            old = self.rules
+            if new == old:
+                return False
+            self.rules = new
+        for listener in self._listeners:
+            try:
+                listener(old, new)
+            except Exception:
+                traceback.print_exc()
+        return True
+
+    def watch(self, interval: float = RELOAD_INTERVAL):
+        """Start polling the file for changes (idempotent)."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+
+        def _poll():
+            while not self._stop.wait(interval):
+                self.reload()
+
+        self._watcher = threading.Thread(target=_poll, name="rules-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+rules_file = RulesFile(os.getenv("SHORTLIST_RULES_PATH", DEFAULT_PATH))
@@ -1,17 +1,42 @@
-from pyairtable import Api
-import json
 import os
-from dotenv import load_dotenv
-from dictionaries.constants import FIELD_NAMES_TO_IDS, SHORTLIST_RULES, BASE_ID, TABLE_APPLICANTS_ID, TABLE_SHORTLIST_ID
-from datetime import datetime
-from services.llm_evaluator import llm_evaluate_applicant
-
-load_dotenv()
-API = os.getenv("AIRTABLE_TOKEN")
-
-api = Api(API)
-tbl_app = api.table(BASE_ID, TABLE_APPLICANTS_ID)
-tbl_shortlist = api.table(BASE_ID, TABLE_SHORTLIST_ID)
+import json
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor
+from dictionaries.constants import FIELD_NAMES_TO_IDS, TABLE_APPLICANTS_ID, TABLE_SHORTLIST_ID
+from datetime import datetime, date
+from services.airtable_client import table, bulk_lane, chunked, applicant_ids_formula
+from services.watermarks import watermarks, modified_since_formula
+from services.airtable_async import atable
+from services.llm_evaluator import (
+    llm_evaluate_applicant,
+    allm_evaluate_applicant,
+    llm_evaluate_applicants,
+    BATCH_SIZE as LLM_BATCH_SIZE,
+)
+from services import llm_batch
+from services.batch_writer import BatchWriter, DIRECT
+from services.jobs import NO_PROGRESS
+from services import metrics
+from services.shortlist_frame import ApplicantFrame
+from services.rules import RuleSet, as_rules
+from services.reevaluation import reevaluation_queue
+from services.replica import replica
+
+tbl_app = table(TABLE_APPLICANTS_ID)
+tbl_shortlist = table(TABLE_SHORTLIST_ID)
+atbl_app = atable(TABLE_APPLICANTS_ID)
+atbl_shortlist = atable(TABLE_SHORTLIST_ID)
+
+# Max in-flight LLM evaluations during a bulk run (independent of the Airtable rate limit)
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+FRAME_CACHE_SIZE = 4  # parsed ApplicantFrames kept, so re-scoring the same records under new rules skips parsing
+
+_frames: OrderedDict = OrderedDict()
+_frames_lock = threading.Lock()
 
 
 def calculate_experience_years(experiences):
@@ -52,24 +77,31 @@ def calculate_experience_years(experiences):
     return round(total_years, 1)  # Keep one decimal place
 
 
-def worked_at_tier1(experiences):
-    """Check if applicant has worked at any Tier-1 company."""
-    tier_1_companies = SHORTLIST_RULES["experience"]["tier_1_companies"]
+def worked_at_tier1(experiences, tier_1_companies=None):
+    """Check if applicant has worked at any Tier-1 company (case-folded names)."""
+    if tier_1_companies is None:
+        tier_1_companies = as_rules(None).tier_1_companies
     for exp in experiences:
-        company = exp.get("company", "").strip()
-        if company in tier_1_companies:
+        company = exp.get("company")
+        if isinstance(company, str) and company.strip().casefold() in tier_1_companies:  # null/non-text: no match
             return True
     return False
 
 
-def meets_criteria(data):
+def meets_criteria(data, rules=None):
     """
     Check if applicant meets all shortlisting criteria.
 
     1. Experience: ≥4 years OR worked at a Tier-1 company
     2. Compensation: preferred rate ≤$100/hr AND availability ≥20 hrs/week
     3. Location: Country in allowed list
+
+    `rules` (a RuleSet or raw config dict) defaults to the current rules file.
+    Countries and companies are compared case-insensitively. For many
+    applicants at once see services.shortlist_frame.ApplicantFrame, which
+    gives identical results.
     """
+    rules = as_rules(rules)
     # Extract relevant data
     experiences = data.get("experience", [])
     personal = data.get("personal", {})
@@ -86,13 +118,12 @@ def meets_criteria(data):
     else:
         location_country = location.strip()
 
-    allowed_countries = SHORTLIST_RULES["location"]["allowed_countries"]
-    if not location_country or location_country not in allowed_countries:
+    if not location_country or location_country.casefold() not in rules.allowed_countries:
         return False
 
     # Check compensation criteria
-    max_rate = SHORTLIST_RULES["salary"]["max_rate"]
-    min_availability = SHORTLIST_RULES["salary"]["min_availability"]
+    max_rate = rules.max_rate
+    min_availability = rules.min_availability
 
     try:
         preferred_rate = float(salary.get("preferred_rate", "0"))
@@ -105,9 +136,9 @@ def meets_criteria(data):
         return False
 
     # Check experience criteria (≥4 years OR worked at Tier-1)
-    min_years = SHORTLIST_RULES["experience"]["min_years"]
+    min_years = rules.min_years
     experience_years = calculate_experience_years(experiences)
-    tier1_experience = worked_at_tier1(experiences)
+    tier1_experience = worked_at_tier1(experiences, rules.tier_1_companies)
 
     if experience_years < min_years and not tier1_experience:
         return False
@@ -121,33 +152,97 @@ def _get_shortlist_row_for(app_id: str):
     SL = FIELD_NAMES_TO_IDS["Shortlisted Leads"]
     # formula using field-ID (rename-proof)
     formula = f"{{{SL['Applicant ID']}}}='{app_id}'"
-    rows = tbl_shortlist.all(formula=formula, max_records=1)
+    # fields keyed by field ID, matching the SL[...] lookups done on the row
+    rows = replica.rows_for(TABLE_SHORTLIST_ID, app_id, use_field_ids=True)
+    if rows is None:
+        rows = tbl_shortlist.all(formula=formula, max_records=1, use_field_ids=True)
     return rows[0] if rows else None
 
 
-def _update_applicant_status(applicant_id: str, status: str):
-    """Update the Shortlist Status field in the Applicants table."""
+def prefetch_shortlist(applicant_ids: list[str] | None = None) -> dict[str, dict]:
+    """
+    Shortlisted Leads rows keyed by Applicant ID, so a bulk run needs no
+    per-applicant lookup. Without `applicant_ids` the table is scanned once;
+    with them (incremental runs) only those applicants' rows are fetched, one
+    OR() formula query per chunk of IDs.
+    """
+    SL = FIELD_NAMES_TO_IDS["Shortlisted Leads"]
+    if applicant_ids is None:
+        rows = tbl_shortlist.all(use_field_ids=True)
+    else:
+        rows = []
+        for chunk in chunked(sorted(set(applicant_ids))):
+            rows.extend(tbl_shortlist.all(formula=applicant_ids_formula(chunk, SL["Applicant ID"]), use_field_ids=True))
+
+    index = {}
+    for rec in rows:
+        app_id = rec.get("fields", {}).get(SL["Applicant ID"])
+        if app_id:
+            index.setdefault(str(app_id), rec)  # first row wins, like max_records=1
+    return index
+
+
+def _update_applicant_status(applicant_id: str, status: str, writer=None, app_rec: dict | None = None) -> bool:
+    """
+    Update the Shortlist Status field in the Applicants table.
+    Pass the Applicants record when it is already at hand: the lookup is
+    skipped, and so is the write if the status is already `status`.
+    Returns whether a write was issued.
+    """
+    writer = writer or DIRECT
     AP = FIELD_NAMES_TO_IDS["Applicants"]
-    formula = f"{{{AP['Applicant ID']}}}='{applicant_id}'"
-    rows = tbl_app.all(formula=formula, max_records=1)
-    if rows:
-        tbl_app.update(rows[0]["id"], {AP["Shortlist Status"]: status}, typecast=True)
+    if app_rec is None:
+        rows = replica.rows_for(TABLE_APPLICANTS_ID, applicant_id)
+        if rows is None:
+            rows = tbl_app.all(formula=f"{{{AP['Applicant ID']}}}='{applicant_id}'", max_records=1)
+        if not rows:
+            return False
+        app_rec = rows[0]
+    if app_rec.get("fields", {}).get("Shortlist Status") == status:
+        return False
+    writer.update(tbl_app, app_rec["id"], {AP["Shortlist Status"]: status}, typecast=True)
+    return True
+
+
+def _evaluate_or_none(applicant_json: dict) -> dict | None:
+    try:
+        return llm_evaluate_applicant(applicant_json)
+    except Exception as e:
+        # Don't block shortlist writes if LLM fails (or its circuit is open); the caller queues a re-evaluation
+        return None
+
+
+def _evaluate_many_or_none(applicant_jsons: list[dict], batch_size: int | None = None) -> list[dict | None]:
+    """_evaluate_or_none for several applicants, packed into batched LLM requests."""
+    if len(applicant_jsons) == 1:
+        return [_evaluate_or_none(applicant_jsons[0])]
+    return llm_evaluate_applicants(applicant_jsons, batch_size=batch_size, fallback=_evaluate_or_none)
+
+
+def _queue_reevaluation(app_rec: dict) -> dict:
+    """Leave the LLM fields as they are and remember the applicant for reevaluate_queued()."""
+    reevaluation_queue.add(app_rec["fields"]["Applicant ID"])
+    return {"llm_status": "queued", "llm_message": "LLM unavailable; queued for re-evaluation"}
 
 
-def _apply_llm_outputs_to_records(app_rec: dict, shortlist_rec_id: str, applicant_json: dict):
+def _apply_llm_outputs_to_records(
+    app_rec: dict, shortlist_rec_id: str, applicant_json: dict, writer=None, llm: dict | None = None
+):
     """
-    Run LLM and write results:
+    Run LLM (unless a result is passed in via `llm`) and write results:
       Applicants: LLM Summary, LLM Score, LLM Follow-Ups
       Shortlisted Leads: Score Reason (from issues)
+    If no evaluation can be had, nothing is written and the applicant is
+    queued for re-evaluation instead.
     """
+    writer = writer or DIRECT
     AP = FIELD_NAMES_TO_IDS["Applicants"]
     SL = FIELD_NAMES_TO_IDS["Shortlisted Leads"]
 
-    try:
-        llm = llm_evaluate_applicant(applicant_json)
-    except Exception as e:
-        # Don't block shortlist writes if LLM fails
-        llm = {"summary": "Error", "score": 0, "issues": "Error", "follow_ups": "Error"}
+    if llm is None:
+        llm = _evaluate_or_none(applicant_json)
+    if llm is None:
+        return _queue_reevaluation(app_rec)
 
     # Update Applicants row
     app_update = {
@@ -156,21 +251,20 @@ def _apply_llm_outputs_to_records(app_rec: dict, shortlist_rec_id: str, applican
         AP["LLM Follow-Ups"]: llm.get("follow_ups", ""),
     }
     try:
-        tbl_app.update(app_rec["id"], app_update, typecast=True)
+        writer.update(tbl_app, app_rec["id"], app_update, typecast=True)
     except Exception as e:
         return {"llm_status": "partial", "llm_message": f"Applicants update failed: {e}"}
 
     # Update Shortlisted Leads row (Score Reason from issues)
     try:
-        tbl_shortlist.update(shortlist_rec_id, {SL["Score Reason"]: llm.get("issues", "None")}, typecast=True)
+        writer.update(tbl_shortlist, shortlist_rec_id, {SL["Score Reason"]: llm.get("issues", "None")}, typecast=True)
     except Exception as e:
         return {"llm_status": "partial", "llm_message": f"Shortlist update failed: {e}"}
 
-    if llm.get("summary") == "Error":
-        return {"llm_status": "error", "llm_message": "LLM error"}
     return {"llm_status": "ok"}
 
 
+@metrics.timed("shortlist")
 def generate_shortlist_one(applicant_id: str, rec_id: str | None = None, compressed_json: str | None = None) -> dict:
     if not applicant_id or not str(applicant_id).strip():
         return {"status": "error", "message": "applicant_id is required"}
@@ -179,7 +273,7 @@ def generate_shortlist_one(applicant_id: str, rec_id: str | None = None, compres
         if not rec_id:
             return {"status": "error", "message": "Either rec_id or compressed_json must be provided"}
         try:
-            app_rec = tbl_app.get(rec_id)
+            app_rec = replica.record(TABLE_APPLICANTS_ID, rec_id) or tbl_app.get(rec_id)
             compressed_json = app_rec.get("fields", {}).get("Compressed JSON")
             if not compressed_json:
                 return {"status": "error", "message": f"No Compressed JSON for applicant {applicant_id}"}
@@ -188,12 +282,13 @@ def generate_shortlist_one(applicant_id: str, rec_id: str | None = None, compres
     else:
         # If compressed_json was passed, we still need the app_rec
         try:
-            app_rec = tbl_app.get(rec_id) if rec_id else None
+            app_rec = (replica.record(TABLE_APPLICANTS_ID, rec_id) or tbl_app.get(rec_id)) if rec_id else None
             if app_rec is None:
                 # find by Applicant ID
                 AP = FIELD_NAMES_TO_IDS["Applicants"]
-                formula = f"{{{AP['Applicant ID']}}}='{applicant_id}'"
-                rows = tbl_app.all(formula=formula, max_records=1)
+                rows = replica.rows_for(TABLE_APPLICANTS_ID, applicant_id)
+                if rows is None:
+                    rows = tbl_app.all(formula=f"{{{AP['Applicant ID']}}}='{applicant_id}'", max_records=1)
                 if not rows:
                     return {"status": "error", "message": f"Applicant {applicant_id} not found"}
                 app_rec = rows[0]
@@ -209,13 +304,15 @@ def generate_shortlist_one(applicant_id: str, rec_id: str | None = None, compres
     existing = _get_shortlist_row_for(applicant_id)
 
     if meets_criteria(data):
-        _update_applicant_status(applicant_id, "Shortlisted")
+        _update_applicant_status(applicant_id, "Shortlisted", app_rec=app_rec)
         if existing:
             current_cjson = existing.get("fields", {}).get(SL["Compressed JSON"])
             if current_cjson != compressed_json:
                 tbl_shortlist.update(existing["id"], {SL["Compressed JSON"]: compressed_json}, typecast=True)
                 # LLM on update
                 llm_info = _apply_llm_outputs_to_records(app_rec, existing["id"], data)
+                if llm_info["llm_status"] == "ok":
+                    reevaluation_queue.remove([applicant_id])
                 return {"status": "Shortlisted", "message": f"Shortlist updated for {applicant_id}"}
             else:
                 return {"status": "Shortlisted", "message": f"Shortlist already up-to-date for {applicant_id}"}
@@ -226,9 +323,11 @@ def generate_shortlist_one(applicant_id: str, rec_id: str | None = None, compres
             )
             # LLM on create
             llm_info = _apply_llm_outputs_to_records(app_rec, created["id"], data)
+            if llm_info["llm_status"] == "ok":
+                reevaluation_queue.remove([applicant_id])
             return {"status": "Shortlisted", "message": f"Shortlist created for {applicant_id}"}
     else:
-        _update_applicant_status(applicant_id, "Not Shortlisted")
+        _update_applicant_status(applicant_id, "Not Shortlisted", app_rec=app_rec)
         if existing:
             tbl_shortlist.delete(existing["id"])
             return {"status": "Not Shortlisted", "message": f"Shortlist removed for {applicant_id}"}
@@ -236,65 +335,499 @@ def generate_shortlist_one(applicant_id: str, rec_id: str | None = None, compres
             return {"status": "Not Shortlisted", "message": f"Not shortlisted; no existing record for {applicant_id}"}
 
 
-def generate_shortlist():
+# ───────── async single-applicant path (webhook endpoints) ─────────
+async def _get_shortlist_row_for_async(app_id: str):
     SL = FIELD_NAMES_TO_IDS["Shortlisted Leads"]
-    created = updated = deleted = skipped = 0
-    llm_ok = llm_errors = 0
+    formula = f"{{{SL['Applicant ID']}}}='{app_id}'"
+    rows = replica.rows_for(TABLE_SHORTLIST_ID, app_id, use_field_ids=True)
+    if rows is None:
+        rows = await atbl_shortlist.all(formula=formula, max_records=1, use_field_ids=True)
+    return rows[0] if rows else None
 
-    for app_rec in tbl_app.all():
-        fields = app_rec.get("fields", {})
-        app_id = fields.get("Applicant ID")
-        cjson = fields.get("Compressed JSON")
 
-        if not app_id or not str(app_id).strip() or not cjson:
-            skipped += 1
-            continue
+async def _update_applicant_status_async(status: str, app_rec: dict) -> bool:
+    if app_rec.get("fields", {}).get("Shortlist Status") == status:
+        return False
+    AP = FIELD_NAMES_TO_IDS["Applicants"]
+    await atbl_app.update(app_rec["id"], {AP["Shortlist Status"]: status}, typecast=True)
+    return True
 
-        try:
-            data = json.loads(cjson)
-        except (TypeError, json.JSONDecodeError):
-            skipped += 1
-            continue
 
-        existing = _get_shortlist_row_for(app_id)
+async def _apply_llm_outputs_async(app_rec: dict, shortlist_rec_id: str, applicant_json: dict) -> dict:
+    """_apply_llm_outputs_to_records on the async clients; both rows are written concurrently."""
+    AP = FIELD_NAMES_TO_IDS["Applicants"]
+    SL = FIELD_NAMES_TO_IDS["Shortlisted Leads"]
+    try:
+        llm = await allm_evaluate_applicant(applicant_json)
+    except Exception:
+        return _queue_reevaluation(app_rec)
 
-        if meets_criteria(data):
-            _update_applicant_status(app_id, "Shortlisted")
+    app_update = {
+        AP["LLM Summary"]: llm.get("summary", ""),
+        AP["LLM Score"]: llm.get("score", 0),
+        AP["LLM Follow-Ups"]: llm.get("follow_ups", ""),
+    }
+    try:
+        await asyncio.gather(
+            atbl_app.update(app_rec["id"], app_update, typecast=True),
+            atbl_shortlist.update(shortlist_rec_id, {SL["Score Reason"]: llm.get("issues", "None")}, typecast=True),
+        )
+    except Exception as e:
+        return {"llm_status": "partial", "llm_message": f"LLM field update failed: {e}"}
+    reevaluation_queue.remove([app_rec["fields"]["Applicant ID"]])
+    return {"llm_status": "ok"}
+
+
+@metrics.timed("shortlist")
+async def generate_shortlist_one_async(
+    applicant_id: str, rec_id: str | None = None, compressed_json: str | None = None
+) -> dict:
+    """
+    generate_shortlist_one for the webhook endpoints, on the async Airtable
+    and OpenAI clients: the Applicants and Shortlisted Leads reads run
+    concurrently, as do the status and shortlist writes, and the LLM call is
+    awaited, so no thread is held while Airtable or OpenAI respond.
+    """
+    if not applicant_id or not str(applicant_id).strip():
+        return {"status": "error", "message": "applicant_id is required"}
+    if not compressed_json and not rec_id:
+        return {"status": "error", "message": "Either rec_id or compressed_json must be provided"}
+    AP = FIELD_NAMES_TO_IDS["Applicants"]
+    SL = FIELD_NAMES_TO_IDS["Shortlisted Leads"]
+
+    async def _fetch_app():
+        if rec_id:
+            return replica.record(TABLE_APPLICANTS_ID, rec_id) or await atbl_app.get(rec_id)
+        rows = replica.rows_for(TABLE_APPLICANTS_ID, applicant_id)
+        if rows is None:
+            rows = await atbl_app.all(formula=f"{{{AP['Applicant ID']}}}='{applicant_id}'", max_records=1)
+        return rows[0] if rows else None
+
+    try:
+        app_rec, existing = await asyncio.gather(_fetch_app(), _get_shortlist_row_for_async(applicant_id))
+    except Exception as e:
+        return {"status": "error", "message": f"Error fetching Applicants record: {e}"}
+    if app_rec is None:
+        return {"status": "error", "message": f"Applicant {applicant_id} not found"}
+    if not compressed_json:
+        compressed_json = app_rec.get("fields", {}).get("Compressed JSON")
+        if not compressed_json:
+            return {"status": "error", "message": f"No Compressed JSON for applicant {applicant_id}"}
+
+    try:
+        data = json.loads(compressed_json)
+    except (TypeError, json.JSONDecodeError) as e:
+        return {"status": "error", "message": f"Invalid Compressed JSON for {applicant_id}: {e}"}
+
+    if not meets_criteria(data):
+        status_write = _update_applicant_status_async("Not Shortlisted", app_rec)
+        if existing:
+            await asyncio.gather(status_write, atbl_shortlist.delete(existing["id"]))
+            return {"status": "Not Shortlisted", "message": f"Shortlist removed for {applicant_id}"}
+        await status_write
+        return {"status": "Not Shortlisted", "message": f"Not shortlisted; no existing record for {applicant_id}"}
+
+    status_write = _update_applicant_status_async("Shortlisted", app_rec)
+    if existing:
+        if existing.get("fields", {}).get(SL["Compressed JSON"]) == compressed_json:
+            await status_write
+            return {"status": "Shortlisted", "message": f"Shortlist already up-to-date for {applicant_id}"}
+        await asyncio.gather(
+            status_write, atbl_shortlist.update(existing["id"], {SL["Compressed JSON"]: compressed_json}, typecast=True)
+        )
+        await _apply_llm_outputs_async(app_rec, existing["id"], data)  # LLM on update
+        return {"status": "Shortlisted", "message": f"Shortlist updated for {applicant_id}"}
+
+    _, created = await asyncio.gather(
+        status_write,
+        atbl_shortlist.create({SL["Applicant ID"]: applicant_id, SL["Compressed JSON"]: compressed_json}, typecast=True),
+    )
+    await _apply_llm_outputs_async(app_rec, created["id"], data)  # LLM on create
+    return {"status": "Shortlisted", "message": f"Shortlist created for {applicant_id}"}
+
+
+def _parse_compressed(records: list[dict]) -> list[dict | None]:
+    """Each Applicants record's parsed Compressed JSON, or None when it has no Applicant ID or valid JSON."""
+    parsed = []
+    for rec in records:
+        fields = rec.get("fields", {})
+        app_id = fields.get("Applicant ID")
+        cjson = fields.get("Compressed JSON")
+        data = None
+        if app_id and str(app_id).strip() and cjson:
+            try:
+                data = json.loads(cjson)
+            except (TypeError, json.JSONDecodeError):
+                pass
+        parsed.append(data)
+    return parsed
+
+
+def _frame_key(records: list[dict]) -> tuple:
+    """Record ids, Applicant IDs and Compressed JSON digests, plus the date open-ended jobs run to."""
+    rows = []
+    for rec in records:
+        fields = rec.get("fields", {})
+        cjson = fields.get("Compressed JSON")
+        digest = hashlib.blake2b(cjson.encode("utf-8"), digest_size=16).digest() if isinstance(cjson, str) else cjson
+        rows.append((rec.get("id"), fields.get("Applicant ID"), digest))
+    return (date.today().isoformat(), tuple(rows))
+
+
+def _parsed_frame(records: list[dict]) -> tuple[list[dict | None], ApplicantFrame]:
+    """
+    The records' parsed Compressed JSON (see _parse_compressed) and the
+    ApplicantFrame of the valid ones. The last FRAME_CACHE_SIZE results are
+    reused while the records' ids and Compressed JSON are unchanged.
+    """
+    key = _frame_key(records)
+    with _frames_lock:
+        if key in _frames:
+            _frames.move_to_end(key)
+            return _frames[key]
+    parsed = _parse_compressed(records)
+    result = (parsed, ApplicantFrame([data for data in parsed if data is not None]))
+    with _frames_lock:
+        _frames[key] = result
+        while len(_frames) > FRAME_CACHE_SIZE:
+            _frames.popitem(last=False)
+    return result
+
+
+def decide_all(records: list[dict], rules: RuleSet | dict | None = None) -> list[tuple[dict, bool] | None]:
+    """
+    Evaluate the rules for all records in one ApplicantFrame pass. Returns
+    (data, meets_criteria) per record, or None for records to skip.
+    """
+    parsed, frame = _parsed_frame(records)
+    outcomes = iter(frame.evaluate(rules).tolist())
+    return [None if data is None else (data, next(outcomes)) for data in parsed]
+
+
+def flipped_records(records: list[dict], previous: RuleSet | dict, rules: RuleSet | dict | None = None) -> list[dict]:
+    """The records whose outcome under `rules` differs from `previous`, computed locally (no Airtable calls)."""
+    parsed, frame = _parsed_frame(records)
+    valid = [rec for rec, data in zip(records, parsed) if data is not None]
+    changed = frame.evaluate(previous) != frame.evaluate(rules)
+    return [rec for rec, flipped in zip(valid, changed.tolist()) if flipped]
+
+
+async def generate_shortlist_async(
+    llm_concurrency: int | None = None,
+    incremental: bool = False,
+    progress=None,
+    records: list[dict] | None = None,
+    rules: RuleSet | dict | None = None,
+    llm_batch_size: int | None = None,
+    offline_llm: bool = False,
+):
+    """
+    Shortlist every applicant as a pipeline.
+
+    Applicants and Shortlisted Leads are each read up front (see
+    prefetch_shortlist) and the rules are evaluated for all of them in one
+    columnar pass (decide_all), so deciding an outcome needs no Airtable call;
+    applicants that need an LLM evaluation are grouped `llm_batch_size` at a
+    time (default LLM_BATCH_SIZE) into one request each, handed to a pool of
+    at most `llm_concurrency` concurrent requests, and each result is written
+    back as soon as it arrives. Status, shortlist and LLM field writes are buffered
+    in a BatchWriter and flushed as 10-record batch calls; Airtable calls run in
+    the limiter's bulk lane.
+
+    incremental=True only visits applicants whose Compressed JSON changed since
+    the last run's watermark (the first run is a full sweep). `progress` (a
+    jobs.JobProgress) receives counts and checkpoints; in-flight LLM calls are
+    drained before each checkpoint.
+
+    Passing `records` (Applicants records) shortlists just those, without
+    touching the watermark; `rules` overrides the current rules file.
+
+    offline_llm=True (nightly sweeps) defers every LLM evaluation to one
+    OpenAI Batch API job submitted after the status and shortlist writes are
+    flushed (see llm_batch.start_offline). The batch and the applicants
+    waiting on it are saved with the job's checkpoint and the sweep ends;
+    _collect_offline_llm then waits for the results without holding the job
+    worker, and a restarted job resumes the wait instead of resubmitting.
+    Such runs take no mid-sweep checkpoints, since no applicant is finished
+    before the batch is saved.
+    """
+    llm_concurrency = llm_concurrency or LLM_CONCURRENCY
+    llm_batch_size = max(1, llm_batch_size or LLM_BATCH_SIZE)
+    progress = progress or NO_PROGRESS
+    SL = FIELD_NAMES_TO_IDS["Shortlisted Leads"]
+    counts = {
+        "created": 0,
+        "updated": 0,
+        "deleted": 0,
+        "skipped": 0,
+        "llm_ok": 0,
+        "llm_errors": 0,
+        "status_writes_skipped": 0,
+    }
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(llm_concurrency)
+    llm_tasks = []
+    llm_pending = []  # (app_rec, shortlist_rec_id, data) waiting for a full batch
+    llm_offline = []  # (app_rec, shortlist_rec_id, data) for the Batch API job
+    llm_written = []  # Applicant IDs evaluated in this run, dropped from the re-evaluation queue at the end
+    pending = progress.saved("llm_batch") if offline_llm else None
+    if pending is not None:  # the job's sweep already ran: only the batch is left
+        await _collect_offline_llm(pending, progress)
+        return {"status": "ok", "message": pending["counts"]}
+
+    async def _evaluate_and_write(batch):
+        async with semaphore:
+            llms = await loop.run_in_executor(llm_pool, _evaluate_many_or_none, [b[2] for b in batch], llm_batch_size)
+        for (app_rec, shortlist_rec_id, data), llm in zip(batch, llms):
+            if llm is None:
+                llm_info = _queue_reevaluation(app_rec)
+            else:
+                llm_info = _apply_llm_outputs_to_records(app_rec, shortlist_rec_id, data, writer=writer, llm=llm)
+                llm_written.append(app_rec["fields"]["Applicant ID"])
+            counts["llm_ok" if llm_info.get("llm_status") == "ok" else "llm_errors"] += 1
+
+    def _send_llm_batch():
+        if llm_pending:
+            llm_tasks.append(asyncio.create_task(_evaluate_and_write(list(llm_pending))))
+            llm_pending.clear()
+
+    def _queue_llm(app_rec, shortlist_rec_id, data, offline=offline_llm):
+        if offline:
+            llm_offline.append((app_rec, shortlist_rec_id, data))
+            return
+        llm_pending.append((app_rec, shortlist_rec_id, data))
+        if len(llm_pending) >= llm_batch_size:
+            _send_llm_batch()
+
+    async def _shortlist_record(app_rec, decision):
+        if decision is None:
+            counts["skipped"] += 1
+            return
+
+        data, shortlisted_now = decision
+        fields = app_rec["fields"]
+        app_id = fields["Applicant ID"]
+        cjson = fields["Compressed JSON"]
+        existing = shortlisted.get(str(app_id))
+        status = "Shortlisted" if shortlisted_now else "Not Shortlisted"
+        if not _update_applicant_status(app_id, status, writer, app_rec=app_rec):
+            counts["status_writes_skipped"] += 1
+
+        if shortlisted_now:
             if existing:
                 if existing.get("fields", {}).get(SL["Compressed JSON"]) != cjson:
-                    tbl_shortlist.update(existing["id"], {SL["Compressed JSON"]: cjson}, typecast=True)
-                    updated += 1
+                    writer.update(tbl_shortlist, existing["id"], {SL["Compressed JSON"]: cjson}, typecast=True)
+                    counts["updated"] += 1
                     # LLM on update
-                    llm_info = _apply_llm_outputs_to_records(app_rec, existing["id"], data)
-                    llm_ok += 1 if llm_info.get("llm_status") == "ok" else 0
-                    llm_errors += 1 if llm_info.get("llm_status") != "ok" else 0
+                    _queue_llm(app_rec, existing["id"], data)
                 else:
-                    skipped += 1
+                    counts["skipped"] += 1
             else:
-                created_row = tbl_shortlist.create(
-                    {SL["Applicant ID"]: app_id, SL["Compressed JSON"]: cjson}, typecast=True
+                created_row = writer.create(
+                    tbl_shortlist, {SL["Applicant ID"]: app_id, SL["Compressed JSON"]: cjson}, typecast=True
                 )
-                created += 1
-                # LLM on create
-                llm_info = _apply_llm_outputs_to_records(app_rec, created_row["id"], data)
-                llm_ok += 1 if llm_info.get("llm_status") == "ok" else 0
-                llm_errors += 1 if llm_info.get("llm_status") != "ok" else 0
+                counts["created"] += 1
+                # LLM on create (Score Reason is folded into the pending create)
+                _queue_llm(app_rec, created_row["id"], data)
         else:
-            _update_applicant_status(app_id, "Not Shortlisted")
             if existing:
-                tbl_shortlist.delete(existing["id"])
-                deleted += 1
+                writer.delete(tbl_shortlist, existing["id"])
+                counts["deleted"] += 1
             else:
-                skipped += 1
-
-    return {
-        "status": "ok",
-        "message": {
-            "created": created,
-            "updated": updated,
-            "deleted": deleted,
-            "skipped": skipped,
-            "llm_ok": llm_ok,
-            "llm_errors": llm_errors,
-        },
-    }
+                counts["skipped"] += 1
+
+    with ExitStack() as stack:
+        since = None if records is not None else stack.enter_context(watermarks.advance("shortlist:Applicants"))
+        stack.enter_context(bulk_lane())
+        writer = stack.enter_context(BatchWriter())
+        llm_pool = stack.enter_context(ThreadPoolExecutor(max_workers=llm_concurrency))
+
+        if records is not None or (incremental and since):
+            if records is None:
+                records = await asyncio.to_thread(tbl_app.all, formula=modified_since_formula(since, "Compressed JSON"))
+            app_ids = [r["fields"]["Applicant ID"] for r in records if r.get("fields", {}).get("Applicant ID")]
+            shortlisted = await asyncio.to_thread(prefetch_shortlist, app_ids)
+        else:
+            records = await asyncio.to_thread(tbl_app.all)
+            shortlisted = await asyncio.to_thread(prefetch_shortlist)
+
+        records = sorted(records, key=lambda r: str(r.get("fields", {}).get("Applicant ID") or ""))
+        decisions = await asyncio.to_thread(decide_all, records, rules)
+        progress.start(len(records))
+        for app_rec, decision in zip(records, decisions):
+            app_id = app_rec.get("fields", {}).get("Applicant ID")
+            if app_id and progress.skip(app_id):
+                continue
+            await _shortlist_record(app_rec, decision)
+            await asyncio.sleep(0)  # let a batch that record sent start, and finished ones write, mid-walk
+            if app_id and progress.advance(app_id):
+                if offline_llm:  # nothing is finished until the batch results are in
+                    await asyncio.to_thread(writer.flush)
+                else:
+                    _send_llm_batch()
+                    await asyncio.gather(*llm_tasks)
+                    llm_tasks.clear()
+                    await asyncio.to_thread(progress.checkpoint, writer.flush)
+
+        if llm_offline:
+            await asyncio.to_thread(writer.flush)  # statuses and shortlist rows land before the long wait
+            try:
+                batch = await asyncio.to_thread(
+                    llm_batch.start_offline, {app_rec["id"]: data for app_rec, _, data in llm_offline}
+                )
+            except Exception as e:
+                progress.error("llm_batch", f"submission failed, evaluating synchronously: {e!r}")
+                for app_rec, shortlist_rec_id, data in llm_offline:
+                    _queue_llm(app_rec, shortlist_rec_id, data, offline=False)
+            else:
+                items = [  # JSON-able, with the shortlist rows' real ids now that they are flushed
+                    [
+                        {"id": app_rec["id"], "fields": {"Applicant ID": app_rec["fields"]["Applicant ID"]}},
+                        writer.resolved.get(rec_id, rec_id),
+                        data,
+                    ]
+                    for app_rec, rec_id, data in llm_offline
+                ]
+                pending = {"batch": batch, "items": items, "counts": counts}
+                progress.save("llm_batch", pending)
+
+        _send_llm_batch()
+        await asyncio.gather(*llm_tasks)
+        await asyncio.to_thread(writer.flush)
+        reevaluation_queue.remove(llm_written)
+
+    if pending is not None:
+        await _collect_offline_llm(pending, progress)
+    return {"status": "ok", "message": counts}
+
+
+async def _collect_offline_llm(pending: dict, progress):
+    """
+    Wait for a sweep's saved Batch API job and write its results, adding to
+    pending["counts"]. While the batch runs, progress.wait() ends the job's
+    attempt (the job queue runs it again later) or, outside the queue, sleeps
+    between polls. Applicants the batch did not answer are evaluated
+    synchronously.
+    """
+    while True:
+        answered = await asyncio.to_thread(llm_batch.collect_offline, pending["batch"])
+        if answered is not None:
+            break
+        await asyncio.to_thread(progress.wait, llm_batch.POLL_SECONDS)
+
+    counts = pending["counts"]
+    written, unanswered = [], []
+
+    def _write(app_rec, shortlist_rec_id, data, llm):
+        if llm is None:
+            llm_info = _queue_reevaluation(app_rec)
+        else:
+            llm_info = _apply_llm_outputs_to_records(app_rec, shortlist_rec_id, data, writer=writer, llm=llm)
+            written.append(app_rec["fields"]["Applicant ID"])
+        counts["llm_ok" if llm_info.get("llm_status") == "ok" else "llm_errors"] += 1
+
+    with bulk_lane(), BatchWriter() as writer:
+        for app_rec, shortlist_rec_id, data in pending["items"]:
+            llm = answered.get(app_rec["id"])
+            if llm is None:
+                unanswered.append((app_rec, shortlist_rec_id, data))
+            else:
+                _write(app_rec, shortlist_rec_id, data, llm)
+        for batch in chunked(unanswered, LLM_BATCH_SIZE):
+            llms = await asyncio.to_thread(_evaluate_many_or_none, [data for *_, data in batch], LLM_BATCH_SIZE)
+            for (app_rec, shortlist_rec_id, data), llm in zip(batch, llms):
+                _write(app_rec, shortlist_rec_id, data, llm)
+        await asyncio.to_thread(writer.flush)
+    reevaluation_queue.remove(written)
+    counts["llm_offline"] = len(answered)
+    counts["llm_batch_status"] = pending["batch"]["status"]
+
+
+@metrics.timed("shortlist_all")
+def generate_shortlist(
+    llm_concurrency: int | None = None,
+    incremental: bool = False,
+    progress=None,
+    records: list[dict] | None = None,
+    rules: RuleSet | dict | None = None,
+    llm_batch_size: int | None = None,
+    offline_llm: bool = False,
+):
+    """Blocking entry point for the sync endpoints; see generate_shortlist_async."""
+    return asyncio.run(
+        generate_shortlist_async(
+            llm_concurrency,
+            incremental=incremental,
+            progress=progress,
+            records=records,
+            rules=rules,
+            llm_batch_size=llm_batch_size,
+            offline_llm=offline_llm,
+        )
+    )
+
+
+def reshortlist_flipped(previous: RuleSet | dict, rules: RuleSet | dict | None = None, progress=None) -> dict:
+    """
+    Apply a rules change: read Applicants once, find the applicants whose
+    outcome flips from `previous` to `rules` (default the current rules file)
+    locally, then run the shortlist pipeline on only those.
+    """
+    rules = as_rules(rules)
+    with bulk_lane():
+        records = tbl_app.all()
+    flipped = flipped_records(records, previous, rules)
+    result = generate_shortlist(records=flipped, rules=rules, progress=progress)
+    result["message"]["flipped"] = len(flipped)
+    return result
+
+
+def reevaluate_queued(progress=None) -> dict:
+    """
+    Evaluate the applicants whose LLM evaluation was skipped earlier (see
+    _queue_reevaluation). Their Applicants and Shortlisted Leads rows are read
+    in chunked OR() queries, those still shortlisted are evaluated in LLM
+    batches and written back; applicants no longer shortlisted leave the
+    queue, and ones that fail again stay on it.
+    """
+    progress = progress or NO_PROGRESS
+    AP = FIELD_NAMES_TO_IDS["Applicants"]
+    app_ids = sorted(reevaluation_queue.pending())
+    counts = {"queued": len(app_ids), "evaluated": 0, "still_queued": 0, "dropped": 0}
+    if not app_ids:
+        return {"status": "ok", "message": counts}
+
+    with bulk_lane(), BatchWriter() as writer:
+        records = []
+        for chunk in chunked(app_ids):
+            records.extend(tbl_app.all(formula=applicant_ids_formula(chunk, AP["Applicant ID"])))
+        shortlisted = prefetch_shortlist(app_ids)
+
+        work, done = [], set(app_ids)  # `done` ends up holding every ID that leaves the queue
+        for app_rec in sorted(records, key=lambda r: str(r["fields"].get("Applicant ID"))):
+            app_id = str(app_rec["fields"].get("Applicant ID"))
+            row = shortlisted.get(app_id)
+            try:
+                data = json.loads(app_rec["fields"].get("Compressed JSON") or "")
+            except json.JSONDecodeError:
+                data = None
+            if row is not None and data is not None:
+                work.append((app_id, app_rec, row["id"], data))
+        counts["dropped"] = len(app_ids) - len(work)
+
+        progress.start(len(work))
+        for batch in chunked(work, LLM_BATCH_SIZE):
+            llms = _evaluate_many_or_none([data for *_, data in batch], LLM_BATCH_SIZE)
+            for (app_id, app_rec, shortlist_rec_id, data), llm in zip(batch, llms):
+                if llm is None:
+                    reevaluation_queue.add(app_id)
+                    done.discard(app_id)
+                    counts["still_queued"] += 1
+                else:
+                    _apply_llm_outputs_to_records(app_rec, shortlist_rec_id, data, writer=writer, llm=llm)
+                    counts["evaluated"] += 1
+                if progress.advance(app_id):
+                    progress.checkpoint(writer.flush)
+
+    reevaluation_queue.remove(sorted(done))
+    return {"status": "ok", "message": counts}
@@ -0,0 +1,217 @@
+"""
+Vectorized shortlist rules: the same decision as shortlist.meets_criteria,
+evaluated for many applicants at once over columnar pandas frames.
+
+ApplicantFrame flattens the applicant JSONs once (one row per applicant and
+one per work experience). evaluate() is then pure column arithmetic, so
+re-scoring every applicant after a rules change costs milliseconds.
+"""
+
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+from services.rules import RuleSet, as_rules
+
+_ISO_DATE = r"[0-9]{4}-[0-9]{2}-[0-9]{2}"
+_YEAR = r"[0-9]{4}"
+_DAYS_BEFORE_MONTH = np.array([0, 0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334], dtype=np.int64)
+_DAYS_IN_MONTH = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int64)
+
+
+# ───────── dates ─────────
+def _is_leap(y: np.ndarray) -> np.ndarray:
+    return (y % 4 == 0) & ((y % 100 != 0) | (y % 400 == 0))
+
+
+def _ordinals(y: np.ndarray, m: np.ndarray, d: np.ndarray) -> np.ndarray:
+    """date(y, m, d).toordinal() for arrays of valid year/month/day components."""
+    y1 = y - 1
+    return y1 * 365 + y1 // 4 - y1 // 100 + y1 // 400 + _DAYS_BEFORE_MONTH[m] + ((m > 2) & _is_leap(y)) + d
+
+
+def _scalar_ordinal(value: str) -> int:
+    """calculate_experience_years' own parsing, for strings outside the fast paths (-1 if it would skip)."""
+    try:
+        parsed = datetime.strptime(value, "%Y-%m-%d").date() if "-" in value else datetime(int(value), 1, 1).date()
+    except Exception:
+        return -1
+    return parsed.toordinal()
+
+
+def _per_distinct(values: pd.Series, fn) -> np.ndarray:
+    """Apply a column function to the distinct values only and broadcast back (columns repeat heavily)."""
+    codes, uniques = pd.factorize(values)
+    return np.asarray(fn(pd.Series(uniques, dtype=object)))[codes]
+
+
+def parse_dates(values: pd.Series) -> np.ndarray:
+    """
+    Day ordinals for a Series of date strings, -1 where calculate_experience_years
+    would skip the row. Each distinct string is parsed once: YYYY-MM-DD and
+    YYYY column-wise, anything else through the scalar parser.
+    """
+    return _per_distinct(values, _parse_distinct_dates).astype(np.int64)
+
+
+def _parse_distinct_dates(values: pd.Series) -> np.ndarray:
+    out = np.full(len(values), -1, dtype=np.int64)
+
+    iso = values.str.fullmatch(_ISO_DATE).to_numpy(dtype=bool)
+    if iso.any():
+        parts = values[iso]
+        y = parts.str.slice(0, 4).astype(np.int64).to_numpy()
+        m = parts.str.slice(5, 7).astype(np.int64).to_numpy()
+        d = parts.str.slice(8, 10).astype(np.int64).to_numpy()
+        valid = (y >= 1) & (m >= 1) & (m <= 12)
+        month_days = _DAYS_IN_MONTH[np.where(valid, m, 0)] + ((m == 2) & _is_leap(y))
+        valid &= (d >= 1) & (d <= month_days)
+        out[np.flatnonzero(iso)[valid]] = _ordinals(y[valid], m[valid], d[valid])
+
+    year = values.str.fullmatch(_YEAR).to_numpy(dtype=bool)
+    if year.any():
+        y = values[year].astype(np.int64).to_numpy()
+        valid = y >= 1
+        ones = np.ones(int(valid.sum()), dtype=np.int64)
+        out[np.flatnonzero(year)[valid]] = _ordinals(y[valid], ones, ones)
+
+    other = ~(iso | year) & (values != "").to_numpy(dtype=bool)
+    if other.any():
+        out[other] = values[other].map(_scalar_ordinal).to_numpy(dtype=np.int64)
+    return out
+
+
+# ───────── flattening ─────────
+def _to_float(value) -> float | None:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def _flatten(data, today_iso: str):
+    """
+    Pull the columns the rules need out of one applicant JSON, or return None
+    if its shape is one the columnar path does not model (it is then scored
+    by meets_criteria itself, errors included).
+    """
+    if not isinstance(data, dict):
+        return None
+    personal = data.get("personal", {})
+    salary = data.get("salary", {})
+    experiences = data.get("experience", [])
+    if not isinstance(personal, dict) or not isinstance(salary, dict) or not isinstance(experiences, (list, tuple)):
+        return None
+    location = personal.get("location", "")
+    if not isinstance(location, str):
+        return None
+    try:
+        rate, availability = _to_float(salary.get("preferred_rate", "0")), _to_float(salary.get("availability", "0"))
+    except Exception:
+        return None
+
+    rows = []
+    for exp in experiences:
+        if not isinstance(exp, dict) or not isinstance(exp.get("company", ""), str):
+            return None
+        start = exp.get("start", "")
+        end = exp.get("end", "") or today_iso  # current job → today
+        rows.append((exp.get("company", ""), start if isinstance(start, str) else "", end if isinstance(end, str) else ""))
+    return location, rate, availability, rows
+
+
+class ApplicantFrame:
+    """
+    Columnar view of many applicant JSONs.
+
+        frame = ApplicantFrame([json.loads(c) for c in compressed_jsons])
+        shortlisted = frame.evaluate()  # bool array, same order as the input
+
+    `applicants` holds one row per applicant (country, preferred_rate,
+    availability, salary_valid, experience_days) and `experiences` one row per
+    work experience (applicant, company, start, end, days). Open-ended jobs
+    run to `today` (the build date).
+    """
+
+    def __init__(self, applicants: list, today: date | None = None):
+        today_iso = (today or datetime.today().date()).isoformat()
+        self.size = len(applicants)
+        self.fallback: dict[int, object] = {}
+
+        locations, rates, availabilities, salary_valid = [], [], [], []
+        exp_applicant, companies, starts, ends = [], [], [], []
+        for i, data in enumerate(applicants):
+            flat = _flatten(data, today_iso)
+            if flat is None:
+                self.fallback[i] = data
+                flat = ("", None, None, [])
+            location, rate, availability, rows = flat
+            locations.append(location)
+            rates.append(np.nan if rate is None else rate)
+            availabilities.append(np.nan if availability is None else availability)
+            salary_valid.append(rate is not None and availability is not None)
+            for company, start, end in rows:
+                exp_applicant.append(i)
+                companies.append(company)
+                starts.append(start)
+                ends.append(end)
+
+        start_days = parse_dates(pd.Series(starts, dtype=object))
+        end_days = parse_dates(pd.Series(ends, dtype=object))
+        counted = (start_days >= 0) & (end_days >= 0) & (end_days >= start_days)
+        self.experiences = pd.DataFrame(
+            {
+                "applicant": np.array(exp_applicant, dtype=np.int64),
+                "company": _per_distinct(pd.Series(companies, dtype=object), lambda c: c.str.strip().str.casefold()),
+                "start": start_days,
+                "end": end_days,
+                "days": np.where(counted, end_days - start_days, 0),
+            }
+        )
+
+        # "City, Country" or just "Country"; compared case-folded like RuleSet's lookups
+        countries = pd.Series(
+            _per_distinct(
+                pd.Series(locations, dtype=object),
+                lambda loc: loc.str.rsplit(",", n=1).str[-1].str.strip().str.casefold(),
+            ),
+            dtype=object,
+        )
+        experience_days = self.experiences.groupby("applicant")["days"].sum()
+        self.applicants = pd.DataFrame(
+            {
+                "country": countries,
+                "preferred_rate": np.array(rates, dtype=np.float64),
+                "availability": np.array(availabilities, dtype=np.float64),
+                "salary_valid": np.array(salary_valid, dtype=bool),
+                "experience_days": experience_days.reindex(range(self.size), fill_value=0).to_numpy(dtype=np.int64),
+            }
+        )
+
+    def evaluate(self, rules: RuleSet | dict | None = None) -> np.ndarray:
+        """Boolean array: does each applicant meet `rules` (a RuleSet or config dict; default the current rules)?"""
+        from services.shortlist import meets_criteria  # shortlist imports this module
+
+        rules = as_rules(rules)
+        apps = self.applicants
+        country = apps["country"]
+        location_ok = ((country != "") & country.isin(list(rules.allowed_countries))).to_numpy()
+        salary_ok = (
+            apps["salary_valid"].to_numpy()
+            & ~(apps["preferred_rate"].to_numpy() > rules.max_rate)
+            & ~(apps["availability"].to_numpy() < rules.min_availability)
+        )
+        years_ok = apps["experience_days"].to_numpy() >= rules.min_experience_days
+
+        tier1 = np.zeros(self.size, dtype=bool)
+        exps = self.experiences
+        tier1[exps["applicant"].to_numpy()[exps["company"].isin(list(rules.tier_1_companies)).to_numpy()]] = True
+
+        result = location_ok & salary_ok & (years_ok | tier1)
+        for i, data in self.fallback.items():
+            result[i] = meets_criteria(data, rules)
+        return result
+
+
+def meets_criteria_many(applicants: list, rules: RuleSet | dict | None = None) -> list[bool]:
+    """meets_criteria for a list of applicant JSONs, evaluated column-wise."""
+    return ApplicantFrame(applicants).evaluate(rules).tolist()
@@ -0,0 +1,66 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_PATH = os.path.join(".cache", "state.sqlite3")
+# Re-read a little before the last run started to absorb clock skew with Airtable
+OVERLAP_SECONDS = 60
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def modified_since_formula(since_iso: str, field: str | None = None) -> str:
+    """
+    Airtable formula matching rows modified after `since_iso` (minus the overlap).
+    With `field`, only changes to that field count (LAST_MODIFIED_TIME({field})).
+    """
+    since = datetime.strptime(since_iso, "%Y-%m-%dT%H:%M:%S.000Z") - timedelta(seconds=OVERLAP_SECONDS)
+    target = f"{{{field}}}" if field else ""
+    return f"IS_AFTER(LAST_MODIFIED_TIME({target}), DATETIME_PARSE('{since.strftime('%Y-%m-%dT%H:%M:%S.000Z')}'))"
+
+
+class Watermarks:
+    """High-water marks (ISO timestamps) per pipeline/table, persisted in SQLite."""
+
+    def __init__(self, path: str):
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS watermarks (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def get(self, name: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM watermarks WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, name: str, value: str):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO watermarks (name, value) VALUES (?, ?)", (name, value))
+
+    def reset(self, name: str | None = None):
+        with self._lock:
+            if name is None:
+                self._conn.execute("DELETE FROM watermarks")
+            else:
+                self._conn.execute("DELETE FROM watermarks WHERE name = ?", (name,))
+
+    @contextmanager
+    def advance(self, name: str):
+        """
+        Yield the current watermark (None on the first run) and, if the block
+        finishes without raising, move it to the time the block started.
+        """
+        started = now_iso()
+        yield self.get(name)
+        self.set(name, started)
+
+
+watermarks = Watermarks(os.getenv("STATE_DB_PATH", DEFAULT_PATH))
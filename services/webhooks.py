@@ -0,0 +1,217 @@
+"""
+Airtable webhook ingestion.
+
+Airtable notifies POST /airtable/webhook when the base changes; the change
+itself is fetched from the webhook's payload list, starting at the cursor
+saved after the previous fetch. Rows changed in Personal Details, Work
+Experience and Salary Preferences are mapped back to their Applicant ID,
+and each applicant goes through a Debouncer: it is processed (compress, then
+shortlist and LLM) once its forms have been quiet for WEBHOOK_DEBOUNCE_SECONDS,
+so an applicant filling in three forms costs one run instead of three.
+
+Changes to Applicants and Shortlisted Leads are mostly this service's own
+writes, so they are applied to the replica (when enabled) but do not
+trigger a run.
+"""
+
+import os
+import hmac
+import base64
+import asyncio
+import hashlib
+import traceback
+from dotenv import load_dotenv
+from services.airtable_async import aapi, atable
+from services.replica import replica, applicant_key
+from services.watermarks import watermarks
+from dictionaries.constants import (
+    BASE_ID,
+    FIELD_NAMES_TO_IDS,
+    TABLE_APPLICANTS_ID,
+    TABLE_PERSONAL_ID,
+    TABLE_WORK_ID,
+    TABLE_SALARY_ID,
+)
+
+load_dotenv()
+
+DEBOUNCE_SECONDS = float(os.getenv("WEBHOOK_DEBOUNCE_SECONDS", "10"))
+MAX_DELAY_SECONDS = float(os.getenv("WEBHOOK_MAX_DELAY_SECONDS", "60"))  # process even if edits keep coming
+WEBHOOK_SECRET = os.getenv("AIRTABLE_WEBHOOK_SECRET", "")  # macSecretBase64 from webhook creation
+CHILD_TABLES = {
+    TABLE_PERSONAL_ID: "Personal Details",
+    TABLE_WORK_ID: "Work Experience",
+    TABLE_SALARY_ID: "Salary Preferences",
+}
+
+
+def verify_signature(body: bytes, header: str | None, secret: str = WEBHOOK_SECRET) -> bool:
+    """Check X-Airtable-Content-MAC (HMAC-SHA256 of the body); always true when no secret is configured."""
+    if not secret:
+        return True
+    expected = "hmac-sha256=" + hmac.new(base64.b64decode(secret), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, header or "")
+
+
+async def applicants_in_payload(payload: dict) -> set[str]:
+    """
+    Applicant IDs whose child rows one webhook payload changed. With the
+    replica loaded the payload is applied to it (every table) and it supplies
+    the mapping, deletions included. Without it the Applicant ID comes from
+    the payload's cell values (webhooks created with includeCellValuesInFieldIds
+    on the Applicant ID fields carry it) or from reading the row; deleted rows
+    cannot be mapped then.
+    """
+    applicants = set()
+    for table_id, change in (payload.get("changedTablesById") or {}).items():
+        if replica.ready:
+            touched = await replica.apply_payload({"changedTablesById": {table_id: change}})
+            if table_id in CHILD_TABLES:
+                applicants |= touched
+            continue
+        if table_id not in CHILD_TABLES:
+            continue
+        field_id = FIELD_NAMES_TO_IDS[CHILD_TABLES[table_id]]["Applicant ID"]
+        records = {rec_id: [created] for rec_id, created in (change.get("createdRecordsById") or {}).items()}
+        for rec_id, changed in (change.get("changedRecordsById") or {}).items():
+            records[rec_id] = [changed.get(part) or {} for part in ("current", "unchanged", "previous")]
+        for rec_id, parts in records.items():
+            values = [applicant_key((part.get("cellValuesByFieldId") or {}).get(field_id)) for part in parts]
+            app_id = next((value for value in values if value), None)
+            if app_id is None:
+                try:
+                    rec = await atable(table_id).get(rec_id)
+                except Exception:
+                    continue  # deleted again since the change
+                app_id = applicant_key(rec.get("fields", {}).get("Applicant ID"))
+            if app_id:
+                applicants.add(app_id)
+    return applicants
+
+
+async def applicant_record_id(applicant_id: str) -> str | None:
+    """The Applicants record id for an Applicant ID (replica first, then Airtable)."""
+    rows = replica.rows_for(TABLE_APPLICANTS_ID, applicant_id)
+    if rows is None:
+        AP = FIELD_NAMES_TO_IDS["Applicants"]
+        rows = await atable(TABLE_APPLICANTS_ID).all(formula=f"{{{AP['Applicant ID']}}}='{applicant_id}'", max_records=1)
+    return rows[0]["id"] if rows else None
+
+
+class Debouncer:
+    """
+    Runs `action(key)` once per burst of touch(key) calls: `window` seconds
+    after the last touch, or `max_delay` seconds after the first, whichever
+    comes first. A touch that arrives while the action is running starts a new
+    burst.
+    """
+
+    def __init__(self, action, window: float = DEBOUNCE_SECONDS, max_delay: float = MAX_DELAY_SECONDS):
+        self.action = action
+        self.window = window
+        self.max_delay = max_delay
+        self._due: dict[str, float] = {}
+        self._deadline: dict[str, float] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self.touches = 0
+        self.runs = 0
+
+    def touch(self, key: str):
+        now = asyncio.get_running_loop().time()
+        self.touches += 1
+        self._due[key] = now + self.window
+        self._deadline.setdefault(key, now + self.max_delay)
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.ensure_future(self._wait(key))
+
+    async def _wait(self, key: str):
+        loop = asyncio.get_running_loop()
+        while (delay := min(self._due[key], self._deadline[key]) - loop.time()) > 0:
+            await asyncio.sleep(delay)
+        await self._run(key)
+
+    async def _run(self, key: str):
+        del self._due[key], self._deadline[key], self._tasks[key]
+        self.runs += 1
+        try:
+            await self.action(key)
+        except Exception:
+            traceback.print_exc()
+
+    def pending(self) -> list[str]:
+        return sorted(self._tasks)
+
+    async def flush(self):
+        """Run every pending action now (e.g. on shutdown, so no burst is dropped)."""
+        for key in self.pending():
+            task = self._tasks.get(key)
+            if task is not None and key in self._due:
+                task.cancel()
+                await self._run(key)
+
+
+class WebhookIngestor:
+    """
+    Turns webhook notifications into debounced per-applicant runs.
+
+    notify() starts draining the webhook's payloads unless a drain is already
+    running, in which case that drain goes round once more. The payload
+    cursor is saved in the watermarks table after each page, once the page's
+    applicants have been handed to the debouncer.
+    """
+
+    def __init__(
+        self, action, window: float = DEBOUNCE_SECONDS, max_delay: float = MAX_DELAY_SECONDS, base_id: str = BASE_ID
+    ):
+        self.debouncer = Debouncer(action, window, max_delay)
+        self.base_id = base_id
+        self._drains: dict[str, asyncio.Task] = {}
+        self._again: set[str] = set()
+
+    def notify(self, webhook_id: str):
+        drain = self._drains.get(webhook_id)
+        if drain is not None and not drain.done():
+            self._again.add(webhook_id)
+            return
+        self._drains[webhook_id] = asyncio.ensure_future(self._drain(webhook_id))
+
+    async def _drain(self, webhook_id: str):
+        while True:
+            self._again.discard(webhook_id)
+            try:
+                await self.ingest(webhook_id)
+            except Exception:
+                traceback.print_exc()
+            if webhook_id not in self._again:
+                return
+
+    async def ingest(self, webhook_id: str) -> set[str]:
+        """Fetch every payload after the saved cursor and debounce the applicants they touch."""
+        key = f"webhook:{self.base_id}:{webhook_id}"
+        saved = watermarks.get(key)
+        cursor = int(saved) if saved else None  # Airtable payload cursors are integers
+        applicants = set()
+        while True:
+            page = await aapi.webhook_payloads(self.base_id, webhook_id, cursor)
+            for payload in page.get("payloads") or []:
+                for applicant_id in sorted(await applicants_in_payload(payload)):
+                    applicants.add(applicant_id)
+                    self.debouncer.touch(applicant_id)
+            cursor = page.get("cursor", cursor)
+            if cursor is not None:
+                watermarks.set(key, str(cursor))
+            if not page.get("mightHaveMore"):
+                return applicants
+
+    async def aclose(self):
+        for drain in list(self._drains.values()):
+            if not drain.done():
+                await drain
+        await self.debouncer.flush()
+
+    def snapshot(self) -> dict:
+        return {
+            "pending_applicants": len(self.debouncer.pending()),
+            "changes_coalesced": self.debouncer.touches - self.debouncer.runs - len(self.debouncer.pending()),
+            "runs": self.debouncer.runs,
+        }
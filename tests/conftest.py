@@ -0,0 +1,39 @@
+import pytest
+from services import llm_evaluator, compressor, decompression, shortlist, webhooks
+from services.llm_cache import LLMCache
+from services.watermarks import Watermarks
+from services.circuit_breaker import CircuitBreaker
+from services.reevaluation import ReevaluationQueue
+
+
+@pytest.fixture(autouse=True)
+def isolated_llm_cache(monkeypatch):
+    """Give every test an empty in-memory LLM cache so results never leak between tests."""
+    cache = LLMCache(":memory:")
+    monkeypatch.setattr(llm_evaluator, "cache", cache)
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_watermarks(monkeypatch):
+    """Keep incremental-run watermarks in memory instead of the on-disk state DB."""
+    marks = Watermarks(":memory:")
+    for module in (compressor, decompression, shortlist, webhooks):
+        monkeypatch.setattr(module, "watermarks", marks)
+    return marks
+
+
+@pytest.fixture(autouse=True)
+def isolated_llm_breaker(monkeypatch):
+    """A fresh, closed circuit breaker per test so failures in one test cannot open it for the next."""
+    breaker = CircuitBreaker("openai", failure_threshold=5, reset_seconds=30)
+    monkeypatch.setattr(llm_evaluator, "breaker", breaker)
+    return breaker
+
+
+@pytest.fixture(autouse=True)
+def isolated_reevaluation_queue(monkeypatch):
+    """Keep the LLM re-evaluation queue in memory."""
+    queue = ReevaluationQueue(":memory:")
+    monkeypatch.setattr(shortlist, "reevaluation_queue", queue)
+    return queue
@@ -0,0 +1,743 @@
+"""
+In-process stand-ins for Airtable and OpenAI, used by the end-to-end tests and
+by benchmarks/run_benchmarks.py.
+
+FakeAirtable is a requests transport adapter: mounted on the shared Api's
+session it answers the real REST calls pyairtable makes (list with formulas,
+pagination and the POST listRecords fallback, get, single and 10-record batch
+create/update/delete), so the rate limiter, BatchWriter and services all run
+unmodified; async_transport() serves the same base to the httpx client in
+services.airtable_async. It can add per-request latency and inject 429s, and
+counts calls per table.
+"""
+
+import re
+import json
+import time
+import asyncio
+import random
+import hashlib
+import itertools
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, parse_qs, unquote
+import httpx
+import requests
+from requests.adapters import BaseAdapter
+from dictionaries.constants import (
+    FIELD_NAMES_TO_IDS,
+    TABLE_APPLICANTS_ID,
+    TABLE_PERSONAL_ID,
+    TABLE_WORK_ID,
+    TABLE_SALARY_ID,
+    TABLE_SHORTLIST_ID,
+)
+
+AIRTABLE_URL = "https://api.airtable.com/"
+TABLE_NAMES = {
+    TABLE_APPLICANTS_ID: "Applicants",
+    TABLE_PERSONAL_ID: "Personal Details",
+    TABLE_WORK_ID: "Work Experience",
+    TABLE_SALARY_ID: "Salary Preferences",
+    TABLE_SHORTLIST_ID: "Shortlisted Leads",
+}
+PAGE_SIZE = 100  # Airtable's maximum page size
+BATCH_LIMIT = 10  # records per batch create/update/delete
+
+
+class AirtableError(Exception):
+    def __init__(self, status: int, error_type: str, message: str = ""):
+        super().__init__(message or error_type)
+        self.status = status
+        self.error_type = error_type
+
+
+# ───────── formulas ─────────
+_TOKEN_RE = re.compile(
+    r"\s*(?:(?P<field>\{[^}]*\})|(?P<string>'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")"
+    r"|(?P<number>\d+(?:\.\d+)?)|(?P<name>[A-Za-z_][A-Za-z0-9_]*)|(?P<op><=|>=|!=|[=<>&(),]))"
+)
+
+
+def _tokenize(formula: str) -> list[tuple[str, str]]:
+    tokens, pos = [], 0
+    formula = formula.strip()
+    while pos < len(formula):
+        match = _TOKEN_RE.match(formula, pos)
+        if not match or match.end() == pos:
+            raise AirtableError(422, "INVALID_FILTER_BY_FORMULA", f"Cannot parse formula at: {formula[pos:]!r}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        pos = match.end()
+    return tokens
+
+
+def _parse_datetime(value) -> datetime | None:
+    if isinstance(value, datetime):
+        return value
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, list):
+        return ", ".join(_text(v) for v in value)
+    return str(value)
+
+
+def _compare(op: str, left, right) -> bool:
+    if isinstance(left, (int, float)) or isinstance(right, (int, float)):
+        try:
+            left, right = float(left or 0), float(right or 0)
+        except (TypeError, ValueError):
+            left, right = _text(left), _text(right)
+    else:
+        left, right = _text(left), _text(right)
+    return {
+        "=": left == right,
+        "!=": left != right,
+        "<": left < right,
+        ">": left > right,
+        "<=": left <= right,
+        ">=": left >= right,
+    }[op]
+
+
+class _Formula:
+    """
+    Recursive-descent evaluator for the subset of Airtable's formula language
+    the services use: {field} references (by name or field ID), string and
+    number literals, comparisons, & and AND/OR/NOT/IF, LAST_MODIFIED_TIME,
+    DATETIME_PARSE, IS_AFTER/IS_BEFORE, RECORD_ID and a few text helpers.
+    """
+
+    def __init__(self, formula: str, resolve_field):
+        self.tokens = _tokenize(formula)
+        self.resolve_field = resolve_field
+        self.pos = 0
+
+    def evaluate(self, record: dict, modified: dict):
+        self.pos = 0
+        self.record, self.modified = record, modified
+        value = self._expr()
+        if self.pos != len(self.tokens):
+            raise AirtableError(422, "INVALID_FILTER_BY_FORMULA", "Unexpected trailing tokens")
+        return value
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def _take(self, value=None):
+        kind, text = self._peek()
+        if kind is None or (value is not None and text != value):
+            raise AirtableError(422, "INVALID_FILTER_BY_FORMULA", f"Expected {value!r}")
+        self.pos += 1
+        return kind, text
+
+    def _expr(self):
+        left = self._concat()
+        kind, text = self._peek()
+        if kind == "op" and text in ("=", "!=", "<", ">", "<=", ">="):
+            self.pos += 1
+            return _compare(text, left, self._concat())
+        return left
+
+    def _concat(self):
+        value = self._term()
+        while self._peek() == ("op", "&"):
+            self.pos += 1
+            value = _text(value) + _text(self._term())
+        return value
+
+    def _term(self):
+        kind, text = self._take()
+        if kind == "string":
+            return text[1:-1].replace("\\'", "'").replace('\\"', '"')
+        if kind == "number":
+            return float(text) if "." in text else int(text)
+        if kind == "field":
+            name = self.resolve_field(text[1:-1])
+            return self.record["fields"].get(name)
+        if kind == "op" and text == "(":
+            value = self._expr()
+            self._take(")")
+            return value
+        if kind == "name":
+            self._take("(")
+            args = []
+            if self._peek() != ("op", ")"):
+                args.append(self._arg(text))
+                while self._peek() == ("op", ","):
+                    self.pos += 1
+                    args.append(self._arg(text))
+            self._take(")")
+            return self._call(text.upper(), args)
+        raise AirtableError(422, "INVALID_FILTER_BY_FORMULA", f"Unexpected token {text!r}")
+
+    def _arg(self, function: str):
+        # LAST_MODIFIED_TIME takes field references, not field values
+        kind, text = self._peek()
+        if function.upper() == "LAST_MODIFIED_TIME" and kind == "field":
+            self.pos += 1
+            return ("field", self.resolve_field(text[1:-1]))
+        return self._expr()
+
+    def _call(self, name: str, args: list):
+        if name == "AND":
+            return all(bool(a) for a in args)
+        if name == "OR":
+            return any(bool(a) for a in args)
+        if name == "NOT":
+            return not args[0]
+        if name == "IF":
+            return args[1] if args[0] else (args[2] if len(args) > 2 else None)
+        if name in ("TRUE", "FALSE"):
+            return name == "TRUE"
+        if name == "BLANK":
+            return None
+        if name == "RECORD_ID":
+            return self.record["id"]
+        if name == "LAST_MODIFIED_TIME":
+            fields = [a[1] for a in args if isinstance(a, tuple)]
+            times = [self.modified[f] for f in fields if f in self.modified] if fields else list(self.modified.values())
+            return max(times) if times else _parse_datetime(self.record["createdTime"])
+        if name == "DATETIME_PARSE":
+            return _parse_datetime(args[0])
+        if name in ("IS_AFTER", "IS_BEFORE"):
+            left, right = _parse_datetime(args[0]), _parse_datetime(args[1])
+            if left is None or right is None:
+                return False
+            return left > right if name == "IS_AFTER" else left < right
+        if name == "LOWER":
+            return _text(args[0]).lower()
+        if name == "UPPER":
+            return _text(args[0]).upper()
+        if name == "TRIM":
+            return _text(args[0]).strip()
+        if name == "LEN":
+            return len(_text(args[0]))
+        raise AirtableError(422, "INVALID_FILTER_BY_FORMULA", f"Unsupported function {name}()")
+
+
+# ───────── fake Airtable ─────────
+class FakeAirtable(BaseAdapter):
+    """
+    In-memory Airtable base served through requests.
+
+        fake = FakeAirtable(latency=0.02, rate_limit_every=50)
+        with fake.installed(api):
+            compress_all_applicants()
+        fake.calls  # Counter({("Applicants", "list"): 2, ...})
+
+    latency/jitter are seconds added to every request; rate_limit_every=N makes
+    every Nth request a 429 and rate_limit_probability does the same at random
+    (seeded). Rejected requests carry a Retry-After of `retry_after` seconds.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        rate_limit_every: int | None = None,
+        rate_limit_probability: float = 0.0,
+        retry_after: float = 0.01,
+        seed: int = 0,
+    ):
+        super().__init__()
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_every = rate_limit_every
+        self.rate_limit_probability = rate_limit_probability
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.tables: dict[str, dict[str, dict]] = {name: {} for name in TABLE_NAMES.values()}
+        self._modified: dict[str, dict] = {}  # record id → {field name: datetime}
+        self.calls: Counter = Counter()
+        self.requests = 0
+        self.rate_limited = 0
+
+    # ── schema ──
+    @staticmethod
+    def table_name(table: str) -> str:
+        return TABLE_NAMES.get(table, unquote(table))
+
+    @staticmethod
+    def field_name(table: str, field: str) -> str:
+        for name, field_id in FIELD_NAMES_TO_IDS.get(table, {}).items():
+            if field == field_id:
+                return name
+        if field.startswith("fld"):
+            raise AirtableError(422, "UNKNOWN_FIELD_NAME", f"Unknown field {field} in {table}")
+        return field
+
+    # ── direct data access (seeding / assertions; no HTTP, not counted) ──
+    def insert(self, table: str, fields: dict) -> dict:
+        """Add a row without going through HTTP; `fields` may use names or field IDs."""
+        with self._lock:
+            return self._create(self.table_name(table), fields)
+
+    def rows(self, table: str) -> list[dict]:
+        with self._lock:
+            return [json.loads(json.dumps(r)) for r in self.tables[self.table_name(table)].values()]
+
+    def reset_counters(self):
+        with self._lock:
+            self.calls.clear()
+            self.requests = 0
+            self.rate_limited = 0
+
+    def calls_by_table(self) -> dict[str, int]:
+        totals: Counter = Counter()
+        for (table, _op), count in self.calls.items():
+            totals[table] += count
+        return dict(totals)
+
+    @contextmanager
+    def installed(self, api):
+        """Route `api`'s HTTP traffic to this fake for the duration of the block."""
+        session = api.session
+        previous = session.adapters.get(AIRTABLE_URL)
+        session.mount(AIRTABLE_URL, self)
+        try:
+            yield self
+        finally:
+            if previous is not None:
+                session.mount(AIRTABLE_URL, previous)
+            else:
+                session.adapters.pop(AIRTABLE_URL, None)
+
+    # ── requests adapter ──
+    def send(self, request, **kwargs):
+        delay = self._delay()
+        if delay > 0:
+            time.sleep(delay)
+        status, body, headers = self._serve(request)
+        return self._response(request, status, body, headers)
+
+    def _delay(self) -> float:
+        return self.latency + (self._rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+
+    def _serve(self, request) -> tuple[int, dict, dict | None]:
+        """Count, maybe throttle, and answer one request (anything with .method, .url and .body)."""
+        with self._lock:
+            self.requests += 1
+            throttled = (self.rate_limit_every and self.requests % self.rate_limit_every == 0) or (
+                self.rate_limit_probability and self._rng.random() < self.rate_limit_probability
+            )
+            if throttled:
+                self.rate_limited += 1
+                return 429, {"errors": [{"error": "RATE_LIMIT_REACHED"}]}, {"Retry-After": str(self.retry_after)}
+            try:
+                status, body = self._dispatch(request)
+            except AirtableError as e:
+                status, body = e.status, {"error": {"type": e.error_type, "message": str(e)}}
+        return status, body, None
+
+    def async_transport(self) -> "FakeAsyncTransport":
+        return FakeAsyncTransport(self)
+
+    @contextmanager
+    def installed_async(self, client):
+        """Route an airtable_async.AsyncAirtable's traffic to this fake for the duration of the block."""
+        previous = client.transport
+        client.use_transport(self.async_transport())
+        try:
+            yield self
+        finally:
+            client.use_transport(previous)
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def _response(request, status: int, body, headers: dict | None = None):
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode()
+        response.headers.update({"Content-Type": "application/json", **(headers or {})})
+        response.url = request.url
+        response.request = request
+        response.reason = {200: "OK", 404: "Not Found", 422: "Unprocessable Entity", 429: "Too Many Requests"}.get(status, "")
+        return response
+
+    def _dispatch(self, request):
+        url = urlsplit(request.url)
+        parts = [unquote(p) for p in url.path.split("/") if p]
+        if len(parts) < 3 or parts[0] != "v0":
+            raise AirtableError(404, "NOT_FOUND", url.path)
+        table = self.table_name(parts[2])
+        if table not in self.tables:
+            raise AirtableError(404, "TABLE_NOT_FOUND", table)
+        query = parse_qs(url.query)
+        body = json.loads(request.body) if request.body else {}
+        method = request.method.upper()
+        rest = parts[3:]
+        by_id = bool(body.get("returnFieldsByFieldId"))
+
+        if rest == ["listRecords"] and method == "POST":
+            self.calls[(table, "list")] += 1
+            return 200, self._list(table, body)
+        if not rest and method == "GET":
+            self.calls[(table, "list")] += 1
+            options = {
+                "filterByFormula": query.get("filterByFormula", [None])[0],
+                "fields": query.get("fields[]"),
+                "maxRecords": query.get("maxRecords", [None])[0],
+                "pageSize": query.get("pageSize", [None])[0],
+                "offset": query.get("offset", [None])[0],
+                "returnFieldsByFieldId": query.get("returnFieldsByFieldId", ["false"])[0],
+                "sort": [
+                    {"field": query[f"sort[{i}][field]"][0], "direction": query.get(f"sort[{i}][direction]", ["asc"])[0]}
+                    for i in range(len(query))
+                    if f"sort[{i}][field]" in query
+                ],
+            }
+            return 200, self._list(table, options)
+        if len(rest) == 1 and method == "GET":
+            self.calls[(table, "get")] += 1
+            by_id = query.get("returnFieldsByFieldId", ["0"])[0].lower() in ("1", "true")
+            return 200, self._out(table, self._record(table, rest[0]), by_id=by_id)
+        if not rest and method == "POST":
+            self.calls[(table, "create")] += 1
+            if "records" in body:
+                records = self._batch(body["records"])
+                return 200, {"records": [self._out(table, self._create(table, r["fields"]), by_id=by_id) for r in records]}
+            return 200, self._out(table, self._create(table, body["fields"]), by_id=by_id)
+        if method in ("PATCH", "PUT"):
+            self.calls[(table, "update")] += 1
+            if rest:
+                return 200, self._out(table, self._update(table, rest[0], body["fields"], method == "PUT"), by_id=by_id)
+            records = self._batch(body["records"])
+            updated = [self._update(table, r["id"], r["fields"], method == "PUT") for r in records]
+            return 200, {"records": [self._out(table, r, by_id=by_id) for r in updated]}
+        if method == "DELETE":
+            self.calls[(table, "delete")] += 1
+            if rest:
+                self._delete(table, rest[0])
+                return 200, {"id": rest[0], "deleted": True}
+            ids = self._batch(query.get("records[]", []))
+            for rec_id in ids:
+                self._delete(table, rec_id)
+            return 200, {"records": [{"id": rec_id, "deleted": True} for rec_id in ids]}
+        raise AirtableError(404, "NOT_FOUND", f"{method} {url.path}")
+
+    # ── operations (called with the lock held) ──
+    @staticmethod
+    def _batch(items: list) -> list:
+        if len(items) > BATCH_LIMIT:
+            raise AirtableError(422, "INVALID_RECORDS", f"At most {BATCH_LIMIT} records per request")
+        return items
+
+    def _record(self, table: str, rec_id: str) -> dict:
+        record = self.tables[table].get(rec_id)
+        if record is None:
+            raise AirtableError(404, "NOT_FOUND", rec_id)
+        return record
+
+    def _write_fields(self, table: str, record: dict, fields: dict, replace: bool = False):
+        now = datetime.now(timezone.utc)
+        if replace:
+            record["fields"] = {}
+        for key, value in fields.items():
+            name = self.field_name(table, key)
+            if value in (None, "", []):
+                record["fields"].pop(name, None)  # Airtable does not store empty cells
+            else:
+                record["fields"][name] = value
+            self._modified[record["id"]][name] = now
+
+    def _create(self, table: str, fields: dict) -> dict:
+        rec_id = f"rec{next(self._ids):014d}"
+        record = {"id": rec_id, "createdTime": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z"), "fields": {}}
+        self._modified[rec_id] = {}
+        self._write_fields(table, record, fields)
+        self.tables[table][rec_id] = record
+        return record
+
+    def _update(self, table: str, rec_id: str, fields: dict, replace: bool = False) -> dict:
+        record = self._record(table, rec_id)
+        self._write_fields(table, record, fields, replace)
+        return record
+
+    def _delete(self, table: str, rec_id: str):
+        self._record(table, rec_id)
+        del self.tables[table][rec_id]
+        self._modified.pop(rec_id, None)
+
+    def _list(self, table: str, options: dict) -> dict:
+        records = list(self.tables[table].values())
+        if options.get("filterByFormula"):
+            formula = _Formula(options["filterByFormula"], lambda f: self.field_name(table, f))
+            records = [r for r in records if formula.evaluate(r, self._modified[r["id"]])]
+        for key in reversed(options.get("sort") or []):
+            name = self.field_name(table, key["field"])
+            records.sort(key=lambda r: str(r["fields"].get(name, "")), reverse=key.get("direction") == "desc")
+        if options.get("maxRecords"):
+            records = records[: int(options["maxRecords"])]
+        start = int(options.get("offset") or 0)
+        page_size = min(int(options.get("pageSize") or PAGE_SIZE), PAGE_SIZE)
+        page = records[start : start + page_size]
+        by_id = str(options.get("returnFieldsByFieldId")).lower() in ("1", "true")
+        fields = [self.field_name(table, f) for f in options["fields"]] if options.get("fields") else None
+        result = {"records": [self._out(table, r, fields, by_id) for r in page]}
+        if start + page_size < len(records):
+            result["offset"] = str(start + page_size)
+        return result
+
+    @staticmethod
+    def _out(table: str, record: dict, fields: list | None = None, by_id: bool = False) -> dict:
+        ids = FIELD_NAMES_TO_IDS.get(table, {})
+        out = {}
+        for name, value in record["fields"].items():
+            if fields is None or name in fields:
+                out[ids.get(name, name) if by_id else name] = json.loads(json.dumps(value))
+        return {"id": record["id"], "createdTime": record["createdTime"], "fields": out}
+
+
+# ───────── fake OpenAI ─────────
+class FakeAsyncTransport(httpx.AsyncBaseTransport):
+    """The FakeAirtable base served to httpx.AsyncClient; latency is awaited, not slept."""
+
+    def __init__(self, fake: FakeAirtable):
+        self.fake = fake
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        delay = self.fake._delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        content = await request.aread()
+        shim = _Obj(method=request.method, url=str(request.url), body=content or None)
+        status, body, headers = self.fake._serve(shim)
+        return httpx.Response(status, json=body, headers=headers, request=request)
+
+
+class _FakeResponse:
+    def __init__(self, output_text: str, input_tokens: int = 0):
+        self.output_text = output_text
+        self.usage = _Obj(input_tokens=input_tokens, output_tokens=len(output_text) // 4)
+
+
+class _Obj:
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+
+class _FakeFiles:
+    """client.files: upload (create) and download (content) of JSONL files."""
+
+    def __init__(self, owner: "FakeLLMClient"):
+        self._owner = owner
+        self.data: dict[str, str] = {}
+
+    def create(self, file, purpose: str, **kwargs):
+        file_id = f"file-{len(self.data) + 1}"
+        content = file.read()
+        self.data[file_id] = content.decode() if isinstance(content, bytes) else content
+        return _Obj(id=file_id, purpose=purpose)
+
+    def content(self, file_id: str):
+        return _Obj(text=self.data[file_id])
+
+
+class _FakeBatches:
+    """
+    client.batches: a batch reports "in_progress" until it has been retrieved
+    `polls_to_complete` times, then answers every request line at once.
+    """
+
+    def __init__(self, owner: "FakeLLMClient"):
+        self._owner = owner
+        self.batches: dict[str, dict] = {}
+        self.polls_to_complete = 2
+        self.final_status = "completed"
+
+    def _view(self, batch: dict):
+        return _Obj(**batch)
+
+    def create(self, input_file_id: str, endpoint: str, completion_window: str, metadata=None, **kwargs):
+        batch_id = f"batch_{len(self.batches) + 1}"
+        self.batches[batch_id] = {
+            "id": batch_id,
+            "status": "validating",
+            "input_file_id": input_file_id,
+            "endpoint": endpoint,
+            "output_file_id": None,
+            "polls": 0,
+        }
+        return self._view(self.batches[batch_id])
+
+    def cancel(self, batch_id: str):
+        self.batches[batch_id]["status"] = "cancelled"
+        return self._view(self.batches[batch_id])
+
+    def retrieve(self, batch_id: str):
+        batch = self.batches[batch_id]
+        batch["polls"] += 1
+        if batch["status"] in ("validating", "in_progress"):
+            batch["status"] = "in_progress"
+            if batch["polls"] >= self.polls_to_complete:
+                self._finish(batch)
+        return self._view(batch)
+
+    def _finish(self, batch: dict):
+        owner, files = self._owner, self._owner.files
+        out = []
+        for line in files.data[batch["input_file_id"]].splitlines():
+            request = json.loads(line)
+            with owner._lock:
+                owner.batch_requests += 1
+                call = owner.batch_requests
+            if owner.fail_every and call % owner.fail_every == 0:
+                out.append({"custom_id": request["custom_id"], "response": None, "error": {"message": "injected failure"}})
+                continue
+            text = json.dumps(owner._evaluation(owner._applicant_from_prompt(request["body"]["input"])))
+            body = {"output": [{"type": "message", "content": [{"type": "output_text", "text": text}]}]}
+            out.append({"custom_id": request["custom_id"], "response": {"status_code": 200, "body": body}, "error": None})
+        output_file_id = f"file-{len(files.data) + 1}"
+        files.data[output_file_id] = "".join(json.dumps(row) + "\n" for row in out)
+        batch["status"] = self.final_status
+        batch["output_file_id"] = output_file_id
+
+
+class FakeLLMClient:
+    """
+    Drop-in for the OpenAI client's `responses.create`, returning a
+    deterministic evaluation after `latency` seconds. Batch prompts (a
+    `{"id":..,"applicant":..}` array) get one result per id; the score depends
+    only on the applicant, so batched and single evaluations agree. Tracks the
+    number of calls and the peak number running at once.
+
+    `files` and `batches` stub the Batch API endpoints; request lines answered
+    through them are counted in `batch_requests`, not `calls`. asynchronous()
+    gives the AsyncOpenAI counterpart, whose latency is awaited.
+    """
+
+    def __init__(self, latency: float = 0.0, fail_every: int | None = None):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.batch_requests = 0
+        self._lock = threading.Lock()
+        self.responses = self
+        self.files = _FakeFiles(self)
+        self.batches = _FakeBatches(self)
+
+    def create(self, model: str, input: str, **kwargs):
+        call = self._enter()
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            return self._reply(call, input)
+        finally:
+            self._exit()
+
+    async def acreate(self, model: str, input: str, **kwargs):
+        call = self._enter()
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return self._reply(call, input)
+        finally:
+            self._exit()
+
+    def asynchronous(self) -> "_Obj":
+        """An AsyncOpenAI stand-in sharing this client's answers and counters."""
+        return _Obj(responses=_Obj(create=self.acreate))
+
+    def _enter(self) -> int:
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            return self.calls
+
+    def _exit(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _reply(self, call: int, input: str) -> _FakeResponse:
+        if self.fail_every and call % self.fail_every == 0:
+            raise RuntimeError("injected LLM failure")
+        batch = next((line.strip() for line in input.splitlines() if line.strip().startswith('[{"id":')), None)
+        if batch is not None:
+            results = [{"id": item["id"], **self._evaluation(item["applicant"])} for item in json.loads(batch)]
+            return _FakeResponse(json.dumps({"results": results}), len(input) // 4)
+        return _FakeResponse(json.dumps(self._evaluation(self._applicant_from_prompt(input))), len(input) // 4)
+
+    @staticmethod
+    def _applicant_from_prompt(prompt: str):
+        return json.loads(prompt.split("Applicant JSON:", 1)[1].split("Data units:", 1)[0].strip())
+
+    @staticmethod
+    def _evaluation(applicant) -> dict:
+        key = json.dumps(applicant, separators=(",", ":")).encode()
+        score = int(hashlib.sha256(key).hexdigest(), 16) % 10 + 1
+        return {"summary": "Fake summary.", "score": score, "issues": "None", "follow_ups": "- None"}
+
+
+# ───────── seeding ─────────
+TIER_1 = ["Google", "Meta", "OpenAI", "Microsoft", "Amazon", "Apple", "Netflix"]
+OTHER_COMPANIES = ["Acme", "Initech", "Globex", "Umbrella", "Hooli"]
+LOCATIONS = ["New York, US", "Toronto, Canada", "London, UK", "Berlin, Germany", "Bangalore, India", "Paris, France"]
+
+
+def seed_applicants(fake: FakeAirtable, n: int, seed: int = 0) -> list[str]:
+    """
+    Fill the fake base with `n` applicants and their child rows (1-4 jobs
+    each, a mix that does and does not meet the shortlist rules). Applicants
+    start with an empty Compressed JSON. Returns the Applicant IDs.
+    """
+    rng = random.Random(seed)
+    applicant_ids = []
+    for i in range(1, n + 1):
+        app_id = f"APP-{i:06d}"
+        applicant_ids.append(app_id)
+        fake.insert("Applicants", {"Applicant ID": app_id})
+        fake.insert(
+            "Personal Details",
+            {
+                "Applicant ID": app_id,
+                "Full Name": f"Applicant {i}",
+                "Email Address": f"applicant{i}@example.com",
+                "Location": rng.choice(LOCATIONS),
+                "LinkedIn Profile": f"https://linkedin.com/in/applicant{i}",
+            },
+        )
+        year = 2024
+        for _ in range(rng.randint(1, 4)):
+            length = rng.randint(1, 4)
+            fake.insert(
+                "Work Experience",
+                {
+                    "Applicant ID": app_id,
+                    "Company": rng.choice(TIER_1 + OTHER_COMPANIES * 2),
+                    "Title": rng.choice(["SWE", "Senior SWE", "Data Scientist", "ML Engineer"]),
+                    "Start": f"{year - length}-01-01",
+                    "End": f"{year}-01-01",
+                    "Technologies": rng.choice(["Python", "Go, Kubernetes", "TypeScript, React", "PyTorch"]),
+                },
+            )
+            year -= length
+        fake.insert(
+            "Salary Preferences",
+            {
+                "Applicant ID": app_id,
+                "Preferred Rate": rng.choice([60, 80, 95, 120, 150]),
+                "Minimum Rate": 50,
+                "Currency": "USD",
+                "Availability (hrs/wk)": rng.choice([10, 20, 30, 40]),
+            },
+        )
+    return applicant_ids
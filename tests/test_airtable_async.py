@@ -0,0 +1,124 @@
+import json
+import time
+import asyncio
+import pytest
+from unittest.mock import patch
+from services import airtable_client, airtable_async, llm_evaluator, compressor, shortlist
+from services.airtable_client import RateLimitedApi
+from dictionaries.constants import BASE_ID, TABLE_WORK_ID, TABLE_SHORTLIST_ID
+from tests.fakes import FakeAirtable, FakeLLMClient, seed_applicants
+
+N = 20
+
+
+def _client(fake: FakeAirtable) -> airtable_async.AsyncAirtable:
+    return airtable_async.AsyncAirtable("key", limiter=RateLimitedApi("key", rate=1000.0), transport=fake.async_transport())
+
+
+@pytest.fixture
+def fake_base(monkeypatch):
+    """Seeded FakeAirtable behind both the sync Api and the shared async client, LLMs faked."""
+    fake = FakeAirtable()
+    seed_applicants(fake, N)
+    monkeypatch.setattr(airtable_client.api, "rate", 1000.0)
+    monkeypatch.setattr(airtable_client.api, "_buckets", {})
+    llm = FakeLLMClient()
+    monkeypatch.setattr(llm_evaluator, "client", llm)
+    monkeypatch.setattr(llm_evaluator, "aclient", llm.asynchronous())
+    with fake.installed(airtable_client.api), fake.installed_async(airtable_async.aapi):
+        yield fake
+
+
+def test_all_follows_pages_and_long_formulas_use_post():
+    fake = FakeAirtable()
+    seed_applicants(fake, N)
+    tbl = _client(fake).table(BASE_ID, TABLE_WORK_ID)
+    total = len(fake.rows("Work Experience"))
+
+    assert len(asyncio.run(tbl.all(page_size=7))) == total
+    assert fake.calls[("Work Experience", "list")] == -(-total // 7)
+    assert len(asyncio.run(tbl.all(page_size=7, max_records=10))) == 10
+
+    ids = [f"APP-{i:06d}" for i in range(1, N + 1)] + [f"APP-X{i:05d}" for i in range(2000)]
+    rows = asyncio.run(tbl.all(formula=airtable_client.applicant_ids_formula(ids)))
+    assert len(rows) == total  # formula too long for a URL: sent as POST listRecords
+
+
+def test_batch_writes_are_chunked():
+    fake = FakeAirtable()
+    tbl = _client(fake).table(BASE_ID, TABLE_SHORTLIST_ID)
+
+    async def scenario():
+        created = await tbl.batch_create([{"Applicant ID": f"APP-{i}"} for i in range(25)])
+        await tbl.batch_update([{"id": r["id"], "fields": {"Score Reason": "ok"}} for r in created])
+        await tbl.batch_delete([r["id"] for r in created[:12]])
+
+    asyncio.run(scenario())
+    assert fake.calls[("Shortlisted Leads", "create")] == 3
+    assert fake.calls[("Shortlisted Leads", "update")] == 3
+    assert fake.calls[("Shortlisted Leads", "delete")] == 2
+    rows = fake.rows("Shortlisted Leads")
+    assert len(rows) == 13 and all(r["fields"]["Score Reason"] == "ok" for r in rows)
+
+
+def test_429_penalizes_the_bucket_shared_with_the_sync_client():
+    fake = FakeAirtable(rate_limit_every=2, retry_after=0.01)
+    limiter = RateLimitedApi("key", rate=1000.0)
+    client = airtable_async.AsyncAirtable("key", limiter=limiter, transport=fake.async_transport())
+    bucket = limiter.bucket_for(BASE_ID)
+    tbl = client.table(BASE_ID, TABLE_SHORTLIST_ID)
+
+    async def scenario():
+        return [await tbl.create({"Applicant ID": f"APP-{i}"}) for i in range(2)]  # the second is throttled
+
+    with patch.object(bucket, "penalize", wraps=bucket.penalize) as penalize:
+        created = asyncio.run(scenario())
+
+    assert [r["fields"]["Applicant ID"] for r in created] == ["APP-0", "APP-1"]
+    penalize.assert_called_once_with(0.01)  # the sync client's requests to this base now wait too
+    assert fake.rate_limited == 1
+
+
+def test_async_webhook_flow_matches_the_sync_sweep(fake_base):
+    app_ids = {r["fields"]["Applicant ID"]: r["id"] for r in fake_base.rows("Applicants")}
+
+    async def webhooks():
+        async def one(applicant_id, rec_id):
+            result = await compressor.compress_one_async(applicant_id, rec_id)
+            return await shortlist.generate_shortlist_one_async(applicant_id, rec_id, compressed_json=result["payload"])
+
+        return await asyncio.gather(*(one(a, r) for a, r in app_ids.items()))
+
+    results = asyncio.run(webhooks())
+    assert all(r["status"] in ("Shortlisted", "Not Shortlisted") for r in results)
+
+    def snapshot(fake):
+        fields = ("Compressed JSON", "Shortlist Status", "LLM Score", "LLM Summary")
+        apps = {r["fields"]["Applicant ID"]: tuple(r["fields"].get(f) for f in fields) for r in fake.rows("Applicants")}
+        leads = {r["fields"]["Applicant ID"]: r["fields"].get("Score Reason") for r in fake.rows("Shortlisted Leads")}
+        return apps, leads
+
+    sync_base = FakeAirtable()
+    seed_applicants(sync_base, N)
+    with sync_base.installed(airtable_client.api):
+        compressor.compress_all_applicants()
+        shortlist.generate_shortlist()
+
+    assert snapshot(fake_base) == snapshot(sync_base)
+    assert snapshot(fake_base)[1]  # some applicants were shortlisted
+
+
+def test_concurrent_webhooks_overlap(fake_base):
+    fake_base.latency = 0.05
+    app_ids = [(r["fields"]["Applicant ID"], r["id"]) for r in fake_base.rows("Applicants")][:10]
+
+    async def webhooks():
+        return await asyncio.gather(*(compressor.compress_one_async(a, r) for a, r in app_ids))
+
+    started = time.perf_counter()
+    results = asyncio.run(webhooks())
+    elapsed = time.perf_counter() - started
+
+    assert all(json.loads(r["payload"])["personal"] for r in results)
+    # each call is two round-trips (lookups in parallel, then the write); run one by one they would take ≥ 1 s
+    assert elapsed < 0.6
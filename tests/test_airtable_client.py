@@ -0,0 +1,52 @@
+import threading
+import time
+from unittest.mock import MagicMock
+import requests
+from services.airtable_client import TokenBucket, RateLimitedApi, BULK, INTERACTIVE, bulk_lane, current_lane
+
+
+def _response(status, headers=None, body='{"records": []}'):
+    resp = requests.Response()
+    resp.status_code = status
+    resp.headers.update(headers or {})
+    resp._content = body.encode()
+    return resp
+
+
+def test_bulk_lane_is_a_context():
+    assert current_lane() == INTERACTIVE
+    with bulk_lane():
+        assert current_lane() == BULK
+    assert current_lane() == INTERACTIVE
+
+
+def test_bucket_limits_burst_and_refills():
+    bucket = TokenBucket(rate=50, burst=2)
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() > 0
+    time.sleep(0.05)
+    assert bucket.try_acquire() == 0.0
+
+
+def test_bulk_yields_to_waiting_interactive_caller():
+    bucket = TokenBucket(rate=20, burst=1)
+    bucket.try_acquire()  # drain
+    order = []
+    bulk = threading.Thread(target=lambda: (bucket.acquire(BULK), order.append(BULK)))
+    bulk.start()
+    time.sleep(0.01)
+    bucket.acquire(INTERACTIVE)
+    order.append(INTERACTIVE)
+    bulk.join()
+    assert order == [INTERACTIVE, BULK]
+
+
+def test_429_penalizes_base_and_retries():
+    api = RateLimitedApi("key", rate=100)
+    api.session.request = MagicMock(side_effect=[_response(429, {"Retry-After": "0.05"}), _response(200)])
+
+    started = time.monotonic()
+    assert api.table("appBASE", "tblX").all() == []
+    assert time.monotonic() - started >= 0.05
+    assert api.session.request.call_count == 2
@@ -0,0 +1,120 @@
+import asyncio
+from services.applicant_locks import ApplicantLocks
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_identical_requests_share_one_run_and_a_later_one_queues_a_follow_up():
+    locks = ApplicantLocks()
+    started, release, runs = asyncio.Event(), None, []
+
+    async def work(applicant_id, rec_id):
+        runs.append(rec_id)
+        started.set()
+        await release.wait()
+        return len(runs)
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        first = asyncio.ensure_future(locks.run("APP-1", work, "APP-1", "rec1"))
+        await started.wait()  # first is running: a new identical request must not reuse its (stale) result
+        burst = [asyncio.ensure_future(locks.run("APP-1", work, "APP-1", "rec1")) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        return await first, await asyncio.gather(*burst)
+
+    first, burst = asyncio.run(scenario())
+    assert first == 1 and burst == [2] * 5  # the burst collapsed into one follow-up run
+    assert locks.runs == 2 and locks.coalesced == 4
+    assert locks.snapshot()["in_flight"] == 0
+
+
+def test_different_work_for_one_applicant_is_serialised():
+    locks = ApplicantLocks()
+    active, peak = 0, 0
+
+    async def step(applicant_id, name):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return name
+
+    async def scenario():
+        return await asyncio.gather(
+            locks.run("APP-1", step, "APP-1", "compress"),
+            locks.run("APP-1", step, "APP-1", "decompress"),
+            locks.run("APP-2", step, "APP-2", "compress"),
+        )
+
+    assert asyncio.run(scenario()) == ["compress", "decompress", "compress"]
+    assert peak == 2  # APP-2 ran alongside APP-1, APP-1's two steps did not overlap
+
+
+def test_errors_reach_every_coalesced_caller():
+    locks = ApplicantLocks()
+
+    async def boom(applicant_id):
+        await asyncio.sleep(0)
+        raise RuntimeError("airtable down")
+
+    async def scenario():
+        return await asyncio.gather(*(locks.run("APP-1", boom, "APP-1") for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert locks.runs == 1
+
+
+def test_idle_and_excess_locks_are_evicted():
+    clock = Clock()
+    locks = ApplicantLocks(max_entries=3, idle_seconds=60, clock=clock)
+
+    async def noop(applicant_id):
+        return applicant_id
+
+    async def touch(*applicant_ids):
+        for applicant_id in applicant_ids:
+            await locks.run(applicant_id, noop, applicant_id)
+
+    asyncio.run(touch("A", "B", "C", "D", "E"))
+    assert list(locks._entries) == ["C", "D", "E"]  # least recently used dropped past max_entries
+
+    clock.now = 30
+    asyncio.run(touch("D"))
+    clock.now = 75
+    asyncio.run(touch("F"))
+    assert list(locks._entries) == ["D", "F"]  # C and E idle for over a minute
+
+
+def test_locks_in_use_are_not_evicted():
+    clock = Clock()
+    locks = ApplicantLocks(max_entries=1, idle_seconds=0, clock=clock)
+
+    async def scenario():
+        holding, release = asyncio.Event(), asyncio.Event()
+
+        async def hold(applicant_id):
+            holding.set()
+            await release.wait()
+
+        async def quick(applicant_id):
+            return applicant_id
+
+        held = asyncio.ensure_future(locks.run("A", hold, "A"))
+        await holding.wait()
+        await locks.run("B", quick, "B")
+        assert "A" in locks._entries
+        release.set()
+        await held
+
+    asyncio.run(scenario())
+    assert len(locks) == 0
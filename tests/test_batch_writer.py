@@ -0,0 +1,73 @@
+import pytest
+from unittest.mock import MagicMock
+from services.batch_writer import BatchWriter
+
+
+def _table():
+    tbl = MagicMock()
+    tbl.batch_create.side_effect = lambda records, typecast=False: [
+        {"id": f"recNEW{i}", "fields": f} for i, f in enumerate(records)
+    ]
+    return tbl
+
+
+def test_updates_to_same_record_are_coalesced_and_batched():
+    tbl = _table()
+    with BatchWriter() as writer:
+        for i in range(25):
+            writer.update(tbl, f"rec{i}", {"a": i}, typecast=True)
+        writer.update(tbl, "rec0", {"b": "x"}, typecast=True)
+
+    tbl.batch_update.assert_called_once()
+    records = tbl.batch_update.call_args.args[0]
+    assert len(records) == 25
+    assert records[0] == {"id": "rec0", "fields": {"a": 0, "b": "x"}}
+    assert writer.stats == {"creates": 0, "updates": 25, "deletes": 0, "calls": 3}
+
+
+def test_update_and_delete_of_pending_create_are_folded():
+    tbl = _table()
+    writer = BatchWriter()
+    kept = writer.create(tbl, {"name": "kept"})
+    dropped = writer.create(tbl, {"name": "dropped"})
+    writer.update(tbl, kept["id"], {"reason": "None"})
+    writer.delete(tbl, dropped["id"])
+    writer.flush()
+
+    tbl.batch_create.assert_called_once_with([{"name": "kept", "reason": "None"}], typecast=False)
+    tbl.batch_update.assert_not_called()
+    tbl.batch_delete.assert_not_called()
+    assert writer.resolved[kept["id"]] == "recNEW0"
+
+
+def test_delete_drops_queued_update():
+    tbl = _table()
+    with BatchWriter() as writer:
+        writer.update(tbl, "rec1", {"a": 1})
+        writer.delete(tbl, "rec1")
+
+    tbl.batch_update.assert_not_called()
+    tbl.batch_delete.assert_called_once_with(["rec1"])
+
+
+def test_failed_call_keeps_its_queue_and_every_unsent_one():
+    failing, other = _table(), _table()
+    failing.batch_update.side_effect = RuntimeError("502")
+    writer = BatchWriter()
+    writer.create(other, {"name": "sent"})
+    writer.update(failing, "rec1", {"a": 1})
+    writer.update(other, "rec2", {"b": 2})
+    writer.delete(other, "rec3")
+
+    with pytest.raises(RuntimeError):
+        writer.flush()
+
+    other.batch_create.assert_called_once()  # sent before the failure: not queued again
+    assert writer.pending() == 3
+    failing.batch_update.side_effect = None
+    writer.flush()
+    assert writer.pending() == 0
+    other.batch_create.assert_called_once()
+    failing.batch_update.assert_called_with([{"id": "rec1", "fields": {"a": 1}}], typecast=False)
+    other.batch_update.assert_called_once_with([{"id": "rec2", "fields": {"b": 2}}], typecast=False)
+    other.batch_delete.assert_called_once_with(["rec3"])
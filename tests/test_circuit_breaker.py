@@ -0,0 +1,59 @@
+import pytest
+from services.circuit_breaker import CircuitBreaker, CircuitOpen, CLOSED, OPEN, HALF_OPEN
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_fails_fast_and_recovers():
+    clock = Clock()
+    breaker = CircuitBreaker("llm", failure_threshold=3, reset_seconds=10, clock=clock)
+    recovered = []
+    breaker.on_close(lambda: recovered.append(clock.now))
+
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    breaker.before_call()
+    breaker.record_success()  # a success resets the consecutive count
+    assert breaker.state == CLOSED and breaker.failures == 0
+
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == OPEN
+    clock.now = 4
+    with pytest.raises(CircuitOpen) as excinfo:
+        breaker.before_call()
+    assert excinfo.value.retry_after == 6
+
+    clock.now = 10
+    breaker.before_call()  # the single trial call
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()  # everyone else still fails fast
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.retry_after() == 10
+
+    clock.now = 20
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert recovered == [20]
+    assert breaker.snapshot() == {"state": "closed", "failures": 0, "retry_after": 0.0}
+
+
+def test_half_open_trial_that_never_reports_is_replaced():
+    clock = Clock()
+    breaker = CircuitBreaker("llm", failure_threshold=1, reset_seconds=5, clock=clock)
+    breaker.record_failure()
+    clock.now = 5
+    breaker.before_call()  # trial starts, caller disappears
+    clock.now = 10
+    breaker.before_call()  # a new trial is allowed
+    assert breaker.state == HALF_OPEN
@@ -0,0 +1,117 @@
+import re
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+from services import compressor
+
+
+PERSONAL_ROWS = [
+    {"id": "recP1", "fields": {"Applicant ID": "APP-1", "Full Name": "John Doe", "Location": "New York, US"}},
+    {"id": "recP2", "fields": {"Applicant ID": "APP-2", "Full Name": "Jane Roe", "Location": "Berlin, Germany"}},
+]
+WORK_ROWS = [
+    {"id": "recW1", "fields": {"Applicant ID": "APP-1", "Company": "Google", "Start": "2018-01-01"}},
+    {"id": "recW2", "fields": {"Applicant ID": "APP-2", "Company": "Meta", "Start": "2019-01-01"}},
+    {"id": "recW3", "fields": {"Applicant ID": "APP-1", "Company": "Meta", "Start": "2015-03-01"}},
+]
+SALARY_ROWS = [
+    {"id": "recS1", "fields": {"Applicant ID": "APP-1", "Preferred Rate": 90, "Availability (hrs/wk)": 40}},
+]
+
+
+def _fake_table(rows):
+    """Table double whose .all() honours {Applicant ID}='X' formulas (alone or inside OR())."""
+    tbl = MagicMock()
+
+    def _all(formula=None, **kwargs):
+        if formula is None:
+            return list(rows)
+        app_ids = set(re.findall(r"'([^']*)'", formula))
+        return [r for r in rows if r["fields"].get("Applicant ID") in app_ids]
+
+    tbl.all.side_effect = _all
+    return tbl
+
+
+@pytest.fixture
+def child_tables():
+    pers, work, sal = _fake_table(PERSONAL_ROWS), _fake_table(WORK_ROWS), _fake_table(SALARY_ROWS)
+    with patch.object(compressor, "tbl_pers", pers), patch.object(compressor, "tbl_work", work), patch.object(
+        compressor, "tbl_sal", sal
+    ):
+        yield pers, work, sal
+
+
+def test_build_json_prefetched_matches_per_applicant_lookup(child_tables):
+    prefetched = compressor.prefetch_children()
+    for app_id in ("APP-1", "APP-2", "APP-404"):
+        assert compressor.build_json(app_id, prefetched=prefetched) == compressor.build_json(app_id)
+
+    j = compressor.build_json("APP-1", prefetched=prefetched)
+    assert [e["company"] for e in j["experience"]] == ["Google", "Meta"]
+    assert j["salary"]["preferred_rate"] == 90
+
+
+def test_compress_all_bulk_scans_each_child_table_once(child_tables):
+    pers, work, sal = child_tables
+    tbl_app = MagicMock()
+    tbl_app.all.return_value = [
+        {"id": "recA1", "fields": {"Applicant ID": "APP-1"}},
+        {"id": "recA2", "fields": {"Applicant ID": "APP-2"}},
+    ]
+    with patch.object(compressor, "tbl_app", tbl_app):
+        assert compressor.compress_all_applicants() == "Compressed 2 applicants (0 unchanged)."
+
+    for tbl in (pers, work, sal):
+        tbl.all.assert_called_once_with()
+    tbl_app.update.assert_not_called()
+    tbl_app.batch_update.assert_called_once()
+    assert [r["id"] for r in tbl_app.batch_update.call_args.args[0]] == ["recA1", "recA2"]
+
+
+def test_compress_incremental_only_touches_changed_applicants(child_tables, isolated_watermarks):
+    pers, work, sal = child_tables
+    for name in compressor.CHILD_TABLES:
+        isolated_watermarks.set(f"compress:{name}", "2025-01-01T00:00:00.000Z")
+
+    # Only APP-2's work row changed since the watermark
+    for tbl, changed in ((pers, []), (work, [WORK_ROWS[1]]), (sal, [])):
+        lookup = tbl.all.side_effect
+        tbl.all.side_effect = lambda formula=None, _lookup=lookup, _changed=changed, **kw: (
+            _changed if formula.startswith("IS_AFTER(LAST_MODIFIED_TIME()") else _lookup(formula=formula)
+        )
+
+    tbl_app = MagicMock()
+    tbl_app.all.return_value = [{"id": "recA2", "fields": {"Applicant ID": "APP-2"}}]
+    with patch.object(compressor, "tbl_app", tbl_app):
+        assert compressor.compress_all_applicants(incremental=True) == "Compressed 1 changed applicants (0 unchanged)."
+
+    tbl_app.all.assert_called_once_with(formula="OR({Applicant ID}='APP-2')")
+    updates = tbl_app.batch_update.call_args.args[0]
+    assert [r["id"] for r in updates] == ["recA2"]
+    assert "Meta" in updates[0]["fields"]["fldDyJ6jT54YE99bs"]
+    assert isolated_watermarks.get("compress:Work Experience") > "2025-01-01T00:00:00.000Z"
+
+
+def test_compress_incremental_first_run_is_full_sweep(child_tables, isolated_watermarks):
+    tbl_app = MagicMock()
+    tbl_app.all.return_value = [{"id": "recA1", "fields": {"Applicant ID": "APP-1"}}]
+    with patch.object(compressor, "tbl_app", tbl_app):
+        assert compressor.compress_all_applicants(incremental=True) == "Compressed 1 applicants (0 unchanged)."
+    assert all(isolated_watermarks.get(f"compress:{name}") for name in compressor.CHILD_TABLES)
+
+
+def test_compress_one_skips_write_when_json_is_unchanged(child_tables):
+    stored = compressor.build_json("APP-1")
+    tbl_app = MagicMock()
+    # Same content, different key order/whitespace than build_json would produce
+    tbl_app.get.return_value = {"id": "recA1", "fields": {"Compressed JSON": json.dumps(stored, sort_keys=True, indent=2)}}
+    with patch.object(compressor, "tbl_app", tbl_app):
+        result = compressor.compress_one("APP-1", "recA1")
+        assert result["unchanged"] is True
+        tbl_app.update.assert_not_called()
+
+        result = compressor.compress_one("APP-1", "recA1", current_json='{"personal": {}}')
+        assert result["unchanged"] is False
+        tbl_app.update.assert_called_once()
+        tbl_app.get.assert_called_once()  # current_json spares the read
@@ -0,0 +1,68 @@
+import pytest
+from unittest.mock import MagicMock
+from services.decompression import _sync_work_experience
+
+
+def _row(rec_id, company, title="SWE", start="2018-01-01", end="2020-01-01", tech="Python"):
+    return {
+        "id": rec_id,
+        "fields": {"Applicant ID": "APP-1", "Company": company, "Title": title, "Start": start, "End": end, "Technologies": tech},
+    }
+
+
+def _exp(company, title="SWE", start="2018-01-01", end="2020-01-01", tech="Python"):
+    return {"company": company, "title": title, "start": start, "end": end, "tech": tech}
+
+
+@pytest.fixture
+def tbl():
+    tbl = MagicMock()
+    tbl.batch_create.side_effect = lambda records, typecast=False: [
+        {"id": f"recNEW{i}", "fields": f} for i, f in enumerate(records)
+    ]
+    return tbl
+
+
+def test_unchanged_history_issues_no_writes(tbl):
+    tbl.all.return_value = [_row("rec1", "Google"), _row("rec2", "Meta", end="")]
+
+    summary = _sync_work_experience(tbl, "APP-1", [_exp("Meta", end=None), _exp("Google")])
+
+    assert summary == {"created": 0, "updated": 0, "deleted": 0, "unchanged": 2}
+    tbl.batch_create.assert_not_called()
+    tbl.batch_update.assert_not_called()
+    tbl.batch_delete.assert_not_called()
+
+
+def test_only_changed_rows_are_written(tbl):
+    tbl.all.return_value = [_row("rec1", "Google"), _row("rec2", "Meta"), _row("rec3", "Amazon")]
+
+    summary = _sync_work_experience(
+        tbl, "APP-1", [_exp("Google"), _exp("Meta", title="Staff SWE"), _exp("Netflix"), _exp("Apple")]
+    )
+
+    assert summary == {"created": 1, "updated": 2, "deleted": 0, "unchanged": 1}
+    updated_ids = [r["id"] for r in tbl.batch_update.call_args.args[0]]
+    assert sorted(updated_ids) == ["rec2", "rec3"]
+    created = tbl.batch_create.call_args.args[0]
+    assert created[0]["fldjAiwBB2zuvWQKI"] == "APP-1"
+    assert created[0]["fldkTYhz6tDod6zeX"] == "Apple"
+
+
+def test_removed_experiences_are_deleted(tbl):
+    tbl.all.return_value = [_row("rec1", "Google"), _row("rec2", "Meta")]
+
+    summary = _sync_work_experience(tbl, "APP-1", [_exp("Google")])
+
+    assert summary == {"created": 0, "updated": 0, "deleted": 1, "unchanged": 1}
+    tbl.batch_delete.assert_called_once_with(["rec2"])
+
+
+def test_dry_run_writes_nothing(tbl):
+    tbl.all.return_value = [_row("rec1", "Google")]
+
+    summary = _sync_work_experience(tbl, "APP-1", [_exp("Meta"), _exp("Apple")], dry_run=True)
+
+    assert summary == {"created": 1, "updated": 1, "deleted": 0, "unchanged": 0}
+    tbl.batch_create.assert_not_called()
+    tbl.batch_update.assert_not_called()
@@ -0,0 +1,134 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+from services import airtable_client, llm_evaluator, compressor, decompression, shortlist
+from tests.fakes import FakeAirtable, FakeLLMClient, seed_applicants
+
+N = 30
+
+
+@pytest.fixture
+def fake_base(monkeypatch):
+    """Seeded FakeAirtable behind the shared Api, with the limiter opened up so tests run fast."""
+    fake = FakeAirtable()
+    seed_applicants(fake, N)
+    monkeypatch.setattr(airtable_client.api, "rate", 1000.0)
+    monkeypatch.setattr(airtable_client.api, "_buckets", {})
+    monkeypatch.setattr(llm_evaluator, "client", FakeLLMClient())
+    with fake.installed(airtable_client.api):
+        yield fake
+
+
+def test_fake_supports_formulas_and_pagination(fake_base):
+    tbl = airtable_client.table(compressor.TABLE_WORK_ID)
+    total = len(fake_base.rows("Work Experience"))
+    assert len(tbl.all(page_size=20)) == total
+    assert fake_base.calls[("Work Experience", "list")] == -(-total // 20)  # one request per page
+
+    rows = tbl.all(formula=airtable_client.applicant_ids_formula(["APP-000001", "APP-000002"]))
+    assert {r["fields"]["Applicant ID"] for r in rows} == {"APP-000001", "APP-000002"}
+
+    by_field_id = tbl.all(formula="{fldjAiwBB2zuvWQKI}='APP-000003'", fields=["Company"])
+    assert by_field_id and all(set(r["fields"]) <= {"Company"} for r in by_field_id)
+
+
+def test_full_pipeline_and_rerun_is_read_only(fake_base):
+    assert compressor.compress_all_applicants() == f"Compressed {N} applicants (0 unchanged)."
+    apps = fake_base.rows("Applicants")
+    assert all(json.loads(r["fields"]["Compressed JSON"])["personal"] for r in apps)
+    assert fake_base.calls[("Applicants", "update")] == N // 10  # 10-record batch updates
+
+    result = shortlist.generate_shortlist()
+    shortlisted = fake_base.rows("Shortlisted Leads")
+    assert result["message"]["created"] == len(shortlisted) > 0
+    assert all(r["fields"].get("Score Reason") == "None" for r in shortlisted)
+
+    fake_base.reset_counters()
+    rerun = shortlist.generate_shortlist()["message"]
+    assert rerun["created"] == rerun["updated"] == rerun["deleted"] == 0
+    assert fake_base.calls_by_table()["Shortlisted Leads"] == 1  # one scan, no per-applicant lookups
+    assert fake_base.calls_by_table()["Applicants"] == 1  # statuses already correct: no status writes
+    assert rerun["status_writes_skipped"] == N
+
+    fake_base.reset_counters()
+    assert compressor.compress_all_applicants() == f"Compressed {N} applicants ({N} unchanged)."
+    assert set(op for _table, op in fake_base.calls) == {"list"}  # nothing changed, nothing written
+
+    decompression.decompress_all()
+    assert not any(fake_base.calls[("Work Experience", op)] for op in ("create", "update", "delete"))
+
+
+def test_incremental_compress_sees_only_modified_rows(fake_base, isolated_watermarks):
+    compressor.compress_all_applicants()
+    for name in compressor.CHILD_TABLES:
+        isolated_watermarks.set(f"compress:{name}", "2000-01-01T00:00:00.000Z")
+    assert compressor.compress_all_applicants(incremental=True) == f"Compressed {N} changed applicants ({N} unchanged)."
+
+    for name in compressor.CHILD_TABLES:
+        isolated_watermarks.set(f"compress:{name}", "2100-01-01T00:00:00.000Z")
+    assert compressor.compress_all_applicants(incremental=True) == "Compressed 0 changed applicants (0 unchanged)."
+
+
+def test_injected_429s_are_absorbed_by_the_limiter(fake_base):
+    fake_base.rate_limit_every = 4
+    assert compressor.compress_all_applicants() == f"Compressed {N} applicants (0 unchanged)."
+    assert fake_base.rate_limited > 0
+    assert all("Compressed JSON" in r["fields"] for r in fake_base.rows("Applicants"))
+
+
+def test_parallel_decompress_reuses_listed_records_and_collects_errors(fake_base):
+    compressor.compress_all_applicants()
+    apps = sorted(fake_base.rows("Applicants"), key=lambda r: r["fields"]["Applicant ID"])
+    broken = apps[3]
+    fake_base.tables["Applicants"][broken["id"]]["fields"]["Compressed JSON"] = "{not json"
+    work = fake_base.rows("Work Experience")
+    edited = next(r for r in work if r["fields"]["Applicant ID"] == apps[5]["fields"]["Applicant ID"])
+    fake_base.tables["Work Experience"][edited["id"]]["fields"]["Title"] = "Edited"
+    progress = MagicMock()
+    progress.skip.return_value = False
+    progress.advance.return_value = False
+    fake_base.reset_counters()
+
+    assert decompression.decompress_all(progress=progress, concurrency=4) == f"Decompressed {N} applicants (1 failed)."
+
+    assert fake_base.calls_by_table()["Applicants"] == 1  # the one list; no per-applicant re-reads
+    assert fake_base.calls[("Work Experience", "update")] == 1  # only the edited history is rewritten
+    progress.error.assert_called_once()
+    assert progress.error.call_args.args[0] == broken["fields"]["Applicant ID"]
+    advanced = [c.args[0] for c in progress.advance.call_args_list]
+    assert advanced == [r["fields"]["Applicant ID"] for r in apps]  # in order despite the pool
+
+
+def test_incremental_decompress_retries_the_applicants_the_last_run_failed_on(fake_base, isolated_watermarks):
+    compressor.compress_all_applicants()
+    broken = sorted(fake_base.rows("Applicants"), key=lambda r: r["fields"]["Applicant ID"])[2]
+    fields = fake_base.tables["Applicants"][broken["id"]]["fields"]
+    good_json, fields["Compressed JSON"] = fields["Compressed JSON"], "{not json"
+    assert decompression.decompress_all() == f"Decompressed {N} applicants (1 failed)."
+
+    isolated_watermarks.set("decompress:Applicants", "2100-01-01T00:00:00.000Z")  # nothing modified since
+    assert decompression.decompress_all(incremental=True) == "Decompressed 1 applicants (1 failed)."
+
+    fields["Compressed JSON"] = good_json
+    isolated_watermarks.set("decompress:Applicants", "2100-01-01T00:00:00.000Z")
+    assert decompression.decompress_all(incremental=True) == "Decompressed 1 applicants (0 failed)."
+    assert isolated_watermarks.get(decompression.FAILED_KEY) == "[]"
+
+
+def test_applicants_whose_writes_were_in_a_failed_flush_are_retried(fake_base, isolated_watermarks, monkeypatch):
+    compressor.compress_all_applicants()
+    apps = sorted(fake_base.rows("Applicants"), key=lambda r: r["fields"]["Applicant ID"])
+    for rec in fake_base.rows("Work Experience")[:3]:
+        fake_base.tables["Work Experience"][rec["id"]]["fields"]["Title"] = "Edited"
+
+    class FlakyWriter(decompression.BatchWriter):
+        def flush(self):
+            if self.pending() and not getattr(self, "failed_once", False):
+                self.failed_once = True
+                raise RuntimeError("502")
+            return super().flush()
+
+    monkeypatch.setattr(decompression, "BatchWriter", FlakyWriter)
+    assert decompression.decompress_all() == f"Decompressed {N} applicants ({N} failed)."
+    failed = json.loads(isolated_watermarks.get(decompression.FAILED_KEY))
+    assert failed == [r["fields"]["Applicant ID"] for r in apps]  # any of them could have had writes in it
@@ -0,0 +1,80 @@
+import gzip
+import json
+import pytest
+from fastapi.testclient import TestClient
+from app import app
+from unittest.mock import MagicMock, patch
+from services import airtable_client, compressor, export
+from services.export import export_profiles, ndjson, gzip_stream
+from tests.fakes import FakeAirtable, seed_applicants
+
+N = 130  # two Applicants pages
+
+
+@pytest.fixture
+def fake_base(monkeypatch):
+    fake = FakeAirtable()
+    seed_applicants(fake, N)
+    monkeypatch.setattr(airtable_client.api, "rate", 1000.0)
+    monkeypatch.setattr(airtable_client.api, "_buckets", {})
+    with fake.installed(airtable_client.api):
+        yield fake
+
+
+def test_export_streams_every_profile_in_order_without_writing(fake_base):
+    expected = {f"APP-{i:06d}": compressor.build_json(f"APP-{i:06d}") for i in (1, 77, N)}
+    fake_base.reset_counters()
+
+    profiles = list(export_profiles())
+
+    assert [p["applicant_id"] for p in profiles] == [f"APP-{i:06d}" for i in range(1, N + 1)]
+    for applicant_id, data in expected.items():
+        (profile,) = [p for p in profiles if p["applicant_id"] == applicant_id]
+        assert profile == {"applicant_id": applicant_id, **data}
+    assert fake_base.calls[("Applicants", "list")] == 2
+    assert fake_base.calls[("Personal Details", "list")] == 3  # one OR() query per page chunk of up to 50
+    assert not any(op in ("create", "update", "delete") for _table, op in fake_base.calls)
+
+
+def test_export_is_lazy_and_resumes_after_a_cursor(fake_base):
+    fake_base.reset_counters()
+    stream = export_profiles()
+    assert next(stream)["applicant_id"] == "APP-000001"
+    assert fake_base.calls[("Applicants", "list")] == 1 and fake_base.calls[("Personal Details", "list")] == 1
+
+    resumed = [p["applicant_id"] for p in export_profiles(after="APP-000125")]
+    assert resumed == [f"APP-{i:06d}" for i in range(126, N + 1)]
+
+
+def test_pages_follow_airtable_order_not_python_string_order():
+    # Airtable's collation: case-insensitive, so "app-2" sorts before "APP-3"; APP-3 is listed twice
+    order = [["app-2", "APP-3"], ["APP-3", "apple"], ["APP-4"]]
+    tbl_app = MagicMock()
+    tbl_app.iterate.side_effect = lambda **kw: iter([[{"fields": {"Applicant ID": i}} for i in page] for page in order])
+
+    with patch.object(export, "tbl_app", tbl_app):
+        assert list(export._applicant_pages()) == [["app-2", "APP-3"], ["apple"], ["APP-4"]]
+        assert list(export._applicant_pages(after="APP-3")) == [["apple"], ["APP-4"]]
+        with pytest.raises(LookupError):
+            list(export._applicant_pages(after="APP-9"))
+
+
+def test_ndjson_chunks_and_gzip_round_trip():
+    profiles = [{"applicant_id": f"APP-{i}", "note": "é" * 10} for i in range(50)]
+    chunks = list(ndjson(profiles, chunk_bytes=200))
+    assert len(chunks) > 1
+    lines = b"".join(chunks).decode().splitlines()
+    assert [json.loads(line) for line in lines] == profiles
+
+    assert gzip.decompress(b"".join(gzip_stream(iter(chunks)))) == b"".join(chunks)
+
+
+def test_endpoint_streams_gzipped_ndjson(fake_base):
+    client = TestClient(app)
+    response = client.get("/export/profiles", params={"after": "APP-000120", "gzip": "true"})
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-encoding"] == "gzip"
+    lines = [json.loads(line) for line in response.text.splitlines()]  # httpx decodes the gzip body
+    assert [p["applicant_id"] for p in lines] == [f"APP-{i:06d}" for i in range(121, N + 1)]
+    assert client.get("/export/profiles", params={"after": "APP-999999"}).status_code == 404
@@ -0,0 +1,123 @@
+import time
+import pytest
+from services import jobs
+from services.jobs import JobQueue, DONE, FAILED
+
+
+class Crash(Exception):
+    pass
+
+
+def _sweep(ids, processed, crash_after=None, flushed=None):
+    """Minimal sweep following the same progress protocol as compress/decompress/shortlist."""
+
+    def run(progress):
+        progress.start(len(ids))
+        for app_id in ids:
+            if progress.skip(app_id):
+                continue
+            if crash_after is not None and app_id > crash_after:
+                raise Crash(app_id)
+            processed.append(app_id)
+            if progress.advance(app_id):
+                progress.checkpoint(lambda: flushed.append(app_id) if flushed is not None else None)
+        return f"swept {len(ids)}"
+
+    return run
+
+
+@pytest.fixture
+def checkpoint_every(monkeypatch):
+    monkeypatch.setattr(jobs, "CHECKPOINT_EVERY", 2)
+
+
+def test_job_resumes_after_last_checkpoint(checkpoint_every):
+    ids = ["APP-1", "APP-2", "APP-3", "APP-4", "APP-5"]
+    first, second, flushed = [], [], []
+    queue = JobQueue(":memory:", handlers={"sweep": lambda params, p: p.run_phase("sweep", _sweep(ids, first, "APP-3", flushed))})
+    queue.start = lambda: None  # run jobs synchronously in the test
+    job_id = queue.enqueue("sweep")
+
+    queue.run_job(queue._row(job_id))
+    assert queue.status(job_id)["status"] == FAILED
+    assert first == ["APP-1", "APP-2", "APP-3"]
+    assert flushed == ["APP-2"]  # pending writes are flushed before the checkpoint is stored
+
+    queue.handlers["sweep"] = lambda params, p: p.run_phase("sweep", _sweep(ids, second))
+    assert queue.enqueue("sweep") == job_id  # re-queuing a failed job resumes it
+    queue.run_job(queue._row(job_id))
+
+    status = queue.status(job_id)
+    assert status["status"] == DONE
+    assert second == ["APP-3", "APP-4", "APP-5"]  # APP-3 was never checkpointed, so it is redone
+    assert status["processed"] == status["total"] == 5
+    assert status["result"] == "swept 5"
+    assert status["errors"] == ["Crash: APP-4"]
+
+
+def test_finished_phases_are_not_rerun(checkpoint_every):
+    runs = []
+
+    def compress(progress):
+        runs.append("compress")
+        return "compressed"
+
+    def shortlist(progress):
+        runs.append("shortlist")
+        raise Crash()
+
+    def handler(params, progress):
+        return [progress.run_phase("compress", compress), progress.run_phase("shortlist", shortlist)]
+
+    queue = JobQueue(":memory:", handlers={"two_phase": handler})
+    queue.start = lambda: None
+    job_id = queue.enqueue("two_phase", {"incremental": True})
+    queue.run_job(queue._row(job_id))
+
+    assert queue.enqueue("two_phase", {"incremental": True}) == job_id
+    queue.handlers["two_phase"] = lambda params, p: [
+        p.run_phase("compress", lambda pr: runs.append("compress again")),
+        p.run_phase("shortlist", lambda pr: "shortlisted"),
+    ]
+    queue.run_job(queue._row(job_id))
+
+    assert runs == ["compress", "shortlist"]
+    assert queue.status(job_id)["result"] == ["compressed", "shortlisted"]
+
+
+def test_identical_pending_job_is_reused():
+    queue = JobQueue(":memory:", handlers={"sweep": lambda params, p: None})
+    queue.start = lambda: None
+
+    first = queue.enqueue("sweep", {"incremental": False})
+    assert queue.enqueue("sweep", {"incremental": False}) == first
+    assert queue.enqueue("sweep", {"incremental": True}) != first
+    with pytest.raises(ValueError):
+        queue.enqueue("unknown")
+
+
+def test_waiting_job_is_deferred_and_resumes_with_its_saved_state():
+    attempts = []
+
+    def poll(progress):
+        state = progress.saved("batch") or {"id": "batch_1", "polls": 0}
+        state["polls"] += 1
+        attempts.append(dict(state))
+        if state["polls"] < 2:
+            progress.save("batch", state)
+            progress.wait(60)
+        return state["polls"]
+
+    queue = JobQueue(":memory:", handlers={"offline": lambda params, p: p.run_phase("poll", poll)})
+    queue.start = lambda: None
+    job_id = queue.enqueue("offline")
+
+    queue.run_job(queue._next_job())
+    status = queue.status(job_id)
+    assert status["status"] == "queued" and status["run_after"] > time.time() + 30
+    assert queue._next_job() is None  # the worker is free for other jobs until then
+
+    queue._update(job_id, run_after=time.time())
+    queue.run_job(queue._next_job())
+    assert queue.status(job_id)["status"] == DONE and queue.status(job_id)["result"] == 2
+    assert attempts == [{"id": "batch_1", "polls": 1}, {"id": "batch_1", "polls": 2}]
@@ -0,0 +1,130 @@
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+from services import llm_batch, llm_evaluator, shortlist
+from services.jobs import JobQueue, DONE
+from tests.fakes import FakeLLMClient
+
+
+def _applicant_json(i):
+    return {"personal": {"name": f"Applicant {i}"}, "experience": [], "salary": {}}
+
+
+@pytest.fixture
+def llm(monkeypatch, tmp_path):
+    fake = FakeLLMClient()
+    monkeypatch.setattr(llm_evaluator, "client", fake)
+    monkeypatch.setattr(llm_batch, "BATCH_DIR", str(tmp_path))
+    monkeypatch.setattr(llm_batch, "POLL_SECONDS", 0)
+    return fake
+
+
+def test_evaluate_offline_submits_polls_and_parses(llm, tmp_path):
+    llm_evaluator.llm_evaluate_applicant(_applicant_json(0))  # cached → not submitted
+    llm.fail_every = 3
+
+    results = llm_batch.evaluate_offline({f"rec{i}": _applicant_json(i) for i in range(5)})
+
+    (batch,) = llm.batches.batches.values()
+    assert batch["endpoint"] == "/v1/responses"
+    assert batch["polls"] == 2  # polled until it completed
+    submitted = [json.loads(line) for line in llm.files.data[batch["input_file_id"]].splitlines()]
+    assert [r["custom_id"] for r in submitted] == ["rec1", "rec2", "rec3", "rec4"]
+    assert submitted[0]["body"]["model"] == llm_evaluator.MODEL
+    assert llm.batch_requests == 4 and llm.calls == 1
+
+    assert set(results) == {"rec0", "rec1", "rec2", "rec4"}  # rec3's line failed
+    assert results["rec1"] == FakeLLMClient._evaluation(_applicant_json(1))
+    assert list(tmp_path.iterdir()) == []  # request file removed once read
+
+    # answers were cached: a synchronous evaluation reuses them
+    assert llm_evaluator.llm_evaluate_applicant(_applicant_json(1)) == results["rec1"]
+    assert llm.calls == 1
+
+
+def test_read_batch_results_skips_bad_lines():
+    def line(custom_id, text, status_code=200):
+        message = {"type": "message", "content": [{"type": "output_text", "text": text}]}
+        body = {"output": [{"type": "reasoning", "summary": []}, message]}
+        return {"custom_id": custom_id, "response": {"status_code": status_code, "body": body}, "error": None}
+
+    lines = [
+        line("ok", '{"summary": " Good ", "score": "8"}'),
+        line("http_error", '{"summary": "Good", "score": 8}', status_code=500),
+        line("not_json", "Sorry!"),
+        {"custom_id": "failed", "response": None, "error": {"message": "boom"}},
+    ]
+    client = MagicMock()
+    client.files.content.return_value.text = "\n".join(json.dumps(line) for line in lines) + "\n"
+
+    with patch.object(llm_evaluator, "client", client):
+        results = llm_batch.read_batch_results(MagicMock(output_file_id="file-out"))
+
+    assert results == {"ok": {"summary": "Good", "score": 8, "issues": "None", "follow_ups": ""}}
+
+
+def test_timed_out_batch_is_cancelled(llm):
+    llm.batches.polls_to_complete = 10**6
+
+    results = llm_batch.evaluate_offline({"rec1": _applicant_json(1)}, timeout=0)
+
+    assert results == {}
+    assert [b["status"] for b in llm.batches.batches.values()] == ["cancelled"]
+
+
+def _shortlist_tables(n=6):
+    """Mock Applicants (n applicants that pass the rules) and Shortlisted Leads tables."""
+    apps = []
+    for i in range(n):
+        data = {
+            "personal": {"location": "New York, US"},
+            "experience": [{"company": "Google", "start": "2018-01-01", "end": "2022-12-31"}],
+            "salary": {"preferred_rate": "90", "availability": "40"},
+        }
+        fields = {"Applicant ID": f"APP-{i}", "Compressed JSON": json.dumps({**data, "i": i})}
+        apps.append({"id": f"recA{i}", "fields": fields})
+    tbl_app, tbl_shortlist = MagicMock(), MagicMock()
+    tbl_app.all.return_value = apps
+    tbl_shortlist.all.return_value = []
+    tbl_shortlist.batch_create.side_effect = lambda records, typecast=False: [
+        {"id": f"recS{i}", "fields": f} for i, f in enumerate(records)
+    ]
+    return tbl_app, tbl_shortlist
+
+
+def test_offline_shortlist_applies_batch_results(llm):
+    tbl_app, tbl_shortlist = _shortlist_tables()
+    llm.fail_every = 4  # one batch line fails → evaluated synchronously
+
+    with patch.object(shortlist, "tbl_app", tbl_app), patch.object(shortlist, "tbl_shortlist", tbl_shortlist):
+        result = shortlist.generate_shortlist(offline_llm=True)
+
+    assert result["message"]["created"] == 6
+    assert result["message"]["llm_ok"] == 6
+    assert result["message"]["llm_offline"] == 5
+    assert llm.batch_requests == 6 and llm.calls == 1
+    # shortlist rows were created before the batch ran, so Score Reason goes out as updates to real ids
+    reasons = [r for call in tbl_shortlist.batch_update.call_args_list for r in call.args[0]]
+    assert sorted(r["id"] for r in reasons) == [f"recS{i}" for i in range(6)]
+
+
+def test_offline_shortlist_job_waits_in_the_queue_and_never_resubmits(llm):
+    tbl_app, tbl_shortlist = _shortlist_tables(3)
+    llm.batches.polls_to_complete = 3
+    def job(params, progress):
+        return progress.run_phase("shortlist", lambda p: shortlist.generate_shortlist(progress=p, offline_llm=True))
+
+    queue = JobQueue(":memory:", handlers={"shortlist_all": job})
+    queue.start = lambda: None
+    job_id = queue.enqueue("shortlist_all")
+
+    with patch.object(shortlist, "tbl_app", tbl_app), patch.object(shortlist, "tbl_shortlist", tbl_shortlist):
+        queue.run_job(queue._next_job())  # sweeps, submits, then gives the worker back
+        assert queue.status(job_id)["status"] == "queued"
+        assert queue._row(job_id)["checkpoint"]["saved"]["llm_batch"]["batch"]["batch_id"] == "batch_1"
+        while queue.status(job_id)["status"] != DONE:
+            queue.run_job(queue._next_job())  # each attempt polls the saved batch once
+
+    assert len(llm.batches.batches) == 1 and tbl_app.all.call_count == 1  # resumed, not re-swept or resubmitted
+    message = queue.status(job_id)["result"]["message"]
+    assert message["created"] == 3 and message["llm_ok"] == 3 and message["llm_batch_status"] == "completed"
@@ -144,3 +144,136 @@ def test_llm_evaluate_applicant_error_handling(mock_create, sample_applicant_jso
         llm_evaluate_applicant(sample_applicant_json)
 
     assert "API Error" in str(excinfo.value)
+
+
+@patch("services.llm_evaluator.client.responses.create")
+def test_llm_evaluate_applicant_uses_cache(mock_create, sample_applicant_json, mock_response, payload):
+    mock_create.return_value = mock_response
+
+    first = llm_evaluate_applicant(sample_applicant_json)
+    second = llm_evaluate_applicant(json.loads(json.dumps(sample_applicant_json)))
+
+    # Identical canonical JSON → one model call
+    mock_create.assert_called_once()
+    assert first == second == payload
+
+    # Bypassing the cache always calls the model
+    llm_evaluate_applicant(sample_applicant_json, use_cache=False)
+    assert mock_create.call_count == 2
+
+
+def test_llm_cache_ttl_and_lru_eviction():
+    from services.llm_cache import LLMCache
+
+    cache = LLMCache(":memory:", ttl_seconds=3600, max_entries=2)
+    cache.set("a", {"score": 1})
+    cache.set("b", {"score": 2})
+    assert cache.get("a") == {"score": 1}  # "a" is now most recently used
+    cache.set("c", {"score": 3})
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == {"score": 1}
+
+    expired = LLMCache(":memory:", ttl_seconds=-1)
+    expired.set("a", {"score": 1})
+    assert expired.get("a") is None
+
+    assert LLMCache.make_key("m", "1", "{}") != LLMCache.make_key("m", "2", "{}")
+    # the same profile with its keys in another order shares one entry
+    assert LLMCache.key_for("m", "1", {"a": 1, "b": {"c": 2, "d": 3}}) == LLMCache.key_for("m", "1", {"b": {"d": 3, "c": 2}, "a": 1})
+
+
+@patch("services.llm_evaluator.client.responses.create")
+def test_llm_evaluate_applicants_packs_and_splits_batches(mock_create, payload, mock_response, monkeypatch):
+    from services import llm_evaluator
+    from services.llm_cache import LLMCache
+
+    monkeypatch.setattr(llm_evaluator, "cache", LLMCache(":memory:"))
+    applicants = [{"personal": {"name": f"A{i}"}, "experience": [], "salary": {}} for i in range(5)]
+    mock_create.return_value = mock_response
+    llm_evaluator.llm_evaluate_applicant(applicants[4])  # cached → never sent in a batch
+    mock_create.reset_mock()
+
+    def batch_reply(model, input):
+        reply = MagicMock()
+        reply.output_text = json.dumps(
+            {
+                "results": [
+                    {"id": 0, **payload, "score": "7"},
+                    {"id": 1, **payload},
+                    {"id": 2, "summary": "", "score": 3},  # unusable → single fallback
+                    {"id": 9, **payload},  # unknown id is ignored; id 3 is missing → single fallback
+                ]
+            }
+        )
+        return reply
+
+    mock_create.side_effect = batch_reply
+    singles = []
+    results = llm_evaluator.llm_evaluate_applicants(
+        applicants, batch_size=4, fallback=lambda a: singles.append(a["personal"]["name"]) or {"score": -1}
+    )
+
+    mock_create.assert_called_once()
+    prompt = mock_create.call_args.kwargs["input"]
+    assert '[{"id":0,"applicant":{"personal":{"name":"A0"}' in prompt
+    assert '"A4"' not in prompt
+    assert [r["score"] for r in results] == [7, payload["score"], -1, -1, payload["score"]]
+    assert singles == ["A2", "A3"]
+    # batch answers share the single-applicant cache entries
+    assert llm_evaluator.llm_evaluate_applicant(applicants[0])["score"] == 7
+    mock_create.assert_called_once()
+
+
+@patch("services.llm_evaluator.time.sleep")
+@patch("services.llm_evaluator.client.responses.create", side_effect=Exception("API Error"))
+def test_llm_evaluate_applicants_falls_back_when_batch_fails(mock_create, _sleep):
+    from services.llm_evaluator import llm_evaluate_applicants
+
+    applicants = [{"personal": {"name": f"B{i}"}} for i in range(3)]
+    results = llm_evaluate_applicants(applicants, batch_size=3, use_cache=False, fallback=lambda a: {"name": a["personal"]["name"]})
+
+    assert results == [{"name": "B0"}, {"name": "B1"}, {"name": "B2"}]
+    assert mock_create.call_count == 3  # one batch request, retried
+
+
+@patch("services.llm_evaluator.time.sleep")
+@patch("services.llm_evaluator.client.responses.create", side_effect=Exception("API Error"))
+def test_open_circuit_fails_fast(mock_create, mock_sleep, sample_applicant_json, isolated_llm_breaker):
+    from services.circuit_breaker import CircuitOpen
+
+    isolated_llm_breaker.failure_threshold = 2
+    with pytest.raises(Exception, match="API Error"):
+        llm_evaluate_applicant(sample_applicant_json)
+
+    # the second failure opened the circuit, so the third attempt was neither waited for nor sent
+    assert mock_create.call_count == 2
+    assert mock_sleep.call_count == 1
+    with pytest.raises(CircuitOpen):
+        llm_evaluate_applicant(sample_applicant_json)
+    assert mock_create.call_count == 2
+
+
+def test_async_evaluation_awaits_its_backoff(sample_applicant_json, mock_response, payload, monkeypatch):
+    import asyncio
+    from unittest.mock import AsyncMock
+    from services import llm_evaluator
+
+    aclient = MagicMock()
+    aclient.responses.create = AsyncMock(side_effect=[Exception("API Error"), mock_response])
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(llm_evaluator, "aclient", aclient)
+    monkeypatch.setattr(llm_evaluator.asyncio, "sleep", fake_sleep)
+    monkeypatch.setattr(llm_evaluator.time, "sleep", MagicMock(side_effect=AssertionError("blocking sleep")))
+
+    result = asyncio.run(llm_evaluator.allm_evaluate_applicant(sample_applicant_json))
+
+    assert result == payload
+    assert aclient.responses.create.await_count == 2
+    assert len(sleeps) == 1 and 1 <= sleeps[0] <= 2
+    # cached like the sync variant
+    assert llm_evaluate_applicant(sample_applicant_json) == payload
@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+from services import airtable_client, airtable_async, compressor, llm_evaluator, metrics
+from services.airtable_client import describe_call
+from services.metrics import Registry, span, timed
+from tests.fakes import FakeAirtable, FakeLLMClient, seed_applicants
+
+
+def test_render_uses_the_prometheus_text_format():
+    registry = Registry()
+    calls = registry.counter("calls", "Calls made.", ("op",))
+    latency = registry.histogram("latency_seconds", "Latency.", ("op",), buckets=(0.1, 1.0))
+    calls.inc(op="list")
+    calls.inc(2, op='say "hi"')
+    latency.observe(0.05, op="list")
+    latency.observe(0.5, op="list")
+
+    assert registry.render().splitlines() == [
+        "# HELP calls_total Calls made.",
+        "# TYPE calls_total counter",
+        'calls_total{op="list"} 1',
+        'calls_total{op="say \\"hi\\""} 2',
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{op="list",le="0.1"} 1',
+        'latency_seconds_bucket{op="list",le="1"} 2',
+        'latency_seconds_bucket{op="list",le="+Inf"} 2',
+        'latency_seconds_sum{op="list"} 0.55',
+        'latency_seconds_count{op="list"} 2',
+    ]
+    with pytest.raises(ValueError):
+        calls.inc(table="Applicants")
+
+
+def test_spans_nest_and_time_sync_and_async_functions():
+    seen = []
+
+    @timed("outer")
+    async def outer():
+        with span("inner") as inner:
+            seen.append(inner.path)
+        seen.append(metrics.current_stage())
+
+    before = metrics.stage_seconds.count(stage="inner")
+    asyncio.run(outer())
+    assert seen == ["outer/inner", "outer"]
+    assert metrics.stage_seconds.count(stage="inner") == before + 1
+    assert metrics.current_stage() == "none"
+
+    @timed("boom")
+    def boom():
+        raise RuntimeError("nope")
+
+    errors = metrics.stage_errors.value(stage="boom")
+    with pytest.raises(RuntimeError):
+        boom()
+    assert metrics.stage_errors.value(stage="boom") == errors + 1
+
+
+def test_describe_call():
+    base = "https://api.airtable.com/v0/appX1"
+    assert describe_call("GET", f"{base}/tblWdUw8VbNZqHvU5") == ("Applicants", "list")
+    assert describe_call("POST", f"{base}/tblWdUw8VbNZqHvU5/listRecords") == ("Applicants", "list")
+    assert describe_call("GET", f"{base}/tblVt8RsY8VPu0TeZ/rec1") == ("Work Experience", "get")
+    assert describe_call("PATCH", f"{base}/tblWdUw8VbNZqHvU5") == ("Applicants", "update")
+    assert describe_call("DELETE", f"{base}/tblmATJnlO5LGqsMr?records[]=rec1") == ("Shortlisted Leads", "delete")
+    assert describe_call("GET", "https://api.airtable.com/v0/bases/appX1/webhooks/ach1/payloads") == ("webhooks", "get")
+
+
+@pytest.fixture
+def fake_base(monkeypatch):
+    fake = FakeAirtable()
+    seed_applicants(fake, 3)
+    monkeypatch.setattr(airtable_client.api, "rate", 1000.0)
+    monkeypatch.setattr(airtable_client.api, "_buckets", {})
+    with fake.installed(airtable_client.api), fake.installed_async(airtable_async.aapi):
+        yield fake
+
+
+def test_airtable_calls_are_counted_against_their_stage(fake_base):
+    first, second = fake_base.rows("Applicants")[:2]
+    lists = metrics.airtable_requests.value(table="Work Experience", op="list", stage="build_json", outcome="ok")
+    updates = metrics.airtable_requests.value(table="Applicants", op="update", stage="compress", outcome="ok")
+
+    compressor.compress_one(first["fields"]["Applicant ID"], first["id"])
+    asyncio.run(compressor.compress_one_async(second["fields"]["Applicant ID"], second["id"]))
+
+    assert metrics.airtable_requests.value(table="Work Experience", op="list", stage="build_json", outcome="ok") == lists + 2
+    assert metrics.airtable_requests.value(table="Applicants", op="update", stage="compress", outcome="ok") == updates + 2
+    assert "airtable_request_seconds_bucket" in metrics.registry.render()
+
+
+def test_rate_limited_requests_count_as_429s_and_retries(monkeypatch):
+    fake = FakeAirtable(rate_limit_every=2, retry_after=0.01)
+    monkeypatch.setattr(airtable_client.api, "_buckets", {})
+    limited = metrics.airtable_rate_limited.value(table="Applicants")
+    retries = metrics.retries.value(client="airtable")
+
+    with fake.installed(airtable_client.api):
+        for _ in range(2):  # the second request is throttled once, then retried
+            airtable_client.table(compressor.TABLE_APPLICANTS_ID).create({"Applicant ID": "APP-X"})
+
+    assert metrics.airtable_rate_limited.value(table="Applicants") == limited + 1
+    assert metrics.retries.value(client="airtable") == retries + 1
+
+
+def test_llm_latency_tokens_retries_and_cache_hits(monkeypatch):
+    llm = FakeLLMClient(fail_every=2)
+    monkeypatch.setattr(llm_evaluator, "client", llm)
+    monkeypatch.setattr(llm_evaluator, "_backoff", lambda attempt: 0)
+    ok = metrics.llm_requests.value(stage="llm_evaluate", outcome="ok")
+    failed = metrics.llm_requests.value(stage="llm_evaluate", outcome="error")
+    tokens = metrics.llm_tokens.value(kind="output")
+    retries = metrics.retries.value(client="llm")
+    hits = metrics.llm_cache.value(result="hit")
+
+    applicant = {"personal": {"name": "A"}}
+    llm_evaluator.llm_evaluate_applicant(applicant)  # call 1 answers
+    llm_evaluator.llm_evaluate_applicant(applicant)  # cached
+    llm_evaluator.llm_evaluate_applicant({"personal": {"name": "B"}})  # call 2 fails, call 3 answers
+
+    assert metrics.llm_requests.value(stage="llm_evaluate", outcome="ok") == ok + 2
+    assert metrics.llm_requests.value(stage="llm_evaluate", outcome="error") == failed + 1
+    assert metrics.retries.value(client="llm") == retries + 1
+    assert metrics.llm_cache.value(result="hit") == hits + 1
+    assert metrics.llm_tokens.value(kind="output") > tokens
@@ -0,0 +1,98 @@
+import pytest
+from collections import OrderedDict
+from fastapi.testclient import TestClient
+from app import app
+from services import airtable_client, airtable_async, llm_evaluator, profiling
+from services.profiling import profiled, requested
+from dictionaries.constants import TABLE_WORK_ID
+from tests.fakes import FakeAirtable, FakeLLMClient, seed_applicants
+
+
+@pytest.fixture
+def fake_base(monkeypatch):
+    fake = FakeAirtable()
+    seed_applicants(fake, 3)
+    monkeypatch.setattr(airtable_client.api, "rate", 1000.0)
+    monkeypatch.setattr(airtable_client.api, "_buckets", {})
+    llm = FakeLLMClient()
+    monkeypatch.setattr(llm_evaluator, "client", llm)
+    monkeypatch.setattr(llm_evaluator, "aclient", llm.asynchronous())
+    monkeypatch.setattr(profiling.traces, "keep", 2)
+    monkeypatch.setattr(profiling.traces, "_traces", OrderedDict())
+    with fake.installed(airtable_client.api), fake.installed_async(airtable_async.aapi):
+        yield fake
+
+
+def test_profiling_is_requested_by_header_or_query_flag():
+    assert requested(None, None) == (False, False)
+    assert requested("0", None) == (False, False)
+    assert requested("1", None) == (True, False)
+    assert requested(None, "cprofile") == (True, True)
+
+
+def test_trace_records_every_outbound_call_with_sizes_and_pages(fake_base):
+    with profiled("sweep") as trace:
+        rows = airtable_client.table(TABLE_WORK_ID).all(page_size=2)
+        llm_evaluator.llm_evaluate_applicant({"personal": {"name": "A"}}, use_cache=False)
+    airtable_client.table(TABLE_WORK_ID).all()  # outside the block: not traced
+
+    pages = [call for call in trace.calls if call["client"] == "airtable"]
+    assert len(pages) == (len(rows) + 1) // 2
+    assert [call["more_pages"] for call in pages] == [True] * (len(pages) - 1) + [False]
+    assert sum(call["records"] for call in pages) == len(rows)
+    assert all(call["op"] == "list" and call["target"] == "Work Experience" for call in pages)
+    (llm,) = [call for call in trace.calls if call["client"] == "openai"]
+    assert llm["stage"] == "llm_evaluate" and llm["request_bytes"] > 0 and llm["tokens"] > 0
+
+    summary = trace.summary()
+    assert summary["outbound_calls"] == len(pages) + 1
+    assert summary["by_call"]["airtable Work Experience list"]["calls"] == len(pages)
+    assert profiling.traces.get(trace.id) is trace
+    assert trace.server_timing().startswith('airtable;dur=')
+
+
+def test_store_keeps_the_latest_traces(fake_base):
+    ids = []
+    for name in ("a", "b", "c"):
+        with profiled(name) as trace:
+            ids.append(trace.id)
+    assert profiling.traces.get(ids[0]) is None
+    assert [summary["request"] for summary in profiling.traces.summaries()] == ["c", "b"]
+
+
+def test_cprofile_capture():
+    with profiled("cpu", cprofile=True) as trace:
+        sorted(str(n) for n in range(1000))
+    assert "function calls" in trace.profile_text
+
+
+def test_endpoint_returns_a_trace_id_only_when_asked(fake_base):
+    client = TestClient(app)
+    row = fake_base.rows("Applicants")[0]
+    params = {"app_id": row["fields"]["Applicant ID"], "rec": row["id"]}
+
+    plain = client.get("/run_compressor", params=params)
+    assert plain.status_code == 200 and "X-Profile-Id" not in plain.headers
+
+    traced = client.get("/run_compressor", params=params, headers={"X-Profile": "1"})
+    assert "airtable;dur=" in traced.headers["Server-Timing"]
+    profile = client.get(f"/profiles/{traced.headers['X-Profile-Id']}").json()
+    assert profile["request"] == "GET /run_compressor"
+    assert {call["stage"] for call in profile["calls"]} >= {"applicant/compress/build_json"}
+    assert client.get("/profiles/unknown").status_code == 404
+
+
+def test_cprofile_is_skipped_when_it_would_see_other_work(fake_base):
+    with profiling.requests_in_flight, profiling.requests_in_flight:  # this request and one other
+        with profiled("busy", cprofile=True) as trace:
+            pass
+    assert trace.profile_text.startswith("skipped: 1 other requests in flight")
+
+    client = TestClient(app)
+    sync = client.get("/llm/status", headers={"X-Profile": "cprofile"})  # a def endpoint: runs in the threadpool
+    assert client.get(f"/profiles/{sync.headers['X-Profile-Id']}").json()["cprofile"].startswith("skipped: sync")
+
+    row = fake_base.rows("Applicants")[0]
+    params = {"app_id": row["fields"]["Applicant ID"], "rec": row["id"], "profile": "cprofile"}
+    traced = client.get("/run_compressor", params=params)
+    assert "function calls" in client.get(f"/profiles/{traced.headers['X-Profile-Id']}").json()["cprofile"]
@@ -0,0 +1,177 @@
+import json
+import time
+import asyncio
+import pytest
+from services import airtable_client, airtable_async, compressor, decompression, shortlist, llm_evaluator, metrics
+from services.replica import Replica, table_from_url
+from dictionaries.constants import FIELD_NAMES_TO_IDS, TABLE_APPLICANTS_ID, TABLE_WORK_ID, TABLE_SHORTLIST_ID
+from tests.fakes import FakeAirtable, FakeLLMClient, seed_applicants
+
+N = 10
+
+
+@pytest.fixture
+def fake_base(monkeypatch):
+    fake = FakeAirtable()
+    seed_applicants(fake, N)
+    monkeypatch.setattr(airtable_client.api, "rate", 1000.0)
+    monkeypatch.setattr(airtable_client.api, "_buckets", {})
+    llm = FakeLLMClient()
+    monkeypatch.setattr(llm_evaluator, "client", llm)
+    monkeypatch.setattr(llm_evaluator, "aclient", llm.asynchronous())
+    with fake.installed(airtable_client.api), fake.installed_async(airtable_async.aapi):
+        yield fake
+
+
+@pytest.fixture
+def replica(monkeypatch, fake_base):
+    """A loaded in-memory replica wired into the services and the write-through hook."""
+    replica = Replica(":memory:")
+    monkeypatch.setattr(airtable_client.api, "_write_listeners", [replica.observe_write])
+    for module in (compressor, decompression, shortlist):
+        monkeypatch.setattr(module, "replica", replica)
+    replica.load()
+    fake_base.reset_counters()
+    return replica
+
+
+def _applicant(fake, n):
+    return sorted(fake.rows("Applicants"), key=lambda r: r["fields"]["Applicant ID"])[n]
+
+
+def test_table_from_url():
+    assert table_from_url("https://api.airtable.com/v0/appX1/tblA/recB") == "tblA"
+    assert table_from_url("https://api.airtable.com/v0/appX1/tblA?records[]=r") == "tblA"
+    assert table_from_url("https://api.airtable.com/v0/appX1/tblA/listRecords") is None
+    assert table_from_url("https://api.airtable.com/v0/meta/bases") is None
+
+
+def test_disabled_replica_answers_nothing():
+    replica = Replica("")
+    assert not replica.enabled and replica.record(TABLE_APPLICANTS_ID, "rec1") is None
+    assert replica.rows_for(TABLE_WORK_ID, "APP-000001") is None
+    assert len(replica) == 0
+
+
+def test_per_applicant_pipeline_only_writes(fake_base, replica):
+    app = _applicant(fake_base, 0)
+    applicant_id = app["fields"]["Applicant ID"]
+    assert len(replica) == sum(len(fake_base.rows(t)) for t in fake_base.tables)
+
+    result = compressor.compress_one(applicant_id, app["id"])
+    shortlist.generate_shortlist_one(applicant_id, app["id"])
+    decompression.decompress_one(applicant_id, app["id"])
+
+    assert not result["unchanged"]
+    reads = {op for _table, op in fake_base.calls if op in ("list", "get")}
+    assert reads == set()  # every read was served locally
+    # write-through: the replica saw the Compressed JSON (and status) this process wrote
+    stored = replica.record(TABLE_APPLICANTS_ID, app["id"])["fields"]
+    assert json.loads(stored["Compressed JSON"]) == json.loads(result["payload"])
+    assert stored["Shortlist Status"] == _applicant(fake_base, 0)["fields"]["Shortlist Status"]
+
+    fake_base.reset_counters()
+    assert compressor.compress_one(applicant_id, app["id"])["unchanged"]
+    assert sum(fake_base.calls.values()) == 0
+
+
+def test_async_path_reads_from_the_replica(fake_base, replica):
+    app = _applicant(fake_base, 1)
+    applicant_id = app["fields"]["Applicant ID"]
+
+    async def webhook():
+        result = await compressor.compress_one_async(applicant_id, app["id"])
+        await shortlist.generate_shortlist_one_async(applicant_id, app["id"], compressed_json=result["payload"])
+        await decompression.decompress_one_async(applicant_id, app["id"])
+
+    built = metrics.stage_seconds.count(stage="build_json")
+    asyncio.run(webhook())
+    assert {op for _table, op in fake_base.calls if op in ("list", "get")} == set()
+    assert metrics.stage_seconds.count(stage="build_json") == built + 1  # one span, not one per nested call
+    assert fake_base.calls[("Applicants", "update")] >= 1
+
+
+def test_deletes_are_written_through(fake_base, replica):
+    app = _applicant(fake_base, 2)
+    rows = replica.rows_for(TABLE_WORK_ID, app["fields"]["Applicant ID"])
+    airtable_client.table(TABLE_WORK_ID).batch_delete([r["id"] for r in rows])
+    assert replica.rows_for(TABLE_WORK_ID, app["fields"]["Applicant ID"]) == []
+
+
+def test_refresh_picks_up_edits_made_in_airtable(fake_base, replica):
+    app = _applicant(fake_base, 3)
+    with fake_base._lock:
+        fake_base._update("Applicants", app["id"], {"Shortlist Status": "Edited in Airtable"})
+
+    assert replica.refresh() >= 1
+    assert replica.record(TABLE_APPLICANTS_ID, app["id"])["fields"]["Shortlist Status"] == "Edited in Airtable"
+
+
+def test_apply_payload_creates_changes_and_destroys(fake_base, replica):
+    AP = FIELD_NAMES_TO_IDS["Applicants"]
+    SL = FIELD_NAMES_TO_IDS["Shortlisted Leads"]
+    app = _applicant(fake_base, 4)
+    applicant_id = app["fields"]["Applicant ID"]
+    changed = {app["id"]: {"current": {"cellValuesByFieldId": {AP["LLM Score"]: 7}}}}
+    created = {"recNEW": {"createdTime": "2026-01-01T00:00:00.000Z", "cellValuesByFieldId": {SL["Applicant ID"]: applicant_id}}}
+    payload = {
+        "changedTablesById": {
+            TABLE_APPLICANTS_ID: {"changedRecordsById": changed},
+            TABLE_SHORTLIST_ID: {"createdRecordsById": created},
+        }
+    }
+
+    assert asyncio.run(replica.apply_payload(payload)) == {applicant_id}
+    assert replica.record(TABLE_APPLICANTS_ID, app["id"])["fields"]["LLM Score"] == 7
+    (row,) = replica.rows_for(TABLE_SHORTLIST_ID, applicant_id, use_field_ids=True)
+    assert row["id"] == "recNEW" and row["fields"][SL["Applicant ID"]] == applicant_id
+
+    gone = {"changedTablesById": {TABLE_SHORTLIST_ID: {"destroyedRecordIds": ["recNEW"]}}}
+    assert asyncio.run(replica.apply_payload(gone)) == {applicant_id}
+    assert replica.rows_for(TABLE_SHORTLIST_ID, applicant_id) == []
+
+
+def test_apply_payload_fetches_rows_it_does_not_hold_with_the_async_client(fake_base, replica, monkeypatch):
+    work = fake_base.rows("Work Experience")[0]
+    with replica._lock:
+        replica._drop(TABLE_WORK_ID, work["id"])
+    monkeypatch.setattr(airtable_client.api, "request", None)  # a sync call would fail here
+    changed = {"changedTablesById": {TABLE_WORK_ID: {"changedRecordsById": {work["id"]: {"current": {}}}}}}
+
+    assert asyncio.run(replica.apply_payload(changed)) == {work["fields"]["Applicant ID"]}
+    assert replica.record(TABLE_WORK_ID, work["id"])["fields"] == work["fields"]
+
+
+def test_refresh_applicant_picks_up_edits_and_deletions_made_in_airtable(fake_base, replica):
+    app = _applicant(fake_base, 5)
+    applicant_id = app["fields"]["Applicant ID"]
+    first, *rest = replica.rows_for(TABLE_WORK_ID, applicant_id)
+    with fake_base._lock:
+        fake_base._update("Work Experience", first["id"], {"Title": "Edited in Airtable"})
+        for rec in rest:
+            del fake_base.tables["Work Experience"][rec["id"]]
+
+    result = asyncio.run(compressor.compress_one_async(applicant_id, app["id"], fresh=True))
+
+    (row,) = replica.rows_for(TABLE_WORK_ID, applicant_id)
+    assert row["fields"]["Title"] == "Edited in Airtable"
+    assert [job["title"] for job in json.loads(result["payload"])["experience"]] == ["Edited in Airtable"]
+    assert replica.rows_for(TABLE_APPLICANTS_ID, applicant_id)[0]["id"] == app["id"]
+
+
+def test_background_thread_reloads_to_drop_deleted_rows(fake_base, replica):
+    work = fake_base.rows("Work Experience")[0]
+    with fake_base._lock:
+        del fake_base.tables["Work Experience"][work["id"]]
+    replica.refresh()
+    assert replica.record(TABLE_WORK_ID, work["id"]) is not None  # the modified-since poll can't see deletions
+
+    replica.start(interval=0.01, reload=0)
+    try:
+        for _ in range(200):
+            if replica.record(TABLE_WORK_ID, work["id"]) is None:
+                break
+            time.sleep(0.01)
+    finally:
+        replica.stop()
+    assert replica.record(TABLE_WORK_ID, work["id"]) is None
@@ -0,0 +1,109 @@
+import os
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+from services import shortlist
+from services.rules import RuleSet, RulesFile, DEFAULT_PATH
+from services.shortlist_frame import ApplicantFrame
+
+with open(DEFAULT_PATH) as f:
+    CONFIG = json.load(f)
+
+
+def _config(**salary):
+    return {**CONFIG, "salary": {**CONFIG["salary"], **salary}}
+
+
+def _record(i, rate, location="New York, US"):
+    data = {
+        "personal": {"location": location},
+        "experience": [{"company": "Google", "start": "2018-01-01", "end": "2022-12-31"}],
+        "salary": {"preferred_rate": rate, "availability": "40"},
+    }
+    return {"id": f"recA{i}", "fields": {"Applicant ID": f"APP-{i}", "Compressed JSON": json.dumps(data)}}
+
+
+@pytest.fixture
+def rules_path(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(CONFIG))
+    return path
+
+
+def test_rules_are_compiled_case_folded():
+    rules = RuleSet({**CONFIG, "location": {"allowed_countries": [" uk ", "Germany"]}})
+
+    assert rules.allowed_countries == frozenset({"uk", "germany"})
+    assert "google" in rules.tier_1_companies
+    data = json.loads(_record(1, "90", location="london, UK")["fields"]["Compressed JSON"])
+    data["experience"][0]["company"] = "GOOGLE "
+    assert shortlist.meets_criteria(data, rules)
+
+
+def test_reload_notifies_only_on_real_changes(rules_path):
+    rules_file = RulesFile(str(rules_path))
+    changes = []
+    rules_file.on_change(lambda old, new: changes.append((old.max_rate, new.max_rate)))
+
+    assert not rules_file.reload()  # untouched
+
+    rules_path.write_text(json.dumps(_config(max_rate=90), indent=2))
+    os.utime(rules_path, ns=(1, 1))
+    assert rules_file.reload()
+    assert changes == [(100.0, 90.0)]
+
+    rules_path.write_text(json.dumps(_config(max_rate=90)))  # same rules, new formatting
+    os.utime(rules_path, ns=(2, 2))
+    assert not rules_file.reload()
+
+    rules_path.write_text("{not json")
+    os.utime(rules_path, ns=(3, 3))
+    assert not rules_file.reload()
+    assert rules_file.rules.max_rate == 90.0  # a broken file keeps the last good rules
+    assert "cannot load" in rules_file.load_error
+    assert len(changes) == 1
+
+    rules_path.write_text(json.dumps(_config(max_rate=80)))
+    os.utime(rules_path, ns=(4, 4))
+    assert rules_file.reload() and rules_file.load_error is None
+
+
+def test_flipped_records_compares_old_and_new_rules_locally():
+    records = [_record(1, "80"), _record(2, "95"), _record(3, "100"), _record(4, "120"), {"id": "recX", "fields": {}}]
+
+    flipped = shortlist.flipped_records(records, previous=CONFIG, rules=_config(max_rate=90))
+
+    assert [r["id"] for r in flipped] == ["recA2", "recA3"]
+
+
+def test_rescoring_the_same_records_reuses_the_parsed_frame(monkeypatch):
+    monkeypatch.setattr(shortlist, "_frames", type(shortlist._frames)())
+    built = []
+    monkeypatch.setattr(shortlist, "ApplicantFrame", lambda apps: built.append(len(apps)) or ApplicantFrame(apps))
+    records = [_record(1, "80"), _record(2, "95"), _record(3, "120")]
+
+    assert [r["id"] for r in shortlist.flipped_records(records, CONFIG, _config(max_rate=90))] == ["recA2"]
+    assert [d[1] for d in shortlist.decide_all([dict(r) for r in records], _config(max_rate=130))] == [True] * 3
+    assert built == [3]  # a rules change only re-runs evaluate()
+
+    records[2] = _record(3, "85")  # a changed Compressed JSON is parsed again
+    assert [d[1] for d in shortlist.decide_all(records, _config(max_rate=90))] == [True, False, True]
+    assert built == [3, 3]
+
+
+def test_reshortlist_flipped_only_writes_flipped_applicants():
+    records = [_record(1, "80"), _record(2, "95"), _record(3, "120")]
+    for rec in records:
+        rec["fields"]["Shortlist Status"] = "Shortlisted" if rec["id"] != "recA3" else "Not Shortlisted"
+    tbl_app, tbl_shortlist = MagicMock(), MagicMock()
+    tbl_app.all.return_value = records
+    tbl_shortlist.all.return_value = [{"id": "recSL2", "fields": {"fldj9BtgZqztlyf9i": "APP-2"}}]
+
+    with patch.object(shortlist, "tbl_app", tbl_app), patch.object(shortlist, "tbl_shortlist", tbl_shortlist):
+        result = shortlist.reshortlist_flipped(previous=CONFIG, rules=_config(max_rate=90))
+
+    assert result["message"]["flipped"] == 1
+    assert result["message"]["deleted"] == 1
+    tbl_shortlist.batch_delete.assert_called_once_with(["recSL2"])
+    updates = [r for call in tbl_app.batch_update.call_args_list for r in call.args[0]]
+    assert updates == [{"id": "recA2", "fields": {"fldrIxLofvTyqLcfX": "Not Shortlisted"}}]
@@ -0,0 +1,215 @@
+import json
+import time
+import threading
+import pytest
+from unittest.mock import patch, MagicMock
+from services import shortlist
+
+
+def _applicant(i, location="New York, US"):
+    data = {
+        "personal": {"name": f"Applicant {i}", "location": location},
+        "experience": [{"company": "Google", "title": "SWE", "start": "2018-01-01", "end": "2022-12-31", "tech": ""}],
+        "salary": {"preferred_rate": "90", "min_rate": "75", "currency": "USD", "availability": "40"},
+    }
+    return {"id": f"recA{i}", "fields": {"Applicant ID": f"APP-{i}", "Compressed JSON": json.dumps(data)}}
+
+
+LLM_RESULT = {"summary": "Good", "score": 8, "issues": "None", "follow_ups": "-"}
+
+
+@pytest.fixture
+def tables():
+    tbl_app, tbl_shortlist = MagicMock(), MagicMock()
+    tbl_shortlist.all.return_value = []  # no existing shortlist rows
+    tbl_shortlist.batch_create.side_effect = lambda records, typecast=False: [
+        {"id": f"recS{i}", "fields": f} for i, f in enumerate(records)
+    ]
+    with patch.object(shortlist, "tbl_app", tbl_app), patch.object(shortlist, "tbl_shortlist", tbl_shortlist):
+        yield tbl_app, tbl_shortlist
+
+
+def test_generate_shortlist_runs_llm_calls_concurrently(tables):
+    tbl_app, tbl_shortlist = tables
+    tbl_app.all.side_effect = lambda formula=None, **kw: (
+        [_applicant(i) for i in range(10)] + [_applicant(99, location="Paris, France")] if formula is None else []
+    )
+
+    def slow_llm(applicant_json):
+        time.sleep(0.2)
+        return dict(LLM_RESULT)
+
+    with patch.object(shortlist, "llm_evaluate_applicant", side_effect=slow_llm) as llm:
+        started = time.monotonic()
+        result = shortlist.generate_shortlist(llm_concurrency=10, llm_batch_size=1)
+        elapsed = time.monotonic() - started
+
+    assert result["message"] == {
+        "created": 10,
+        "updated": 0,
+        "deleted": 0,
+        "skipped": 1,
+        "llm_ok": 10,
+        "llm_errors": 0,
+        "status_writes_skipped": 0,
+    }
+    assert llm.call_count == 10
+    assert elapsed < 1.0  # ten 0.2 s evaluations overlapped instead of running back to back
+
+    created = tbl_shortlist.batch_create.call_args.args[0]
+    assert len(created) == 10
+    assert all(row["fldp1lgcJjKh49Hwp"] == "None" for row in created)  # Score Reason folded into the create
+
+
+def test_llm_batches_start_while_the_decision_walk_is_still_running(tables):
+    tbl_app, _ = tables
+    tbl_app.all.return_value = [_applicant(i) for i in range(5)]
+    first_llm_call = threading.Event()
+    progress = MagicMock()
+    progress.skip.return_value = False
+    # the last advance() waits for the first LLM call; if it never comes, it asks for a checkpoint
+    progress.advance.side_effect = lambda app_id: app_id == "APP-4" and not first_llm_call.wait(2)
+
+    def llm(applicant_json):
+        first_llm_call.set()
+        return dict(LLM_RESULT)
+
+    with patch.object(shortlist, "llm_evaluate_applicant", side_effect=llm):
+        result = shortlist.generate_shortlist(llm_batch_size=1, progress=progress)
+
+    progress.checkpoint.assert_not_called()  # the first evaluation started before the last applicant was decided
+    assert result["message"]["llm_ok"] == 5
+
+
+def test_generate_shortlist_batches_llm_requests(tables, monkeypatch):
+    from services import llm_evaluator
+    from tests.fakes import FakeLLMClient
+
+    tbl_app, tbl_shortlist = tables
+    tbl_app.all.return_value = [_applicant(i) for i in range(10)]
+    llm = FakeLLMClient()
+    monkeypatch.setattr(llm_evaluator, "client", llm)
+    monkeypatch.setattr(llm_evaluator, "cache", None)
+
+    result = shortlist.generate_shortlist(llm_batch_size=4)
+
+    assert result["message"]["llm_ok"] == 10
+    assert llm.calls == 3  # 4 + 4 + 2 applicants
+    llm_updates = [r for call in tbl_app.batch_update.call_args_list for r in call.args[0] if "fldLux2quyDtYgCId" in r["fields"]]
+    assert len(llm_updates) == 10
+
+
+def test_generate_shortlist_counts_llm_errors(tables):
+    tbl_app, _ = tables
+    tbl_app.all.side_effect = lambda formula=None, **kw: [_applicant(1)] if formula is None else []
+
+    with patch.object(shortlist, "llm_evaluate_applicant", side_effect=Exception("API Error")):
+        result = shortlist.generate_shortlist()
+
+    assert result["message"]["llm_errors"] == 1
+    assert result["message"]["llm_ok"] == 0
+
+
+def test_failed_llm_queues_reevaluation_instead_of_writing_error(tables, isolated_reevaluation_queue):
+    tbl_app, tbl_shortlist = tables
+    apps = [_applicant(1), _applicant(2)]
+    tbl_app.all.return_value = apps
+
+    with patch.object(shortlist, "llm_evaluate_applicant", side_effect=Exception("API Error")):
+        shortlist.generate_shortlist(llm_batch_size=1)
+
+    app_writes = [r["fields"] for call in tbl_app.batch_update.call_args_list for r in call.args[0]]
+    assert not any("fld8vUBWqkmQZV1f6" in f for f in app_writes)  # LLM Summary untouched, no "Error"
+    created = tbl_shortlist.batch_create.call_args.args[0]
+    assert all("fldp1lgcJjKh49Hwp" not in row for row in created)  # no Score Reason either
+    assert isolated_reevaluation_queue.pending() == ["APP-1", "APP-2"]
+
+    # OpenAI is back: the queued applicants are read in one query each and evaluated
+    tbl_app.all.side_effect = lambda formula=None, **kw: apps if formula else []
+    tbl_shortlist.all.return_value = [
+        {"id": "recSL1", "fields": {"fldj9BtgZqztlyf9i": "APP-1"}},  # APP-2 has since left the shortlist
+    ]
+    with patch.object(shortlist, "llm_evaluate_applicant", return_value=dict(LLM_RESULT)):
+        result = shortlist.reevaluate_queued()
+
+    assert result["message"] == {"queued": 2, "evaluated": 1, "still_queued": 0, "dropped": 1}
+    assert isolated_reevaluation_queue.pending() == []
+    reasons = [r for call in tbl_shortlist.batch_update.call_args_list for r in call.args[0]]
+    assert reasons == [{"id": "recSL1", "fields": {"fldp1lgcJjKh49Hwp": "None"}}]
+
+
+def test_reevaluation_keeps_applicants_that_fail_again(tables, isolated_reevaluation_queue):
+    tbl_app, tbl_shortlist = tables
+    tbl_app.all.return_value = [_applicant(1)]
+    tbl_shortlist.all.return_value = [{"id": "recSL1", "fields": {"fldj9BtgZqztlyf9i": "APP-1"}}]
+    isolated_reevaluation_queue.add("APP-1")
+
+    with patch.object(shortlist, "llm_evaluate_applicant", side_effect=Exception("API Error")):
+        result = shortlist.reevaluate_queued()
+
+    assert result["message"]["still_queued"] == 1
+    assert isolated_reevaluation_queue.attempts("APP-1") == 2
+    tbl_app.batch_update.assert_not_called()
+
+
+def test_generate_shortlist_reads_each_table_once(tables):
+    tbl_app, tbl_shortlist = tables
+    apps = [_applicant(i) for i in range(5)] + [_applicant(9, location="Paris, France")]
+    tbl_app.all.return_value = apps
+    tbl_shortlist.all.return_value = [
+        # field-ID keyed rows (use_field_ids=True)
+        {"id": "recSL0", "fields": {"fldj9BtgZqztlyf9i": "APP-0", "fldz3edoeYxUoFVYW": apps[0]["fields"]["Compressed JSON"]}},
+        {"id": "recSL1", "fields": {"fldj9BtgZqztlyf9i": "APP-1", "fldz3edoeYxUoFVYW": "{}"}},
+        {"id": "recSL9", "fields": {"fldj9BtgZqztlyf9i": "APP-9", "fldz3edoeYxUoFVYW": "{}"}},
+    ]
+
+    with patch.object(shortlist, "llm_evaluate_applicant", return_value=dict(LLM_RESULT)):
+        result = shortlist.generate_shortlist(llm_batch_size=1)
+
+    assert result["message"] == {
+        "created": 3,
+        "updated": 1,
+        "deleted": 1,
+        "skipped": 1,
+        "llm_ok": 4,
+        "llm_errors": 0,
+        "status_writes_skipped": 0,
+    }
+    tbl_app.all.assert_called_once_with()
+    tbl_shortlist.all.assert_called_once_with(use_field_ids=True)
+    tbl_shortlist.batch_delete.assert_called_once_with(["recSL9"])
+    status_updates = [r for call in tbl_app.batch_update.call_args_list for r in call.args[0]]
+    assert {r["id"] for r in status_updates} == {f"recA{i}" for i in (0, 1, 2, 3, 4, 9)}
+
+
+def test_status_is_only_written_on_transitions(tables):
+    tbl_app, _ = tables
+    stable = _applicant(1)
+    stable["fields"]["Shortlist Status"] = "Shortlisted"
+    flipped = _applicant(2, location="Paris, France")
+    flipped["fields"]["Shortlist Status"] = "Shortlisted"
+    rejected = _applicant(3, location="Paris, France")
+    rejected["fields"]["Shortlist Status"] = "Not Shortlisted"
+    tbl_app.all.return_value = [stable, flipped, rejected]
+
+    with patch.object(shortlist, "llm_evaluate_applicant", return_value=dict(LLM_RESULT)):
+        result = shortlist.generate_shortlist()
+
+    assert result["message"]["status_writes_skipped"] == 2
+    status_updates = [
+        r for call in tbl_app.batch_update.call_args_list for r in call.args[0] if "fldrIxLofvTyqLcfX" in r["fields"]
+    ]
+    assert status_updates == [{"id": "recA2", "fields": {"fldrIxLofvTyqLcfX": "Not Shortlisted"}}]
+
+
+def test_generate_shortlist_one_skips_unchanged_status(tables):
+    tbl_app, tbl_shortlist = tables
+    app_rec = _applicant(1, location="Paris, France")
+    app_rec["fields"]["Shortlist Status"] = "Not Shortlisted"
+    tbl_app.get.return_value = app_rec
+
+    result = shortlist.generate_shortlist_one("APP-1", "recA1")
+
+    assert result["status"] == "Not Shortlisted"
+    tbl_app.update.assert_not_called()
+    tbl_app.all.assert_not_called()
@@ -0,0 +1,79 @@
+import random
+import pytest
+from datetime import date
+from services.shortlist import meets_criteria
+from services.shortlist_frame import ApplicantFrame, meets_criteria_many, parse_dates, _scalar_ordinal
+import pandas as pd
+
+DATES = [
+    "2015-03-01", "2018-01-01", "2020-02-29", "2019-02-29", "2021-13-01", "2022-12-31", "2023-6-5",
+    "2017", "0000", "0000-01-01", " 2016", "2016-01-01T00:00", "", "soon", "2024-04-31", "1999-12-31",
+]
+LOCATIONS = [
+    "New York, US", "US", "Berlin, Germany", "Paris, France", "Toronto, Canada ", "london, uk",
+    "Bangalore,India", "", "Nowhere, ", "A, B, UK", " India ",
+]
+COMPANIES = ["Google", " Meta ", "google", "Acme", "", "OpenAI", "Netflix Inc"]
+RATES = ["90", "100", "100.0", "101", " 80 ", "abc", None, 95, 120.5, "nan", "1e2", True, "inf"]
+AVAILABILITY = ["40", "20", "19.99", "", None, 30, "nan", "-inf"]
+
+
+def _random_applicant(rng: random.Random) -> dict:
+    experiences = []
+    for _ in range(rng.randint(0, 4)):
+        exp = {"company": rng.choice(COMPANIES), "start": rng.choice(DATES)}
+        end = rng.choice(DATES + [None, None])
+        if rng.random() < 0.9:
+            exp["end"] = end
+        experiences.append(exp)
+    salary = {}
+    if rng.random() < 0.95:
+        salary["preferred_rate"] = rng.choice(RATES)
+    if rng.random() < 0.95:
+        salary["availability"] = rng.choice(AVAILABILITY)
+    return {"personal": {"location": rng.choice(LOCATIONS)}, "experience": experiences, "salary": salary}
+
+
+def test_parse_dates_matches_scalar_parser():
+    values = DATES + ["2000-02-29", "1900-02-29", "9999-12-31", "0001-01-01", "12-01-2020"]
+    expected = [_scalar_ordinal(v) for v in values]
+    assert parse_dates(pd.Series(values, dtype=object)).tolist() == expected
+    assert expected[1] == date(2018, 1, 1).toordinal()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_frame_matches_meets_criteria(seed):
+    rng = random.Random(seed)
+    applicants = [_random_applicant(rng) for _ in range(2000)]
+
+    assert meets_criteria_many(applicants) == [meets_criteria(a) for a in applicants]
+
+
+def test_frame_matches_meets_criteria_under_other_rules():
+    rng = random.Random(42)
+    applicants = [_random_applicant(rng) for _ in range(2000)]
+    rules = {
+        "experience": {"min_years": 2.5, "tier_1_companies": {"Acme"}},
+        "salary": {"max_rate": 90, "min_availability": 30},
+        "location": {"allowed_countries": {"US", "France"}},
+    }
+    frame = ApplicantFrame(applicants)
+
+    assert frame.evaluate(rules).tolist() == [meets_criteria(a, rules) for a in applicants]
+
+
+def test_irregular_shapes_fall_back_to_meets_criteria():
+    odd = {"personal": {"location": "US"}, "salary": {"preferred_rate": "1", "availability": "40"}, "experience": [{"company": None}]}
+    frame = ApplicantFrame([{"personal": {"location": "Paris, France"}}, odd])
+
+    assert frame.fallback == {1: odd}
+    assert frame.evaluate().tolist() == [False, False]  # a None company is no Tier-1 match, not an error
+
+
+def test_non_text_companies_do_not_abort_a_sweep():
+    def applicant(company):
+        experience = [{"company": company, "start": "2023-01-01", "end": "2023-06-01"}, {"company": "Google"}]
+        return {"personal": {"location": "US"}, "salary": {"preferred_rate": "90", "availability": "40"}, "experience": experience}
+
+    applicants = [applicant(None), applicant(42), applicant(["Meta"])]
+    assert meets_criteria_many(applicants) == [meets_criteria(a) for a in applicants] == [True, True, True]
@@ -0,0 +1,151 @@
+import hmac
+import base64
+import asyncio
+import hashlib
+import pytest
+from services import airtable_client, airtable_async, webhooks
+from services.webhooks import Debouncer, WebhookIngestor, verify_signature
+from dictionaries.constants import FIELD_NAMES_TO_IDS, TABLE_APPLICANTS_ID, TABLE_PERSONAL_ID, TABLE_WORK_ID
+from tests.fakes import FakeAirtable, seed_applicants
+
+
+def test_signature_is_checked_only_when_a_secret_is_set():
+    secret = base64.b64encode(b"shh").decode()
+    body = b'{"webhook": {"id": "ach1"}}'
+    mac = "hmac-sha256=" + hmac.new(b"shh", body, hashlib.sha256).hexdigest()
+
+    assert verify_signature(body, mac, secret)
+    assert not verify_signature(body + b" ", mac, secret)
+    assert not verify_signature(body, None, secret)
+    assert verify_signature(body, None, "")
+
+
+def test_burst_of_changes_runs_once_after_the_quiet_window():
+    runs = []
+
+    async def action(key):
+        runs.append((key, asyncio.get_running_loop().time()))
+
+    async def scenario():
+        debouncer = Debouncer(action, window=0.05, max_delay=10)
+        start = asyncio.get_running_loop().time()
+        for _ in range(3):  # three forms submitted 20 ms apart
+            debouncer.touch("APP-1")
+            debouncer.touch("APP-2")
+            await asyncio.sleep(0.02)
+        assert runs == []
+        await asyncio.sleep(0.1)
+        return debouncer, start
+
+    debouncer, start = asyncio.run(scenario())
+    assert sorted(key for key, _at in runs) == ["APP-1", "APP-2"]
+    assert all(at - start >= 0.09 for _key, at in runs)  # 40 ms of touches + the 50 ms window
+    assert debouncer.touches == 6 and debouncer.runs == 2
+
+
+def test_max_delay_bounds_a_never_ending_burst_and_flush_runs_pending():
+    runs = []
+
+    async def action(key):
+        runs.append(key)
+
+    async def scenario():
+        debouncer = Debouncer(action, window=0.05, max_delay=0.1)
+        for _ in range(8):
+            debouncer.touch("APP-1")
+            await asyncio.sleep(0.02)
+        assert runs == ["APP-1"]  # ran at the 100 ms deadline despite the steady edits
+        debouncer.touch("APP-2")
+        await debouncer.flush()
+        assert debouncer.pending() == []
+
+    asyncio.run(scenario())
+    assert runs[-1] == "APP-2"
+
+
+@pytest.fixture
+def fake_base(monkeypatch):
+    fake = FakeAirtable()
+    seed_applicants(fake, 3)
+    monkeypatch.setattr(airtable_client.api, "rate", 1000.0)
+    monkeypatch.setattr(airtable_client.api, "_buckets", {})
+    with fake.installed_async(airtable_async.aapi):
+        yield fake
+
+
+class FakePayloads:
+    """webhook_payloads() stand-in serving fixed pages after the requested cursor."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.cursors = []
+
+    async def webhook_payloads(self, base_id, webhook_id, cursor=None):
+        self.cursors.append(cursor)
+        index = int(cursor or 0)
+        if index >= len(self.pages):
+            return {"payloads": [], "cursor": index, "mightHaveMore": False}
+        return {"payloads": self.pages[index], "cursor": index + 1, "mightHaveMore": index + 1 < len(self.pages)}
+
+
+def test_ingest_maps_child_rows_to_applicants_and_saves_the_cursor(fake_base, monkeypatch, isolated_watermarks):
+    PD = FIELD_NAMES_TO_IDS["Personal Details"]
+    work_row = next(r for r in fake_base.rows("Work Experience") if r["fields"]["Applicant ID"] == "APP-000002")
+    app_row = fake_base.rows("Applicants")[2]
+    personal_created = {"recP": {"cellValuesByFieldId": {PD["Applicant ID"]: "APP-000001"}}}
+    personal_changed = {"recP": {"unchanged": {"cellValuesByFieldId": {PD["Applicant ID"]: "APP-000001"}}}}
+    work_changed = {work_row["id"]: {"current": {"cellValuesByFieldId": {}}}}  # no Applicant ID: the row is read
+    pages = [
+        [
+            {"changedTablesById": {TABLE_PERSONAL_ID: {"createdRecordsById": personal_created}}},
+            {"changedTablesById": {TABLE_APPLICANTS_ID: {"changedRecordsById": {app_row["id"]: {"current": {}}}}}},
+        ],
+        [
+            {"changedTablesById": {TABLE_WORK_ID: {"changedRecordsById": work_changed}}},
+            {"changedTablesById": {TABLE_PERSONAL_ID: {"changedRecordsById": personal_changed}}},
+        ],
+    ]
+    payloads = FakePayloads(pages)
+    monkeypatch.setattr(webhooks, "aapi", payloads)
+    processed = []
+
+    async def process(applicant_id):
+        processed.append(applicant_id)
+
+    async def scenario():
+        ingestor = WebhookIngestor(process, window=0.01, max_delay=1)
+        first = await ingestor.ingest("ach1")
+        second = await ingestor.ingest("ach1")  # nothing new after the saved cursor
+        await asyncio.sleep(0.05)
+        return first, second, ingestor
+
+    first, second, ingestor = asyncio.run(scenario())
+    assert first == {"APP-000001", "APP-000002"} and second == set()
+    assert sorted(processed) == ["APP-000001", "APP-000002"]  # APP-000001 changed twice, processed once
+    assert payloads.cursors == [None, 1, 2]
+    assert isolated_watermarks.get(f"webhook:{ingestor.base_id}:ach1") == "2"
+    assert ingestor.snapshot() == {"pending_applicants": 0, "changes_coalesced": 1, "runs": 2}
+
+
+def test_notifications_during_a_drain_are_coalesced(monkeypatch):
+    ingested = []
+
+    async def scenario():
+        ingestor = WebhookIngestor(lambda key: None)
+        release = asyncio.Event()
+
+        async def ingest(webhook_id):
+            ingested.append(webhook_id)
+            await release.wait()
+            return set()
+
+        monkeypatch.setattr(ingestor, "ingest", ingest)
+        ingestor.notify("ach1")
+        await asyncio.sleep(0)  # the drain is now running
+        for _ in range(4):
+            ingestor.notify("ach1")
+        release.set()
+        await ingestor.aclose()
+
+    asyncio.run(scenario())
+    assert ingested == ["ach1", "ach1"]  # the running drain plus one more round for everything that arrived